@@ -0,0 +1,19 @@
+from django.contrib import admin, messages
+
+from core.models import FailedEmail
+from core.tasks import send_emails
+
+
+@admin.register(FailedEmail)
+class FailedEmailAdmin(admin.ModelAdmin):
+    list_display = ("id", "created_at", "subject", "from_email", "attempts")
+    search_fields = ("subject", "from_email")
+    readonly_fields = ("created_at", "from_email", "recipients", "subject", "message", "error", "attempts")
+    actions = ("requeue",)
+
+    @admin.action(description="Re-queue selected emails")
+    def requeue(self, request, queryset):
+        failed = list(queryset)
+        send_emails.delay([email.to_message() for email in failed])
+        queryset.filter(pk__in=[email.pk for email in failed]).delete()
+        self.message_user(request, f"Re-queued {len(failed)} email(s).", messages.SUCCESS)
@@ -0,0 +1,13 @@
+from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+
+
+class CoreConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "core"
+
+    def ready(self):
+        from core import signals  # noqa: F401
+        from core.metrics import install_query_timer
+
+        connection_created.connect(install_query_timer, dispatch_uid="core.metrics.install_query_timer")
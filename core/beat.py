@@ -0,0 +1,131 @@
+import contextlib
+import time
+from datetime import timedelta
+
+from celery.utils.log import get_logger
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DatabaseError, InterfaceError, close_old_connections
+from django.db.models import Q
+from django.utils import timezone
+from django_celery_beat.models import PeriodicTask, PeriodicTasks
+from django_celery_beat.schedulers import DatabaseScheduler
+
+from core.cache import uses_shared_cache
+
+logger = get_logger(__name__)
+
+SCHEDULE_VERSION_KEY = "beat:schedule:version"
+# Re-reads tasks changed slightly before the last refresh, in case clocks of the
+# processes writing ``date_changed`` and of beat disagree.
+CLOCK_SKEW = timedelta(seconds=30)
+
+
+def get_schedule_version():
+    # django-celery-beat's own bulk changes, e.g. the admin's enable/disable actions, only
+    # call PeriodicTasks.update_changed(), so its stamp is part of the version too.
+    last_change = PeriodicTasks.last_change()
+    if uses_shared_cache():
+        return cache.get(SCHEDULE_VERSION_KEY), last_change
+    return last_change
+
+
+def bump_schedule_version():
+    """
+    Tells ``CachedDatabaseScheduler`` to re-read changed tasks. Called by ``core.signals``;
+    bulk ``QuerySet.update()`` calls on periodic tasks must call it (or
+    ``PeriodicTasks.update_changed()``) themselves.
+    """
+    if uses_shared_cache():
+        cache.set(SCHEDULE_VERSION_KEY, time.time_ns(), None)
+    else:
+        PeriodicTasks.update_changed()
+
+
+class CachedDatabaseScheduler(DatabaseScheduler):
+    """
+    ``DatabaseScheduler`` which keeps the schedule and Celery's heap of due times in memory
+    between changes.
+
+    The stock scheduler queries the change table on every tick, compares every entry of
+    the schedule on every tick, and re-reads every task after any change. This one looks
+    at the schedule version at most every ``BEAT_SCHEDULE_CHECK_INTERVAL`` seconds. After
+    a change it re-reads only the tasks whose ``date_changed`` moved or which are enabled
+    but missing from the schedule, plus the names of enabled tasks to drop disabled and
+    deleted ones, so the load beat puts on the database does not grow with the number of
+    periodic tasks.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self._version = None
+        self._checked_at = 0.0
+        self._refreshed_at = None
+        self.check_interval = settings.BEAT_SCHEDULE_CHECK_INTERVAL
+        super().__init__(*args, **kwargs)
+
+    @property
+    def schedule(self):
+        if self._initial_read:
+            self._initial_read = False
+            self._version = get_schedule_version()
+            self._refreshed_at = timezone.now()
+            self._schedule = self.all_as_schedule()
+        elif self.schedule_changed():
+            self.refresh()
+        return self._schedule
+
+    def schedule_changed(self):
+        checked_at = time.monotonic()
+        if checked_at - self._checked_at < self.check_interval:
+            return False
+        self._checked_at = checked_at
+        try:
+            close_old_connections()
+            version = get_schedule_version()
+        except (DatabaseError, InterfaceError):
+            logger.exception("CachedDatabaseScheduler: could not read the schedule version")
+            return False
+        if version == self._version:
+            return False
+        self._version = version
+        return True
+
+    def refresh(self):
+        # Unsaved run times would be overwritten by the rows read back below.
+        self.sync()
+        refreshed_at = timezone.now()
+        try:
+            close_old_connections()
+            enabled = set(PeriodicTask.objects.enabled().values_list("name", flat=True))
+            # Tasks enabled by a bulk update() keep their old date_changed.
+            missing = enabled - set(self._schedule)
+            changed = list(
+                PeriodicTask.objects.filter(
+                    Q(date_changed__gte=self._refreshed_at - CLOCK_SKEW) | Q(name__in=missing)
+                ).select_related("interval", "crontab", "solar", "clocked")
+            )
+        except (DatabaseError, InterfaceError):
+            logger.exception("CachedDatabaseScheduler: could not refresh the schedule")
+            # Retry on the next check.
+            self._version = None
+            return
+
+        for name in set(self._schedule) - enabled:
+            del self._schedule[name]
+        for model in changed:
+            self._schedule.pop(model.name, None)
+            if model.name in enabled:
+                # Tasks with an invalid schedule are skipped, as in all_as_schedule().
+                with contextlib.suppress(ValueError):
+                    self._schedule[model.name] = self.Entry(model, app=self.app)
+        self._refreshed_at = refreshed_at
+        logger.info("CachedDatabaseScheduler: schedule changed, %d task(s) re-read", len(changed))
+        self._heap = []
+        self._heap_invalidated = True
+
+    def schedules_equal(self, *args, **kwargs):
+        # Only refresh() changes the schedule, so skip comparing every entry on every tick.
+        if self._heap_invalidated:
+            self._heap_invalidated = False
+            return False
+        return True
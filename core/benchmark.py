@@ -0,0 +1,40 @@
+import statistics
+import time
+
+from django.db import connections
+from django.test.utils import CaptureQueriesContext
+
+
+def percentile(samples, percent):
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(percent / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def measure(func, repeat=20, warmup=2, using="default"):
+    """
+    Calls ``func`` ``repeat`` times after ``warmup`` untimed calls and returns latency
+    percentiles in milliseconds, throughput and the number of queries of the last call.
+    """
+    for _ in range(warmup):
+        func()
+
+    durations = []
+    with CaptureQueriesContext(connections[using]) as queries:
+        for _ in range(repeat):
+            start_query = len(queries)
+            start = time.perf_counter()
+            func()
+            durations.append(time.perf_counter() - start)
+            last_queries = len(queries) - start_query
+
+    total = sum(durations)
+    return {
+        "repeat": repeat,
+        "throughput": round(repeat / total, 2) if total else None,
+        "mean_ms": round(statistics.fmean(durations) * 1000, 3),
+        "p50_ms": round(percentile(durations, 50) * 1000, 3),
+        "p95_ms": round(percentile(durations, 95) * 1000, 3),
+        "p99_ms": round(percentile(durations, 99) * 1000, 3),
+        "queries": last_queries,
+    }
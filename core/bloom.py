@@ -0,0 +1,47 @@
+import math
+
+
+class BloomFilter:
+    """
+    Set membership in a fixed bit array: ``in`` may answer True for a key never added
+    (with probability ``error_rate`` while holding at most ``capacity`` keys) but never
+    answers False for one that was.
+
+    Bit positions come from ``hash()``, which is salted per interpreter, so a filter is
+    only meaningful inside the process that filled it.
+    """
+
+    def __init__(self, capacity, error_rate=0.001):
+        self.capacity = max(1, capacity)
+        self.error_rate = error_rate
+        self.size = max(8, math.ceil(-self.capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hash_count = max(1, round(self.size / self.capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def _positions(self, key):
+        # Double hashing (Kirsch-Mitzenmacher): two halves of one 64-bit hash derive every position.
+        value = hash(key) & 0xFFFFFFFFFFFFFFFF
+        first, second = value & 0xFFFFFFFF, (value >> 32) | 1
+        for index in range(self.hash_count):
+            yield (first + index * second) % self.size
+
+    def add(self, key):
+        for position in self._positions(key):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, key):
+        # The hot path: no generator, and most absent keys stop at the first clear bit.
+        value = hash(key) & 0xFFFFFFFFFFFFFFFF
+        first, second = value & 0xFFFFFFFF, (value >> 32) | 1
+        bits, size = self.bits, self.size
+        for index in range(self.hash_count):
+            position = (first + index * second) % size
+            if not bits[position >> 3] & (1 << (position & 7)):
+                return False
+        return True
+
+    def __len__(self):
+        # Keys added, counting repeats; compare with ``capacity`` to know when to rebuild.
+        return self.count
@@ -0,0 +1,358 @@
+import logging
+import math
+import os
+import pickle
+import random
+import threading
+import time
+import uuid
+
+import redis
+from django.conf import settings
+from django.core.cache.backends.base import DEFAULT_TIMEOUT
+from django.core.cache.backends.redis import RedisCache
+
+from core.lru import TTLLRUCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LOCAL_OPTIONS = {
+    "LOCAL_MAX_SIZE": 10000,
+    "LOCAL_TIMEOUT": 5,
+    "INVALIDATION_CHANNEL": "cache:invalidate",
+    "LOCK_TIMEOUT": 10,
+}
+
+_CLEAR = "*"
+
+# Per-process caches: a value written by one process is invisible to the others.
+LOCAL_CACHE_BACKENDS = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
+
+
+def uses_shared_cache():
+    """
+    Whether the default cache can carry version stamps from one process to the others.
+    """
+    return settings.CACHES["default"]["BACKEND"] not in LOCAL_CACHE_BACKENDS
+
+
+class LocalTier:
+    """
+    The in-process tier shared by every ``TwoTierRedisCache`` of a process using the same
+    Redis servers and invalidation channel. Django builds a cache backend per thread, and
+    per request task under ASGI, so the LRU, the per-key locks and the subscriber thread
+    with its pub/sub connection must not belong to a backend instance.
+    """
+
+    _tiers = {}
+    _tiers_lock = threading.Lock()
+
+    def __init__(self, client, channel, max_size, timeout):
+        self.client = client
+        self.channel = channel
+        self.pid = os.getpid()
+        # Tells this process's own invalidations, already applied, apart from the others'.
+        self.sender = uuid.uuid4().hex
+        self.entries = TTLLRUCache(max_size=max_size, ttl=timeout)
+        self.key_locks = [threading.Lock() for _ in range(64)]
+        if timeout:
+            threading.Thread(target=self.listen, name="cache-invalidation", daemon=True).start()
+
+    @classmethod
+    def get(cls, backend):
+        key = (tuple(backend._servers), backend.channel, os.getpid())
+        tier = cls._tiers.get(key)
+        if tier is None:
+            with cls._tiers_lock:
+                tier = cls._tiers.get(key)
+                if tier is None:
+                    # After a fork the parent's tiers, threads and subscriptions are not ours.
+                    for stale in [stale for stale in cls._tiers if stale[2] != key[2]]:
+                        del cls._tiers[stale]
+                    tier = cls._tiers[key] = cls(
+                        backend._cache.get_client(write=True),
+                        backend.channel,
+                        backend.local_max_size,
+                        backend.local_timeout,
+                    )
+        return tier
+
+    def listen(self):
+        while True:
+            try:
+                pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(self.channel)
+                # Anything cached while unsubscribed may have been invalidated meanwhile.
+                self.entries.clear()
+                for message in pubsub.listen():
+                    sender, _, key = message["data"].decode().partition(":")
+                    if sender == self.sender:
+                        continue
+                    if key == _CLEAR:
+                        self.entries.clear()
+                    else:
+                        self.entries.delete(key)
+            except Exception:
+                logger.warning("Cache invalidation subscription lost, retrying", exc_info=True)
+                time.sleep(1)
+
+    def publish(self, client, key):
+        client.publish(self.channel, f"{self.sender}:{key}")
+
+
+class TwoTierRedisCache(RedisCache):
+    """
+    Django's ``RedisCache`` with a bounded in-process LRU in front of it.
+
+    Reads are served from process memory (a ``LocalTier``) for at most ``LOCAL_TIMEOUT``
+    seconds. Writes and deletes go to Redis and are published on ``INVALIDATION_CHANNEL``;
+    a daemon thread in every process drops the published keys from its local tier, so ``LOCAL_TIMEOUT``
+    only bounds staleness while that subscription is down. Keys carry Django's cache
+    ``VERSION``, so bumping it (or ``incr_version``) invalidates across every tier.
+
+    ``get_or_set`` computes a missing value once across processes (a Redis lock plus a
+    per-process lock), and ``get_or_compute`` additionally recomputes hot keys a little
+    before they expire so they never all expire at once.
+
+    Any remaining ``OPTIONS`` are passed to the Redis connection pool, e.g.
+    ``{"connection_class": fakeredis.FakeConnection}`` in tests.
+    """
+
+    def __init__(self, server, params):
+        options = dict(params.get("OPTIONS", {}))
+        config = {name: options.pop(name, default) for name, default in DEFAULT_LOCAL_OPTIONS.items()}
+        super().__init__(server, {**params, "OPTIONS": options})
+        self.local_max_size = config["LOCAL_MAX_SIZE"]
+        self.local_timeout = config["LOCAL_TIMEOUT"]
+        self.channel = config["INVALIDATION_CHANNEL"]
+        self.lock_timeout = config["LOCK_TIMEOUT"]
+        self._tier = None
+
+    # Local tier ----------------------------------------------------------------------
+
+    @property
+    def tier(self):
+        if self._tier is None or self._tier.pid != os.getpid():
+            self._tier = LocalTier.get(self)
+        return self._tier
+
+    @property
+    def local(self):
+        return self.tier.entries
+
+    def _local_get(self, key):
+        data = self.local.get(key)
+        # Values are pickled so callers can never mutate the cached copy.
+        return None if data is None else pickle.loads(data)
+
+    def _local_set(self, key, value, timeout):
+        if not self.local_timeout or timeout == 0:
+            return
+        ttl = self.local_timeout if timeout is None else min(timeout, self.local_timeout)
+        self.local.set(key, pickle.dumps(value, pickle.HIGHEST_PROTOCOL), ttl)
+
+    def _invalidate(self, *keys):
+        for key in keys:
+            self.local.delete(key)
+        if self.local_timeout and keys:
+            client = self._cache.get_client(write=True)
+            for key in keys:
+                self.tier.publish(client, key)
+
+    # Cache API -----------------------------------------------------------------------
+
+    def get(self, key, default=None, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = self._local_get(key)
+        if value is not None:
+            return value
+        value = self._cache.get(key, None)
+        if value is None:
+            return default
+        self._local_set(key, value, self.local_timeout)
+        return value
+
+    def get_many(self, keys, version=None):
+        key_map = {self.make_and_validate_key(key, version=version): key for key in keys}
+        found = {}
+        missing = []
+        for key in key_map:
+            value = self._local_get(key)
+            if value is None:
+                missing.append(key)
+            else:
+                found[key] = value
+        if missing:
+            for key, value in self._cache.get_many(missing).items():
+                self._local_set(key, value, self.local_timeout)
+                found[key] = value
+        return {key_map[key]: value for key, value in found.items()}
+
+    def has_key(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        return self.local.get(key) is not None or self._cache.has_key(key)
+
+    def set(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        timeout = self.get_backend_timeout(timeout)
+        self._cache.set(key, value, timeout)
+        self._invalidate(key)
+        self._local_set(key, value, timeout)
+
+    def add(self, key, value, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        timeout = self.get_backend_timeout(timeout)
+        added = self._cache.add(key, value, timeout)
+        if added:
+            self._invalidate(key)
+            self._local_set(key, value, timeout)
+        return added
+
+    def set_many(self, data, timeout=DEFAULT_TIMEOUT, version=None):
+        if not data:
+            return []
+        safe_data = {self.make_and_validate_key(key, version=version): value for key, value in data.items()}
+        timeout = self.get_backend_timeout(timeout)
+        self._cache.set_many(safe_data, timeout)
+        self._invalidate(*safe_data)
+        for key, value in safe_data.items():
+            self._local_set(key, value, timeout)
+        return []
+
+    def touch(self, key, timeout=DEFAULT_TIMEOUT, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        self.local.delete(key)
+        return self._cache.touch(key, self.get_backend_timeout(timeout))
+
+    def incr(self, key, delta=1, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        value = self._cache.incr(key, delta)
+        self._invalidate(key)
+        return value
+
+    def delete(self, key, version=None):
+        key = self.make_and_validate_key(key, version=version)
+        deleted = self._cache.delete(key)
+        self._invalidate(key)
+        return deleted
+
+    def delete_many(self, keys, version=None):
+        if not keys:
+            return
+        safe_keys = [self.make_and_validate_key(key, version=version) for key in keys]
+        self._cache.delete_many(safe_keys)
+        self._invalidate(*safe_keys)
+
+    def clear(self):
+        cleared = self._cache.clear()
+        self._invalidate(_CLEAR)
+        self.local.clear()
+        return cleared
+
+    # Stampede protection -------------------------------------------------------------
+
+    def _key_lock(self, key):
+        key_locks = self.tier.key_locks
+        return key_locks[hash(key) % len(key_locks)]
+
+    def _acquire(self, key, version):
+        """
+        Takes the Redis lock of ``key`` for ``LOCK_TIMEOUT`` seconds. Returns the token proving
+        ownership, needed to release it, or None when someone else holds it.
+        """
+        lock_key = self.make_and_validate_key(f"{key}:lock", version=version)
+        token = uuid.uuid4().hex
+        client = self._cache.get_client(lock_key, write=True)
+        return token if client.set(lock_key, token, nx=True, px=int(self.lock_timeout * 1000)) else None
+
+    def _release(self, key, version, token):
+        # Compare-and-delete: once it expired, the lock may belong to someone else.
+        lock_key = self.make_and_validate_key(f"{key}:lock", version=version)
+        with self._cache.get_client(lock_key, write=True).pipeline() as pipe:
+            try:
+                pipe.watch(lock_key)
+                if pipe.get(lock_key) == token.encode():
+                    pipe.multi()
+                    pipe.delete(lock_key)
+                    pipe.execute()
+            except redis.WatchError:
+                pass
+
+    def _single_flight(self, key, compute, store, version):
+        """
+        Runs ``compute()`` and ``store(value)`` in one thread of one process at a time for
+        ``key``; everyone else waits up to ``LOCK_TIMEOUT`` for the value to appear.
+        """
+        with self._key_lock(key):
+            value = self.get(key, version=version)
+            if value is not None:
+                return value
+            deadline = time.monotonic() + self.lock_timeout
+            while not (token := self._acquire(key, version)):
+                time.sleep(0.05)
+                value = self.get(key, version=version)
+                if value is not None:
+                    return value
+                if time.monotonic() > deadline:
+                    # The holder is stuck or gone: compute without the lock rather than fail.
+                    break
+            try:
+                value = compute()
+                store(value)
+            finally:
+                if token:
+                    self._release(key, version, token)
+        return value
+
+    def get_or_set(self, key, default, timeout=DEFAULT_TIMEOUT, version=None):
+        value = self.get(key, version=version)
+        if value is not None:
+            return value
+        if not callable(default):
+            return super().get_or_set(key, default, timeout=timeout, version=version)
+
+        def store(value):
+            if value is not None:
+                self.add(key, value, timeout=timeout, version=version)
+
+        return self._single_flight(key, default, store, version)
+
+    def get_or_compute(self, key, compute, timeout=DEFAULT_TIMEOUT, beta=1.0, version=None):
+        """
+        Like ``get_or_set``, but each reader recomputes the value early with a probability
+        growing as it nears expiry (XFetch), weighted by how long ``compute()`` took. Keys
+        written here hold an envelope and must only be read through this method.
+        """
+        envelope = self.get(key, version=version)
+        if envelope is not None:
+            value, delta, expires_at = envelope
+            if expires_at is None or time.time() - delta * beta * math.log(1.0 - random.random()) < expires_at:
+                return value
+
+        timeout = self.get_backend_timeout(timeout)
+
+        def compute_envelope():
+            start = time.time()
+            value = compute()
+            delta = time.time() - start
+            return value, delta, None if timeout is None else time.time() + timeout
+
+        def store(envelope):
+            self.set(key, envelope, timeout=timeout, version=version)
+
+        if envelope is not None:
+            # Refreshing early: keep serving the current value while someone else recomputes it.
+            token = self._acquire(key, version)
+            if not token:
+                return envelope[0]
+            try:
+                envelope = compute_envelope()
+                store(envelope)
+            finally:
+                self._release(key, version, token)
+            return envelope[0]
+
+        return self._single_flight(key, compute_envelope, store, version)[0]
@@ -1,6 +1,12 @@
 import os
+
 from celery import Celery
+from celery.schedules import crontab
+from celery.signals import worker_process_shutdown, worker_shutdown
 from decouple import config
+from django.conf import settings
+
+from core.log_handlers import stop_listeners
 
 # set the default Django settings module for the 'celery' program.
 # this is also used in manage.py
@@ -16,3 +22,32 @@ app.config_from_object('django.conf:settings', namespace='CELERY')
 
 # Load task modules from all registered Django app configs.
 app.autodiscover_tasks()
+
+app.conf.beat_schedule = {
+    # Deletes django-db task results older than TASK_RESULT_RETENTION in small batches.
+    "cleanup-task-results": {
+        "task": "core.tasks.cleanup_task_results",
+        "schedule": crontab(minute=config("TASK_RESULT_CLEANUP_MINUTE", default="*/15")),
+    },
+    # Keeps the revocation lists every process loads down to tokens which can still be used.
+    "delete-expired-revocations": {
+        "task": "users.tasks.delete_expired_revocations",
+        "schedule": crontab(minute=0),
+    },
+}
+
+
+@app.on_after_configure.connect
+def add_last_login_flush(sender, **kwargs):
+    # Bounds how stale users.last_login can be. Only the "redis" buffer is flushed by a task; the
+    # "memory" one by every web process. Settings are read here, once Django has loaded them.
+    buffer = settings.LAST_LOGIN_BUFFER
+    if buffer["BACKEND"] == "redis":
+        sender.add_periodic_task(
+            buffer["FLUSH_INTERVAL"], sender.signature("users.tasks.flush_last_login"), name="flush-last-login"
+        )
+
+
+# Pool processes exit without running atexit hooks: flush their queued log records first.
+worker_process_shutdown.connect(stop_listeners)
+worker_shutdown.connect(stop_listeners)
@@ -0,0 +1,73 @@
+import hashlib
+
+from django.conf import settings
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date, quote_etag
+
+
+def make_etag(*parts):
+    """
+    Quoted ETag hashing ``parts`` (e.g. the version fields of a model instance) together with
+    ``CODE_VERSION``, so a deploy changing the representation changes every ETag.
+    """
+    value = "\x1f".join(str(part) for part in (settings.CODE_VERSION, *parts))
+    return quote_etag(hashlib.md5(value.encode(), usedforsecurity=False).hexdigest())
+
+
+def instance_etag(instance, field_names, *parts):
+    return make_etag(*(getattr(instance, instance._meta.get_field(name).attname) for name in field_names), *parts)
+
+
+class NotModifiedError(Exception):
+    # Carries the 304 (or 412) response out of ``initial`` past the handler.
+    def __init__(self, response):
+        self.response = response
+
+
+class ConditionalGetMixin:
+    """
+    Answers conditional GET/HEAD requests of a DRF view with 304 (or 412) right after
+    authentication and content negotiation, before the handler queries or serializes anything.
+
+    Views return validators from ``get_etag``/``get_last_modified`` (None to opt out for the
+    request); they must be cheap, e.g. derived from ``request.user`` which is already loaded.
+    Full 200 responses get the same headers, and ``Cache-Control: private, no-cache`` so
+    clients revalidate every time instead of guessing a freshness lifetime.
+    """
+
+    def get_etag(self, request):
+        return None
+
+    def get_last_modified(self, request):
+        return None
+
+    def initial(self, request, *args, **kwargs):
+        super().initial(request, *args, **kwargs)
+        self.validators = None
+        if request.method not in ("GET", "HEAD"):
+            return
+        etag, last_modified = self.get_etag(request), self.get_last_modified(request)
+        if etag is None and last_modified is None:
+            return
+        self.validators = (etag, last_modified)
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified and int(last_modified.timestamp())
+        )
+        if response is not None:
+            raise NotModifiedError(response)
+
+    def handle_exception(self, exc):
+        if isinstance(exc, NotModifiedError):
+            return exc.response
+        return super().handle_exception(exc)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        if getattr(self, "validators", None) is not None and response.status_code in (200, 304):
+            etag, last_modified = self.validators
+            if etag is not None:
+                response.headers.setdefault("ETag", etag)
+            if last_modified is not None:
+                response.headers.setdefault("Last-Modified", http_date(last_modified.timestamp()))
+            patch_cache_control(response, private=True, no_cache=True)
+        return response
@@ -0,0 +1,79 @@
+import random
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+
+class RoutingState:
+    """
+    Per-request routing state. ``pinned`` sends every read to the primary; ``written`` is
+    set once the request writes, so the response can pin the client for a while.
+    """
+
+    def __init__(self, pinned=False):
+        self.pinned = pinned
+        self.written = False
+
+
+current_routing_state = ContextVar("current_routing_state", default=None)
+
+
+def get_replicas():
+    return settings.DATABASE_REPLICAS
+
+
+@contextmanager
+def use_primary():
+    """
+    Sends every read inside the block to the primary, e.g. in a Celery task which reads
+    back rows it has just written.
+    """
+    token = current_routing_state.set(RoutingState(pinned=True))
+    try:
+        yield
+    finally:
+        current_routing_state.reset(token)
+
+
+class PrimaryReplicaRouter:
+    """
+    Sends reads of models in ``DATABASE_REPLICA_APPS`` to a random alias of
+    ``DATABASE_REPLICAS`` and everything else to ``default``.
+
+    Reads stay on the primary inside transactions, for non-safe requests, after the
+    current request wrote anything, and for ``DATABASE_REPLICA_PIN_SECONDS`` after a
+    client's last write (see ``core.middlewares.ReplicaPinningMiddleware``), so clients
+    read their own writes despite replication lag.
+    """
+
+    def db_for_read(self, model, **hints):
+        replicas = get_replicas()
+        if not replicas or model._meta.app_label not in settings.DATABASE_REPLICA_APPS:
+            return None
+        instance = hints.get("instance")
+        if instance is not None and instance._state.db:
+            return instance._state.db
+        state = current_routing_state.get()
+        if (state is not None and state.pinned) or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return DEFAULT_DB_ALIAS
+        return random.choice(replicas)
+
+    def db_for_write(self, model, **hints):
+        state = current_routing_state.get()
+        if state is not None:
+            state.pinned = state.written = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        aliases = {DEFAULT_DB_ALIAS, *get_replicas()}
+        if obj1._state.db in aliases and obj2._state.db in aliases:
+            return True
+        return None
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        # Replicas receive the schema through replication.
+        if db in get_replicas():
+            return False
+        return None
@@ -0,0 +1,101 @@
+import io
+import mimetypes
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+
+from core.uploads import content_hash
+
+DEFAULT_IMAGE_PROCESSING = {
+    "QUEUE": "media",
+    "MAX_UPLOAD_SIZE": 10 * 1024 * 1024,
+    "MAX_PIXELS": 40_000_000,
+    "FORMATS": ("JPEG", "PNG", "WEBP", "GIF"),
+    "VARIANT_FORMAT": "WEBP",
+    "VARIANT_QUALITY": 80,
+    "AVATAR_VARIANTS": {"small": 64, "medium": 256, "large": 512},
+}
+
+
+def get_config():
+    return {**DEFAULT_IMAGE_PROCESSING, **getattr(settings, "IMAGE_PROCESSING", {})}
+
+
+def original_name(directory, digest, extension):
+    return f"{directory}/{digest[:2]}/{digest}{extension}"
+
+
+def variant_name(directory, digest, variant):
+    extension = mimetypes.guess_extension(f"image/{get_config()['VARIANT_FORMAT'].lower()}") or ""
+    return f"{directory}/{digest[:2]}/{digest}/{variant}{extension}"
+
+
+def store_original(file, directory):
+    """
+    Saves an uploaded image validated by ``serializers.ImageField`` under its content hash,
+    unless the same content was stored before. Returns ``(name, digest)``.
+    """
+    digest = content_hash(file)
+    name = original_name(directory, digest, mimetypes.guess_extension(file.content_type) or "")
+    if not default_storage.exists(name):
+        stored = default_storage.save(name, file)
+        if stored != name:
+            # Stored concurrently by another request; keep a single copy.
+            default_storage.delete(stored)
+    return name, digest
+
+
+def variants_exist(directory, digest, variants):
+    return all(default_storage.exists(variant_name(directory, digest, variant)) for variant in variants)
+
+
+def generate_variants(name, directory, digest, variants):
+    """
+    Renders the square ``{variant: size}`` thumbnails of the stored image ``name`` in
+    ``VARIANT_FORMAT``. Variants which already exist for ``digest`` are skipped, so
+    reprocessing the same content does nothing.
+    """
+    from PIL import Image, ImageOps
+
+    pending = {
+        variant: size
+        for variant, size in variants.items()
+        if not default_storage.exists(variant_name(directory, digest, variant))
+    }
+    if not pending:
+        return 0
+
+    config = get_config()
+    with default_storage.open(name) as file, Image.open(file) as original:
+        largest = max(pending.values())
+        # JPEGs are decoded at the smallest 1/2, 1/4 or 1/8 scale still covering the largest
+        # variant, which is far cheaper in time and memory than decoding at full size.
+        original.draft("RGB", (largest, largest))
+        image = ImageOps.exif_transpose(original)
+        if image.mode not in ("RGB", "RGBA"):
+            transparent = image.mode in ("LA", "PA") or "transparency" in image.info
+            image = image.convert("RGBA" if transparent else "RGB")
+
+        # Largest first, each variant downscaled from the previous one.
+        for variant, size in sorted(pending.items(), key=lambda item: -item[1]):
+            image = ImageOps.fit(image, (size, size), Image.Resampling.LANCZOS)
+            buffer = io.BytesIO()
+            image.save(buffer, config["VARIANT_FORMAT"], quality=config["VARIANT_QUALITY"])
+            target = variant_name(directory, digest, variant)
+            stored = default_storage.save(target, ContentFile(buffer.getvalue()))
+            if stored != target:
+                default_storage.delete(stored)
+    return len(pending)
+
+
+def variant_urls(name, directory, digest, variants):
+    """
+    URLs of a stored image and, once generated (``digest`` set), of its variants.
+    """
+    if not name:
+        return None
+    urls = {"original": default_storage.url(name)}
+    if digest:
+        urls.update((variant, default_storage.url(variant_name(directory, digest, variant))) for variant in variants)
+    return urls
@@ -0,0 +1,173 @@
+import atexit
+import contextlib
+import copy
+import json
+import logging
+import os
+import queue
+import threading
+import time
+import weakref
+from collections import OrderedDict
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+
+_queue_handlers = weakref.WeakSet()
+_traceback_formatter = logging.Formatter()
+
+
+class QueueListenerHandler(QueueHandler):
+    """
+    Hands records to a background thread which forwards them to the named handlers,
+    so the calling thread never waits on file or stream I/O (or file rotation).
+
+    The target handlers are looked up by name when the handler is configured. ``dictConfig``
+    builds handlers in name order and keeps only weak references to those no logger uses,
+    so the queue handler's name must sort after its targets' (e.g. ``queue``, ``queue_celery``).
+
+    The listener thread belongs to the process which started it: a forked child (gunicorn
+    or Celery worker) gets a fresh queue and its own thread on its first record. Call
+    ``stop_listeners()`` before a process exits without running ``atexit`` hooks to flush
+    what is still queued.
+    """
+
+    def __init__(self, handlers, maxsize=10000, respect_handler_level=True):
+        super().__init__(queue.Queue(maxsize=maxsize))
+        self.handler_names = list(handlers)
+        self.targets = [_get_handler_by_name(name) for name in self.handler_names]
+        missing = [name for name, target in zip(self.handler_names, self.targets) if target is None]
+        if missing:
+            raise ValueError(f"Unknown handlers {missing}; they must be configured before this handler")
+        self.maxsize = maxsize
+        self.respect_handler_level = respect_handler_level
+        self.listener = None
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        _queue_handlers.add(self)
+
+    def start(self):
+        with self._lock:
+            if self._pid != os.getpid():
+                # Inherited across a fork: the parent's thread does not exist here and its
+                # queue may have been locked mid-operation.
+                self._pid = os.getpid()
+                self.queue = queue.Queue(maxsize=self.maxsize)
+                self.listener = None
+            if self.listener is not None:
+                return
+            self.listener = QueueListener(self.queue, *self.targets, respect_handler_level=self.respect_handler_level)
+            self.listener.start()
+            atexit.register(self.stop)
+
+    def stop(self):
+        with self._lock:
+            if self.listener is None or self._pid != os.getpid():
+                return
+            self.listener.stop()
+            self.listener = None
+
+    def prepare(self, record):
+        # Like ``QueueHandler.prepare``, but keeps the traceback and stack apart from the
+        # message so the target handlers' formatters (e.g. ``JSONFormatter``) see them
+        # separately. Only ``exc_info`` and ``args``, which may hold arbitrary objects, are dropped.
+        message = record.getMessage()
+        record = copy.copy(record)
+        if record.exc_info and not record.exc_text:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+        record.message = message
+        record.msg = message
+        record.args = None
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        # Dropping a log line is preferable to blocking the request thread.
+        with contextlib.suppress(queue.Full):
+            self.queue.put_nowait(record)
+
+    def emit(self, record):
+        if self.listener is None or self._pid != os.getpid():
+            self.start()
+        super().emit(record)
+
+
+def stop_listeners(*args, **kwargs):
+    """
+    Flushes and stops every queue listener of this process. Signal handler friendly.
+    """
+    for handler in list(_queue_handlers):
+        handler.stop()
+
+
+def _get_handler_by_name(name):
+    getter = getattr(logging, "getHandlerByName", None)  # Python 3.12+
+    if getter is not None:
+        return getter(name)
+    return logging._handlers.get(name)
+
+
+class JSONFormatter(logging.Formatter):
+    """
+    One compact JSON object per line, carrying the ``log_request_id`` request id.
+    """
+
+    def format(self, record):
+        data = {
+            "time": datetime.fromtimestamp(record.created, tz=timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "where": f"{record.module}.{record.funcName}:{record.lineno}",
+        }
+        request_id = getattr(record, "request_id", None)
+        if request_id and request_id != "none":
+            data["request_id"] = request_id
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            data["exc"] = record.exc_text
+        if record.stack_info:
+            data["stack"] = record.stack_info
+        return json.dumps(data, default=str, separators=(",", ":"))
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Lets at most ``rate`` records per ``per`` seconds through for every call site and
+    message template, so a failing dependency cannot flood the logs. The first record let
+    through after a suppression says how many similar ones were dropped.
+
+    Only records of ``level`` and above are limited: request and access logs share one
+    template per call site, so limiting them would drop all but ``rate`` requests a window.
+    """
+
+    def __init__(self, rate=10, per=60, max_keys=1024, level=logging.WARNING):
+        super().__init__()
+        self.rate = rate
+        self.per = per
+        self.max_keys = max_keys
+        self.level = level if isinstance(level, int) else logging.getLevelName(level)
+        self._windows = OrderedDict()
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if record.levelno < self.level:
+            return True
+        key = (record.name, record.levelno, record.pathname, record.lineno, str(record.msg))
+        now = time.monotonic()
+        with self._lock:
+            started, count, suppressed = self._windows.pop(key, (now, 0, 0))
+            if now - started >= self.per:
+                if suppressed:
+                    record.msg = f"{record.getMessage()} [{suppressed} similar messages suppressed]"
+                    record.args = None
+                started, count, suppressed = now, 0, 0
+            allowed = count < self.rate
+            if allowed:
+                count += 1
+            else:
+                suppressed += 1
+            self._windows[key] = (started, count, suppressed)
+            while len(self._windows) > self.max_keys:
+                self._windows.popitem(last=False)
+        return allowed
@@ -0,0 +1,149 @@
+import base64
+import logging
+import smtplib
+import threading
+import time
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.core.mail.backends.base import BaseEmailBackend
+from django.core.mail.message import sanitize_address
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_EMAIL_DELIVERY = {
+    "BACKEND": "django.core.mail.backends.smtp.EmailBackend",
+    "BATCH_SIZE": 50,
+    "MAX_RETRIES": 5,
+    "RETRY_BACKOFF": 30,
+    "CONNECTION_MAX_AGE": 60,
+}
+
+_connection = None
+_connection_used_at = 0.0
+_connection_lock = threading.Lock()
+
+
+def get_config():
+    return {**DEFAULT_EMAIL_DELIVERY, **getattr(settings, "EMAIL_DELIVERY", {})}
+
+
+def serialize_message(message):
+    """
+    Renders an ``EmailMessage`` to a JSON-safe dict holding the final MIME bytes, so
+    attachments and alternatives survive the trip through the broker unchanged.
+    """
+    encoding = message.encoding or settings.DEFAULT_CHARSET
+    return {
+        "from_email": sanitize_address(message.from_email, encoding),
+        "recipients": [sanitize_address(address, encoding) for address in message.recipients()],
+        "subject": str(message.subject),
+        "message": base64.b64encode(message.message().as_bytes(linesep="\r\n")).decode("ascii"),
+    }
+
+
+class CeleryEmailBackend(BaseEmailBackend):
+    """
+    Queues messages for delivery by the ``core.tasks.send_emails`` Celery task instead of
+    talking to the SMTP server inside the request, ``BATCH_SIZE`` messages per task.
+    """
+
+    def send_messages(self, email_messages):
+        from core.tasks import send_emails
+
+        messages = [serialize_message(message) for message in email_messages if message.recipients()]
+        batch_size = get_config()["BATCH_SIZE"]
+        try:
+            for start in range(0, len(messages), batch_size):
+                send_emails.delay(messages[start : start + batch_size])
+        except Exception:
+            if not self.fail_silently:
+                raise
+            logger.exception("Could not queue %d email(s)", len(messages))
+            return 0
+        return len(messages)
+
+
+def get_smtp_connection():
+    """
+    Returns this process's open SMTP backend (``EMAIL_DELIVERY["BACKEND"]`` must be Django's
+    SMTP backend or a subclass), reused across tasks while it was used within
+    ``CONNECTION_MAX_AGE`` seconds and still answers ``NOOP``.
+    """
+    global _connection, _connection_used_at
+
+    config = get_config()
+    if _connection is not None:
+        fresh = time.monotonic() - _connection_used_at < config["CONNECTION_MAX_AGE"]
+        if not fresh or not is_alive(_connection):
+            close_smtp_connection()
+    if _connection is None:
+        _connection = get_connection(config["BACKEND"], fail_silently=False)
+        _connection.open()
+    _connection_used_at = time.monotonic()
+    return _connection
+
+
+def is_alive(connection):
+    try:
+        return connection.connection.noop()[0] == 250
+    except (smtplib.SMTPException, OSError):
+        return False
+
+
+def close_smtp_connection(**kwargs):
+    global _connection
+    if _connection is not None:
+        try:
+            _connection.close()
+        except Exception:
+            logger.debug("Error closing the SMTP connection", exc_info=True)
+        _connection = None
+
+
+def send_raw(connection, message):
+    """
+    Sends one serialized message. Returns the recipients the server refused, raising for
+    failures affecting the whole message.
+    """
+    raw = base64.b64decode(message["message"])
+    return connection.connection.sendmail(message["from_email"], message["recipients"], raw)
+
+
+def is_permanent(error):
+    """
+    5xx replies will not succeed on retry; network errors and 4xx replies may.
+    """
+    if isinstance(error, smtplib.SMTPRecipientsRefused):
+        return all(code >= 500 for code, _ in error.recipients.values())
+    if isinstance(error, smtplib.SMTPResponseException):
+        return error.smtp_code >= 500
+    return False
+
+
+def deliver(messages):
+    """
+    Sends ``messages`` over the pooled connection, reconnecting once if the server dropped
+    it. Returns ``[(message, error, permanent), ...]`` for every message not delivered.
+    """
+    failed = []
+    with _connection_lock:
+        for index, message in enumerate(messages):
+            try:
+                try:
+                    refused = send_raw(get_smtp_connection(), message)
+                except smtplib.SMTPServerDisconnected:
+                    close_smtp_connection()
+                    refused = send_raw(get_smtp_connection(), message)
+            except (smtplib.SMTPResponseException, smtplib.SMTPRecipientsRefused) as error:
+                failed.append((message, error, is_permanent(error)))
+                continue
+            except (smtplib.SMTPException, OSError) as error:
+                # The server is unreachable: the rest of the batch would fail the same way.
+                close_smtp_connection()
+                failed.extend((pending, error, False) for pending in messages[index:])
+                break
+            if refused:
+                error = smtplib.SMTPRecipientsRefused(refused)
+                failed.append(({**message, "recipients": list(refused)}, error, is_permanent(error)))
+    return failed
@@ -0,0 +1,68 @@
+import itertools
+import json
+import time
+import uuid
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+from django_celery_results.backends.database import DatabaseBackend
+from django_celery_results.models import TaskResult
+
+from core.benchmark import measure
+from core.celery import app
+from core.tasks import cleanup_task_results, delete_in_batches
+
+PREFIX = "bench-"
+
+
+class Command(BaseCommand):
+    help = (
+        "Measures django-db result backend insert throughput on a clean table, after bloating it with "
+        "expired results, and after cleanup_task_results. Rows it creates are removed at the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=200000, help="Expired results to bloat the table with.")
+        parser.add_argument("--repeat", type=int, default=1000, help="Results stored per measurement.")
+        parser.add_argument("--batch-size", type=int, default=5000)
+
+    def handle(self, *args, **options):
+        backend = DatabaseBackend(app=app)
+        counter = itertools.count()
+
+        def store():
+            backend.store_result(f"{PREFIX}{next(counter)}-{uuid.uuid4()}", {"ok": True}, "SUCCESS")
+
+        results = {"existing_rows": TaskResult.objects.count()}
+        try:
+            results["clean"] = measure(store, repeat=options["repeat"])
+
+            start = time.perf_counter()
+            self.bloat(options["rows"], options["batch_size"])
+            results["bloat_seconds"] = round(time.perf_counter() - start, 2)
+            results["bloated"] = measure(store, repeat=options["repeat"])
+
+            start = time.perf_counter()
+            results["cleanup_deleted"] = cleanup_task_results(batch_size=options["batch_size"], pause=0)
+            results["cleanup_seconds"] = round(time.perf_counter() - start, 2)
+            results["after_cleanup"] = measure(store, repeat=options["repeat"])
+        finally:
+            delete_in_batches(TaskResult.objects.filter(task_id__startswith=PREFIX), options["batch_size"])
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def bloat(self, rows, batch_size):
+        expired = timezone.now() - settings.TASK_RESULT_RETENTION - timezone.timedelta(days=1)
+        for start in range(0, rows, batch_size):
+            TaskResult.objects.bulk_create(
+                TaskResult(
+                    task_id=f"{PREFIX}expired-{index}",
+                    status="SUCCESS",
+                    result='{"ok": true}',
+                    content_type="application/json",
+                    content_encoding="utf-8",
+                )
+                for index in range(start, min(start + batch_size, rows))
+            )
+        # date_done is auto_now, so it can only be backdated after the insert.
+        TaskResult.objects.filter(task_id__startswith=f"{PREFIX}expired-").update(date_done=expired)
@@ -0,0 +1,12 @@
+from django.core.management.base import BaseCommand
+
+from core.schema import build_schemas, get_code_version
+
+
+class Command(BaseCommand):
+    help = "Pre-renders the OpenAPI schema served at api/schema/ for the current code version."
+
+    def handle(self, *args, **options):
+        for path in build_schemas():
+            self.stdout.write(f"Wrote {path}")
+        self.stdout.write(self.style.SUCCESS(f"Schema built for version {get_code_version()}"))
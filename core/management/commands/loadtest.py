@@ -0,0 +1,81 @@
+import http.client
+import json
+import statistics
+import threading
+import time
+from urllib.parse import urlsplit
+
+from django.core.management.base import BaseCommand
+
+from core.benchmark import percentile
+
+
+class Command(BaseCommand):
+    help = (
+        "Drives a running server with concurrent keep-alive GET requests and reports req/s and latency "
+        "percentiles, e.g. to compare the WSGI (sync workers) and ASGI (uvicorn workers) deployments."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("url")
+        parser.add_argument("--concurrency", "-c", type=int, default=16)
+        parser.add_argument("--duration", "-d", type=float, default=10.0, help="Seconds to run for.")
+        parser.add_argument("--header", "-H", action="append", default=[], help="'Name: value', repeatable.")
+
+    def handle(self, *args, **options):
+        url = urlsplit(options["url"])
+        path = url.path + (f"?{url.query}" if url.query else "")
+        headers = dict(header.split(":", 1) for header in options["header"])
+        headers = {name.strip(): value.strip() for name, value in headers.items()}
+        deadline = time.monotonic() + options["duration"]
+
+        durations = []
+        errors = []
+        lock = threading.Lock()
+
+        def worker():
+            connection_class = http.client.HTTPSConnection if url.scheme == "https" else http.client.HTTPConnection
+            connection = connection_class(url.hostname, url.port, timeout=30)
+            local_durations, local_errors = [], []
+            while time.monotonic() < deadline:
+                start = time.perf_counter()
+                try:
+                    connection.request("GET", path, headers=headers)
+                    response = connection.getresponse()
+                    response.read()
+                    if response.status >= 400:
+                        local_errors.append(response.status)
+                except (OSError, http.client.HTTPException) as exc:
+                    local_errors.append(type(exc).__name__)
+                    connection.close()
+                local_durations.append(time.perf_counter() - start)
+            connection.close()
+            with lock:
+                durations.extend(local_durations)
+                errors.extend(local_errors)
+
+        started = time.monotonic()
+        threads = [threading.Thread(target=worker) for _ in range(options["concurrency"])]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.monotonic() - started
+
+        results = {
+            "url": options["url"],
+            "concurrency": options["concurrency"],
+            "requests": len(durations),
+            "errors": len(errors),
+            "throughput": round(len(durations) / elapsed, 2),
+        }
+        if durations:
+            results.update(
+                {
+                    "mean_ms": round(statistics.fmean(durations) * 1000, 3),
+                    "p50_ms": round(percentile(durations, 50) * 1000, 3),
+                    "p95_ms": round(percentile(durations, 95) * 1000, 3),
+                    "p99_ms": round(percentile(durations, 99) * 1000, 3),
+                }
+            )
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,143 @@
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Runs in a fresh interpreter, so nothing imported by this command skews the numbers.
+CHILD = """
+import json, sys, time
+from wsgiref.util import setup_testing_defaults
+
+started = time.time()
+import django
+django.setup()
+setup_done = time.time()
+
+from django.core.wsgi import get_wsgi_application
+application = get_wsgi_application()
+application_done = time.time()
+
+def request():
+    environ = {"PATH_INFO": sys.argv[1], "HTTP_HOST": sys.argv[2]}
+    setup_testing_defaults(environ)
+    status = []
+    response = application(environ, lambda code, headers, exc_info=None: status.append(code))
+    for _ in response:
+        pass
+    response.close()
+    return int(status[0].split()[0]), time.time()
+
+status, first_done = request()
+_, second_done = request()
+print(json.dumps({
+    "started": started,
+    "setup_done": setup_done,
+    "application_done": application_done,
+    "first_done": first_done,
+    "second_done": second_done,
+    "status": status,
+}))
+"""
+
+IMPORT_TIME = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+class Command(BaseCommand):
+    help = (
+        "Starts fresh interpreters the way a web worker does and reports time-to-first-request by phase "
+        "(median of --runs) and the modules costing the most import time (from python -X importtime)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--path", default="/metrics/", help="Path of the first request.")
+        parser.add_argument("--host", default=None, help="Host header, defaults to the first ALLOWED_HOSTS entry.")
+        parser.add_argument("--role", default=None, help="DJANGO_ROLE of the profiled process.")
+        parser.add_argument("--runs", type=int, default=5)
+        parser.add_argument("--limit", type=int, default=20, help="Modules and packages to list.")
+
+    def handle(self, *args, **options):
+        env = dict(os.environ)
+        if options["role"]:
+            env["DJANGO_ROLE"] = options["role"]
+        host = options["host"] or next((host for host in settings.ALLOWED_HOSTS if host != "*"), "localhost")
+        command = [options["path"], host]
+
+        runs = [self.run(command, env)[0] for _ in range(options["runs"])]
+        phases = {
+            name: round(statistics.median(run[name] for run in runs), 1)
+            for name in ("interpreter", "django_setup", "wsgi_application", "first_request", "second_request")
+        }
+        phases["time_to_first_request"] = round(statistics.median(run["time_to_first_request"] for run in runs), 1)
+
+        _, stderr = self.run(command, env, importtime=True)
+        modules = self.parse_importtime(stderr)
+        packages = defaultdict(int)
+        for module in modules:
+            packages[module["module"].partition(".")[0]] += module["self_us"]
+
+        results = {
+            "role": env.get("DJANGO_ROLE", "web"),
+            "path": options["path"],
+            "status": runs[-1]["status"],
+            "runs": options["runs"],
+            "phases_ms": phases,
+            "modules_imported": len(modules),
+            "import_ms": round(sum(module["self_us"] for module in modules) / 1000, 1),
+            "top_packages_ms": {
+                name: round(self_us / 1000, 1)
+                for name, self_us in sorted(packages.items(), key=lambda item: -item[1])[: options["limit"]]
+            },
+            "top_modules_ms": [
+                {
+                    "module": module["module"],
+                    "self": round(module["self_us"] / 1000, 1),
+                    "cumulative": round(module["cumulative_us"] / 1000, 1),
+                }
+                for module in sorted(modules, key=lambda module: -module["cumulative_us"])
+                if module["top_level"]
+            ][: options["limit"]],
+        }
+        self.stdout.write(json.dumps(results, indent=2))
+
+    def run(self, command, env, importtime=False):
+        args = [sys.executable, *(["-X", "importtime"] if importtime else []), "-c", CHILD, *command]
+        spawned = time.time()
+        process = subprocess.run(args, env=env, cwd=settings.BASE_DIR, capture_output=True, text=True)
+        if process.returncode:
+            raise CommandError(process.stderr.strip().splitlines()[-1] if process.stderr else "startup failed")
+        timings = json.loads(process.stdout.strip().splitlines()[-1])
+        run = {
+            "interpreter": timings["started"] - spawned,
+            "django_setup": timings["setup_done"] - timings["started"],
+            "wsgi_application": timings["application_done"] - timings["setup_done"],
+            "first_request": timings["first_done"] - timings["application_done"],
+            "second_request": timings["second_done"] - timings["first_done"],
+            "time_to_first_request": timings["first_done"] - spawned,
+        }
+        run = {name: seconds * 1000 for name, seconds in run.items()}
+        run["status"] = timings["status"]
+        return run, process.stderr
+
+    def parse_importtime(self, stderr):
+        modules = []
+        for line in stderr.splitlines():
+            match = IMPORT_TIME.match(line)
+            if match:
+                self_us, cumulative_us, indent, name = match.groups()
+                modules.append(
+                    {
+                        "module": name,
+                        "self_us": int(self_us),
+                        "cumulative_us": int(cumulative_us),
+                        # Imported by the profiled code itself rather than by another module.
+                        "top_level": not indent,
+                    }
+                )
+        return modules
@@ -0,0 +1,41 @@
+import mimetypes
+import os
+from urllib.parse import quote
+
+from django.conf import settings
+from django.core.exceptions import SuspiciousFileOperation
+from django.http import FileResponse, Http404, HttpResponse
+from django.utils._os import safe_join
+from django.utils.cache import patch_cache_control
+
+
+def protected_media_root():
+    return os.path.join(settings.MEDIA_ROOT, settings.PROTECTED_MEDIA_PREFIX)
+
+
+def protected_media_response(path):
+    """
+    Serves ``path``, relative to the protected media directory, to a request which was
+    already authorized. Behind nginx (``MEDIA_ACCEL_REDIRECT_LOCATION``) the response is
+    only an ``X-Accel-Redirect`` header, so no file bytes pass through the Python worker.
+    """
+    try:
+        full_path = safe_join(protected_media_root(), path)
+    except SuspiciousFileOperation:
+        # A path escaping the directory; answered like a missing file rather than logged as an error.
+        raise Http404("Not found") from None
+    relative_path = os.path.relpath(full_path, protected_media_root()).replace(os.sep, "/")
+    content_type, encoding = mimetypes.guess_type(relative_path)
+
+    location = settings.MEDIA_ACCEL_REDIRECT_LOCATION
+    if location:
+        # nginx answers 404 itself for missing files and adds Content-Length, ranges and ETags.
+        response = HttpResponse(content_type=content_type or "application/octet-stream")
+        response["X-Accel-Redirect"] = location.rstrip("/") + "/" + quote(relative_path)
+    else:
+        if not os.path.isfile(full_path):
+            raise Http404("Not found")
+        # FileResponse closes the file once the response has been sent.
+        response = FileResponse(open(full_path, "rb"), content_type=content_type)  # noqa: SIM115
+    patch_cache_control(response, private=True)
+    return response
@@ -0,0 +1,124 @@
+import os
+import time
+from contextvars import ContextVar
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+    multiprocess,
+)
+
+UNRESOLVED_VIEW = "<unresolved>"
+
+REQUEST_LATENCY = Histogram(
+    "django_http_request_duration_seconds",
+    "Request latency by resolved URL name.",
+    ["view", "method"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0),
+)
+RESPONSES = Counter(
+    "django_http_responses_total",
+    "Responses by resolved URL name and status code.",
+    ["view", "method", "status"],
+)
+RESPONSE_SIZE = Histogram(
+    "django_http_response_size_bytes",
+    "Size of non-streaming response bodies.",
+    ["view"],
+    buckets=(256, 1024, 4096, 16384, 65536, 262144, 1048576),
+)
+DB_QUERIES = Histogram(
+    "django_db_queries_per_request",
+    "Number of SQL queries executed per request.",
+    ["view"],
+    buckets=(0, 1, 2, 3, 5, 10, 20, 50, 100),
+)
+DB_DURATION = Histogram(
+    "django_db_query_duration_per_request_seconds",
+    "Total time spent in SQL queries per request.",
+    ["view"],
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+
+
+current_query_timer = ContextVar("current_query_timer", default=None)
+
+
+class QueryTimer:
+    """
+    Number and total time of the SQL queries run while it is the ``current_query_timer``.
+    """
+
+    __slots__ = ("count", "duration")
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+
+
+def time_query(execute, sql, params, many, context):
+    """
+    Execute wrapper installed on every database connection (see ``install_query_timer``).
+
+    The timer is looked up through a context variable rather than installed per request
+    because, under ASGI, views run their queries on a different thread, with different
+    connection objects, than the middleware; context variables follow the request there.
+    """
+    query_timer = current_query_timer.get()
+    if query_timer is None:
+        return execute(sql, params, many, context)
+    start = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        query_timer.duration += time.perf_counter() - start
+        query_timer.count += 1
+
+
+def install_query_timer(sender, connection, **kwargs):
+    """
+    ``connection_created`` receiver adding ``time_query`` to the connection's execute wrappers.
+    """
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.append(time_query)
+
+
+def get_view_name(request):
+    match = getattr(request, "resolver_match", None)
+    if match is None:
+        return UNRESOLVED_VIEW
+    return match.view_name
+
+
+def observe(request, response, duration, query_timer):
+    view = get_view_name(request)
+    REQUEST_LATENCY.labels(view, request.method).observe(duration)
+    RESPONSES.labels(view, request.method, str(response.status_code)).inc()
+    if not response.streaming:
+        RESPONSE_SIZE.labels(view).observe(len(response.content))
+    if query_timer is not None:
+        DB_QUERIES.labels(view).observe(query_timer.count)
+        DB_DURATION.labels(view).observe(query_timer.duration)
+
+
+def get_registry():
+    """
+    Returns the registry to export.
+
+    When ``PROMETHEUS_MULTIPROC_DIR`` is set (gunicorn with several workers) every
+    worker writes its samples to memory-mapped files in that directory and the
+    scrape merges them, so any worker can answer for the whole server.
+    """
+    if not os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        return REGISTRY
+    registry = CollectorRegistry()
+    multiprocess.MultiProcessCollector(registry)
+    return registry
+
+
+def render():
+    return generate_latest(get_registry()), CONTENT_TYPE_LATEST
@@ -1,31 +1,339 @@
 import logging
-import uuid
+import random
+import re
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_string
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+from core import metrics
+from core.db_routers import RoutingState, current_routing_state
 
 logger = logging.getLogger("info_logger")
 
+DEFAULT_REQUEST_LOGGER = {
+    "SAMPLE_RATE": 1.0,
+    "MAX_BODY_LENGTH": 2048,
+    "ALLOW_PATHS": (),
+    "DENY_PATHS": (),
+    "CONTENT_TYPES": ("application/json", "application/x-www-form-urlencoded", "text/"),
+}
+
+DEFAULT_RESPONSE_COMPRESSION = {
+    "MIN_SIZE": 1024,
+    "CONTENT_TYPES": ("application/json", "application/problem+json", "text/", "application/javascript"),
+    "BROTLI_QUALITY": 4,
+    "GZIP_ONLY_CONTENT_TYPES": ("text/html",),
+}
+
+ACCEPT_ENCODING_RE = re.compile(r"\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?")
+
 
 class RequestResponseLoggerMiddleware:
+    """
+    Logs a sample of requests and responses to the ``info_logger`` logger.
+
+    Bodies are only read for allowed content types and are truncated to
+    ``MAX_BODY_LENGTH`` characters; streaming responses are never consumed.
+    See ``REQUEST_LOGGER`` in settings for the available options.
+    """
+
+    sync_capable = True
+    async_capable = True
+
     def __init__(self, get_response):
         self.get_response = get_response
+        config = {**DEFAULT_REQUEST_LOGGER, **getattr(settings, "REQUEST_LOGGER", {})}
+        self.sample_rate = float(config["SAMPLE_RATE"])
+        self.max_body_length = int(config["MAX_BODY_LENGTH"])
+        self.allow_paths = tuple(config["ALLOW_PATHS"])
+        self.deny_paths = tuple(config["DENY_PATHS"])
+        self.content_types = tuple(config["CONTENT_TYPES"])
+
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
 
     def __call__(self, request):
-        # Log the incoming request with the request ID
-        try:
-            body = request.body.decode("utf-8")
-        except AttributeError:
-            body = "No body"
-        logger.info(f"Incoming Request: {request.method} {request.path} {body}")
+        if self.async_mode:
+            return self.__acall__(request)
 
-        logger.info(
-            f"Incoming Request: {request.method} {request.path} {body}"
-        )
+        if not self.should_log(request):
+            return self.get_response(request)
 
-        # Get the response from the next middleware or view
+        self.log_request(request)
         response = self.get_response(request)
+        self.log_response(response)
+        return response
 
-        # Log the outgoing response with the request ID
-        logger.info(
-            f"Outgoing Response: {response.status_code} {response.body}"
-        )
+    async def __acall__(self, request):
+        if not self.should_log(request):
+            return await self.get_response(request)
 
+        self.log_request(request)
+        response = await self.get_response(request)
+        self.log_response(response)
         return response
+
+    def should_log(self, request):
+        if not logger.isEnabledFor(logging.INFO):
+            return False
+        if self.sample_rate < 1.0 and random.random() >= self.sample_rate:
+            return False
+        path = request.path
+        if self.allow_paths and not path.startswith(self.allow_paths):
+            return False
+        return not (self.deny_paths and path.startswith(self.deny_paths))
+
+    def log_request(self, request):
+        body = "No body"
+        if self.is_loggable_content_type(request.content_type) and self.has_small_body(request):
+            body = self.truncate(request.body)
+        logger.info("Incoming Request: %s %s %s", request.method, request.path, body)
+
+    def log_response(self, response):
+        if response.streaming:
+            body = "<streaming>"
+        elif self.is_loggable_content_type(response.get("Content-Type", "")):
+            body = self.truncate(response.content)
+        else:
+            body = f"<{len(response.content)} bytes>"
+        logger.info("Outgoing Response: %s %s", response.status_code, body)
+
+    def is_loggable_content_type(self, content_type):
+        return bool(content_type) and content_type.startswith(self.content_types)
+
+    def has_small_body(self, request):
+        # Reading ``request.body`` loads the whole payload into memory, so only do it
+        # for bodies Django would accept into memory anyway.
+        try:
+            length = int(request.META.get("CONTENT_LENGTH") or 0)
+        except ValueError:
+            return False
+        limit = settings.DATA_UPLOAD_MAX_MEMORY_SIZE
+        return length > 0 and (limit is None or length <= limit)
+
+    def truncate(self, body):
+        text = body[: self.max_body_length].decode("utf-8", errors="replace")
+        if len(body) > self.max_body_length:
+            text += f"... ({len(body)} bytes)"
+        return text
+
+
+class MetricsMiddleware:
+    """
+    Records latency, status, response size and SQL query count/time per resolved URL name.
+    Exported by ``core.views.metrics_view``.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        query_timer = metrics.QueryTimer()
+        token = metrics.current_query_timer.set(query_timer)
+        start = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            metrics.current_query_timer.reset(token)
+        metrics.observe(request, response, time.perf_counter() - start, query_timer)
+        return response
+
+    async def __acall__(self, request):
+        query_timer = metrics.QueryTimer()
+        token = metrics.current_query_timer.set(query_timer)
+        start = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            metrics.current_query_timer.reset(token)
+        metrics.observe(request, response, time.perf_counter() - start, query_timer)
+        return response
+
+
+class AsyncWhiteNoiseMiddleware(WhiteNoiseMiddleware):
+    """
+    ``WhiteNoiseMiddleware`` with a native async path, so ASGI requests which are not for
+    static files pass through without a thread hop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        super().__init__(get_response)
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(request.path_info)
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            # Opens the file, so keep it off the event loop.
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
+
+
+class ReplicaPinningMiddleware:
+    """
+    Keeps a client's reads on the primary database while replicas may not have caught up
+    with its writes: for the whole of a non-safe request, and for ``DATABASE_REPLICA_PIN_SECONDS``
+    afterwards through a short-lived cookie. See ``core.db_routers.PrimaryReplicaRouter``.
+    """
+
+    sync_capable = True
+    async_capable = True
+    cookie_name = "replica_pin"
+    safe_methods = ("GET", "HEAD", "OPTIONS", "TRACE")
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.pin_seconds = settings.DATABASE_REPLICA_PIN_SECONDS
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+
+        state = self.get_state(request)
+        token = current_routing_state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            current_routing_state.reset(token)
+        return self.process_response(state, response)
+
+    async def __acall__(self, request):
+        state = self.get_state(request)
+        token = current_routing_state.set(state)
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_routing_state.reset(token)
+        return self.process_response(state, response)
+
+    def get_state(self, request):
+        return RoutingState(pinned=request.method not in self.safe_methods or self.cookie_name in request.COOKIES)
+
+    def process_response(self, state, response):
+        if state.written and self.pin_seconds:
+            response.set_cookie(self.cookie_name, "1", max_age=self.pin_seconds, httponly=True, samesite="Lax")
+        return response
+
+
+class CompressionMiddleware:
+    """
+    Compresses response bodies of at least ``MIN_SIZE`` bytes with brotli (when the
+    ``brotli`` package is installed) or gzip, whichever the client prefers.
+
+    Only complete, uncompressed responses of the configured content types are touched:
+    streaming responses (exports, files) are passed through unread, as are responses with
+    ``Cache-Control: no-transform``. Must come before ``RequestResponseLoggerMiddleware``
+    in ``MIDDLEWARE`` so the logger still sees the plain body. Small bodies are never
+    compressed, which also keeps short secrets (JWTs) out of reach of BREACH-style attacks.
+    Pages which put a CSRF token next to reflected input (``GZIP_ONLY_CONTENT_TYPES``) never
+    get brotli: it has no header to pad with random bytes, as gzip's ``max_random_bytes`` does.
+    See ``RESPONSE_COMPRESSION`` in settings.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        config = {**DEFAULT_RESPONSE_COMPRESSION, **getattr(settings, "RESPONSE_COMPRESSION", {})}
+        self.min_size = int(config["MIN_SIZE"])
+        self.content_types = tuple(config["CONTENT_TYPES"])
+        self.brotli_quality = int(config["BROTLI_QUALITY"])
+        self.gzip_only_content_types = tuple(config["GZIP_ONLY_CONTENT_TYPES"])
+
+        self.async_mode = iscoroutinefunction(self.get_response)
+        if self.async_mode:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.async_mode:
+            return self.__acall__(request)
+        return self.process_response(request, self.get_response(request))
+
+    async def __acall__(self, request):
+        return self.process_response(request, await self.get_response(request))
+
+    def process_response(self, request, response):
+        if not self.is_compressible(response):
+            return response
+        # Varies on Accept-Encoding even when this client gets the plain body.
+        patch_vary_headers(response, ("Accept-Encoding",))
+        allow_brotli = not response.get("Content-Type", "").startswith(self.gzip_only_content_types)
+        encoding = self.choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""), allow_brotli)
+        if encoding is None:
+            return response
+
+        if encoding == "br":
+            compressed = brotli.compress(response.content, quality=self.brotli_quality)
+        else:
+            # Random bytes in the gzip header, as in Django's GZipMiddleware ("Heal the BREACH").
+            compressed = compress_string(response.content, max_random_bytes=100)
+        if len(compressed) >= len(response.content):
+            return response
+
+        response.content = compressed
+        response.headers["Content-Length"] = str(len(compressed))
+        response.headers["Content-Encoding"] = encoding
+        # The compressed body is a different representation: a strong ETag no longer matches it
+        # byte for byte, while If-None-Match (a weak comparison) keeps working.
+        etag = response.get("ETag")
+        if etag and etag.startswith('"'):
+            response.headers["ETag"] = "W/" + etag
+        return response
+
+    def is_compressible(self, response):
+        if response.streaming or len(response.content) < self.min_size:
+            return False
+        if response.has_header("Content-Encoding") or "no-transform" in response.get("Cache-Control", ""):
+            return False
+        return response.get("Content-Type", "").startswith(self.content_types)
+
+    @staticmethod
+    def choose_encoding(header, allow_brotli=True):
+        """
+        Returns "br" or "gzip", highest ``q`` first and brotli on a tie, or None. Also used by
+        views which serve pre-compressed bodies.
+        """
+        weights = {}
+        for coding, quality in ACCEPT_ENCODING_RE.findall(header):
+            try:
+                weights[coding.lower()] = float(quality) if quality else 1.0
+            except ValueError:
+                continue
+        candidates = ("br", "gzip") if brotli is not None and allow_brotli else ("gzip",)
+        best = max(candidates, key=lambda coding: weights.get(coding, weights.get("*", 0.0)))
+        return best if weights.get(best, weights.get("*", 0.0)) > 0 else None
@@ -0,0 +1,37 @@
+# Generated by Django 4.2.5 on 2026-10-18 10:25
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = []
+
+    operations = [
+        migrations.CreateModel(
+            name="FailedEmail",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("created_at", models.DateTimeField(auto_now_add=True, db_index=True)),
+                ("from_email", models.CharField(max_length=320)),
+                ("recipients", models.JSONField(default=list)),
+                ("subject", models.CharField(blank=True, max_length=998)),
+                ("message", models.TextField(help_text="Base64 encoded MIME message.")),
+                ("error", models.TextField()),
+                ("attempts", models.PositiveIntegerField(default=1)),
+            ],
+            options={
+                "ordering": ("-created_at",),
+            },
+        ),
+    ]
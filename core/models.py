@@ -0,0 +1,31 @@
+from django.db import models
+from django.utils.translation import gettext_lazy as _
+
+
+class FailedEmail(models.Model):
+    """
+    Dead-letter record of a message ``core.tasks.send_emails`` gave up on, holding the
+    exact MIME bytes so it can be re-queued from the admin once the cause is fixed.
+    """
+
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+    from_email = models.CharField(max_length=320)
+    recipients = models.JSONField(default=list)
+    subject = models.CharField(max_length=998, blank=True)
+    message = models.TextField(help_text=_("Base64 encoded MIME message."))
+    error = models.TextField()
+    attempts = models.PositiveIntegerField(default=1)
+
+    class Meta:
+        ordering = ("-created_at",)
+
+    def __str__(self):
+        return f"{self.subject} -> {', '.join(self.recipients)}"
+
+    def to_message(self):
+        return {
+            "from_email": self.from_email,
+            "recipients": self.recipients,
+            "subject": self.subject,
+            "message": self.message,
+        }
@@ -0,0 +1,248 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db import connections
+from django.db.models import F, Func, Q, Value
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from core.paginator import estimate_count
+from core.search import SEARCH_RANK
+
+
+class RowValue(Func):
+    """
+    SQL row constructor, ``(a, b, ...)``, so ``(a, b) < (x, y)`` can use a composite index.
+    """
+
+    template = "(%(expressions)s)"
+    arg_joiner = ", "
+
+
+class KeysetPagination(BasePagination):
+    """
+    Keyset ("seek") pagination on an indexed, unique ordering, ``(-date_joined, -id)`` by default.
+
+    Unlike ``LimitOffsetPagination`` a page costs the same at any depth, as it is fetched
+    with ``WHERE (date_joined, id) < (...)`` instead of ``OFFSET``. Cursors are opaque
+    base64 strings holding the ordering values of the last row on the page.
+
+    Orderings requested through ``OrderingFilter`` are honoured as long as every field is
+    a non-nullable column of the model; the primary key is always appended as a tie-breaker.
+    Search results (``IndexedSearchFilter``) without a requested ordering come by descending
+    ``SEARCH_RANK``.
+
+    ``count`` is the ``pg_class.reltuples`` estimate on PostgreSQL for unfiltered querysets
+    (``count_mode = "approximate"``), an exact ``COUNT(*)`` with ``count_mode = "exact"``,
+    and ``null`` otherwise, e.g. on SQLite, so no page load ever scans the whole table.
+    """
+
+    cursor_query_param = "cursor"
+    cursor_query_description = _("The pagination cursor value.")
+    page_size_query_param = "limit"
+    page_size_query_description = _("Number of results to return per page.")
+    max_page_size = 100
+    ordering = ("-date_joined", "-id")
+    count_mode = "approximate"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.fields = self.get_ordering(request, queryset, view)
+        cursor = self.decode_cursor(request, queryset)
+        reverse = cursor is not None and cursor["reverse"]
+
+        self.count = self.get_count(queryset)
+        ordering = [("-" if descending != reverse else "") + name for name, descending in self.fields]
+        queryset = queryset.order_by(*ordering)
+        if cursor is not None:
+            queryset = self.filter_after(queryset, cursor["values"], reverse)
+
+        results = list(queryset[: self.page_size + 1])
+        has_more = len(results) > self.page_size
+        results = results[: self.page_size]
+        if reverse:
+            results.reverse()
+
+        self.has_next = has_more if not reverse else True
+        self.has_previous = cursor is not None if not reverse else has_more
+        self.page = results
+        return results
+
+    def get_page_size(self, request):
+        if self.page_size_query_param:
+            try:
+                return _positive_int(
+                    request.query_params[self.page_size_query_param], strict=True, cutoff=self.max_page_size
+                )
+            except (KeyError, ValueError):
+                pass
+        return api_settings.PAGE_SIZE
+
+    def get_ordering(self, request, queryset, view):
+        """
+        Returns the ordering as a list of ``(field_name, descending)`` pairs ending with the primary key.
+        """
+        ordering = None
+        for backend in getattr(view, "filter_backends", ()):
+            if hasattr(backend, "get_ordering") and request.query_params.get(getattr(backend, "ordering_param", "")):
+                ordering = backend().get_ordering(request, queryset, view)
+                break
+        if not ordering and SEARCH_RANK in queryset.query.annotations:
+            ordering = ("-" + SEARCH_RANK,)
+        if not ordering or not self.is_keyset_ordering(queryset, ordering):
+            ordering = getattr(view, "keyset_ordering", self.ordering)
+        if not self.is_keyset_ordering(queryset, ordering):
+            ordering = ("-pk",)
+
+        opts = queryset.model._meta
+        fields = []
+        for item in ordering:
+            name = item.lstrip("-")
+            name = opts.pk.name if name == "pk" else name
+            fields.append((name, item.startswith("-")))
+        if opts.pk.name not in [name for name, descending in fields]:
+            fields.append((opts.pk.name, fields[-1][1]))
+        return fields
+
+    def is_keyset_ordering(self, queryset, ordering):
+        for item in ordering:
+            name = item.lstrip("-")
+            if name == "pk" or (name == SEARCH_RANK and name in queryset.query.annotations):
+                continue
+            try:
+                field = queryset.model._meta.get_field(name)
+            except FieldDoesNotExist:
+                return False
+            if not field.concrete or field.null or field.is_relation:
+                return False
+        return True
+
+    def filter_after(self, queryset, values, reverse):
+        """
+        Rows strictly after ``values`` in the current ordering. Uses a row-value comparison
+        when every column sorts in the same direction on PostgreSQL, and the equivalent
+        ``a < x OR (a = x AND b < y)`` expansion otherwise (mixed directions, SQLite).
+        """
+        descending = [desc != reverse for name, desc in self.fields]
+        names = [name for name, desc in self.fields]
+        vendor = connections[queryset.db].vendor
+
+        if vendor == "postgresql" and len(set(descending)) == 1:
+            model_fields = [self.get_output_field(queryset, name) for name in names]
+            lookup = "lt" if descending[0] else "gt"
+            left = RowValue(*[F(name) for name in names], output_field=model_fields[0])
+            right = RowValue(
+                *[Value(value, output_field=field) for value, field in zip(values, model_fields)],
+                output_field=model_fields[0],
+            )
+            return queryset.alias(keyset_position=left).filter(**{"keyset_position__" + lookup: right})
+
+        condition = Q()
+        for index, name in enumerate(names):
+            term = Q(**{name + ("__lt" if descending[index] else "__gt"): values[index]})
+            for previous in range(index):
+                term &= Q(**{names[previous]: values[previous]})
+            condition |= term
+        return queryset.filter(condition)
+
+    def get_count(self, queryset):
+        if self.count_mode == "exact":
+            return queryset.count()
+        if self.count_mode != "approximate" or queryset.query.where:
+            return None
+        return estimate_count(queryset)
+
+    def get_output_field(self, queryset, name):
+        if name in queryset.query.annotations:
+            return queryset.query.annotations[name].output_field
+        return queryset.model._meta.get_field(name)
+
+    def decode_cursor(self, request, queryset):
+        encoded = request.query_params.get(self.cursor_query_param)
+        if not encoded:
+            return None
+        try:
+            data = json.loads(base64.urlsafe_b64decode(encoded.encode("ascii")).decode("utf-8"))
+            raw_values, reverse = data["v"], bool(data["r"])
+            if len(raw_values) != len(self.fields):
+                raise ValueError
+            values = [
+                self.get_output_field(queryset, name).to_python(value)
+                for (name, descending), value in zip(self.fields, raw_values)
+            ]
+        except (TypeError, ValueError, KeyError, UnicodeDecodeError, ValidationError):
+            raise NotFound(_("Invalid cursor")) from None
+        return {"values": values, "reverse": reverse}
+
+    def encode_cursor(self, instance, reverse):
+        values = []
+        for name, _descending in self.fields:
+            attname = name if name == SEARCH_RANK else instance._meta.get_field(name).attname
+            value = getattr(instance, attname)
+            values.append(value.isoformat() if hasattr(value, "isoformat") else value)
+        data = json.dumps({"v": values, "r": int(reverse)}, separators=(",", ":"))
+        encoded = base64.urlsafe_b64encode(data.encode("utf-8")).decode("ascii")
+        return replace_query_param(self.request.build_absolute_uri(), self.cursor_query_param, encoded)
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        if not self.page:
+            return remove_query_param(self.request.build_absolute_uri(), self.cursor_query_param)
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_paginated_response(self, data):
+        return Response(
+            OrderedDict(
+                [
+                    ("count", self.count),
+                    ("next", self.get_next_link()),
+                    ("previous", self.get_previous_link()),
+                    ("results", data),
+                ]
+            )
+        )
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            "type": "object",
+            "properties": {
+                "count": {"type": "integer", "nullable": True, "example": 123},
+                "next": {"type": "string", "nullable": True, "format": "uri"},
+                "previous": {"type": "string", "nullable": True, "format": "uri"},
+                "results": schema,
+            },
+        }
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                "name": self.cursor_query_param,
+                "required": False,
+                "in": "query",
+                "description": str(self.cursor_query_description),
+                "schema": {"type": "string"},
+            },
+            {
+                "name": self.page_size_query_param,
+                "required": False,
+                "in": "query",
+                "description": str(self.page_size_query_description),
+                "schema": {"type": "integer"},
+            },
+        ]
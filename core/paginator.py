@@ -0,0 +1,49 @@
+import json
+
+from django.core.paginator import Paginator
+from django.db import connections
+from django.utils.functional import cached_property
+
+
+def estimate_count(queryset):
+    """
+    Returns the planner's row estimate for ``queryset`` on PostgreSQL, or ``None`` elsewhere.
+
+    Unfiltered querysets read ``pg_class.reltuples``; filtered ones use the "Plan Rows" of
+    ``EXPLAIN``, which avoids scanning the matching rows just to count them.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor != "postgresql":
+        return None
+    with connection.cursor() as cursor:
+        if not queryset.query.where:
+            cursor.execute(
+                "SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [queryset.model._meta.db_table]
+            )
+            row = cursor.fetchone()
+            # reltuples is -1 until the table has been analyzed for the first time
+            return row[0] if row and row[0] >= 0 else None
+        sql, params = queryset.order_by().values("pk").query.sql_with_params()
+        cursor.execute("EXPLAIN (FORMAT JSON) " + sql, params)
+        plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """
+    Paginator which uses the planner's estimate instead of ``COUNT(*)`` for large tables.
+
+    The exact count is still used when the estimate is below ``exact_count_threshold``,
+    where counting is cheap and an off-by-a-few page count would be noticeable.
+    """
+
+    exact_count_threshold = 10000
+
+    @cached_property
+    def count(self):
+        estimate = estimate_count(self.object_list) if hasattr(self.object_list, "query") else None
+        if estimate is None or estimate < self.exact_count_threshold:
+            return super().count
+        return estimate
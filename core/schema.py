@@ -0,0 +1,202 @@
+import gzip
+import hashlib
+import json
+import os
+import shutil
+import threading
+from functools import cache
+from pathlib import Path
+
+import brotli
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from django.utils.http import parse_etags
+from django.utils.translation import get_supported_language_variant
+from drf_spectacular.utils import extend_schema
+from drf_spectacular.views import SCHEMA_KWARGS, SpectacularAPIView
+from rest_framework.settings import api_settings
+
+from core.middlewares import CompressionMiddleware
+
+ENCODINGS = {
+    "br": lambda body: brotli.compress(body, quality=11),
+    "gzip": lambda body: gzip.compress(body, compresslevel=9, mtime=0),
+}
+
+_artifacts = {}
+_artifacts_lock = threading.Lock()
+
+
+class SchemaArtifact:
+    """
+    A rendered schema document with its pre-compressed variants and their strong ETags.
+    """
+
+    def __init__(self, body, content_type, headers, variants=None):
+        self.body = body
+        self.content_type = content_type
+        self.headers = headers
+        self.digest = hashlib.sha256(body).hexdigest()[:32]
+        self.variants = variants if variants is not None else {name: encode(body) for name, encode in ENCODINGS.items()}
+
+    def save(self, path):
+        path.mkdir(parents=True, exist_ok=True)
+        (path / "body").write_bytes(self.body)
+        for name, data in self.variants.items():
+            (path / f"body.{name}").write_bytes(data)
+        (path / "meta.json").write_text(json.dumps({"content_type": self.content_type, "headers": self.headers}))
+
+    @classmethod
+    def load(cls, path):
+        try:
+            meta = json.loads((path / "meta.json").read_text())
+            body = (path / "body").read_bytes()
+            variants = {name: (path / f"body.{name}").read_bytes() for name in ENCODINGS}
+        except (OSError, ValueError):
+            return None
+        return cls(body, meta["content_type"], meta["headers"], variants)
+
+    def get_etag(self, encoding=None):
+        # Each encoding is a different byte sequence, so each gets its own strong ETag.
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+
+@cache
+def get_code_version():
+    """
+    ``CODE_VERSION`` (e.g. the deployed git sha), or a fingerprint of the project's
+    Python sources when it is not set. Cached schemas of other versions are ignored.
+    """
+    if settings.CODE_VERSION:
+        return settings.CODE_VERSION
+    digest = hashlib.sha1()
+    for directory in settings.LOCAL_APPS:
+        for path in sorted((Path(settings.BASE_DIR) / directory).rglob("*.py")):
+            stat = path.stat()
+            digest.update(f"{path}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+    return digest.hexdigest()[:12]
+
+
+def get_schema_language(lang):
+    """
+    The language of ``LANGUAGES`` matching ``?lang=``, or None for unknown ones, which
+    drf-spectacular renders in the default language anyway.
+    """
+    if not (settings.USE_I18N and lang):
+        return None
+    try:
+        return get_supported_language_variant(lang)
+    except LookupError:
+        return None
+
+
+def get_artifact_path(key):
+    name = hashlib.sha1(repr(key).encode()).hexdigest()[:16]
+    return Path(settings.SCHEMA_CACHE_DIR) / get_code_version() / name
+
+
+def get_artifact(key, render):
+    """
+    Returns the artifact for ``key`` from memory, then from ``SCHEMA_CACHE_DIR`` (written
+    by ``manage.py build_schema``), and only renders it with ``render()`` as a last resort.
+    """
+    artifact = _artifacts.get(key)
+    if artifact is not None:
+        return artifact
+    with _artifacts_lock:
+        artifact = _artifacts.get(key)
+        if artifact is None:
+            artifact = SchemaArtifact.load(get_artifact_path(key)) or render()
+            _artifacts[key] = artifact
+    return artifact
+
+
+class PrecomputedSpectacularAPIView(SpectacularAPIView):
+    """
+    ``SpectacularAPIView`` which generates the public schema once per code version and
+    serves it with strong ETags, ``304 Not Modified`` and brotli/gzip pre-compressed bodies.
+
+    Artifacts are keyed by the negotiated media type, a language of ``LANGUAGES`` and an
+    allowed version, so arbitrary ``?lang=`` and ``?version=`` values cannot add new ones.
+    """
+
+    @extend_schema(**SCHEMA_KWARGS)
+    def get(self, request, *args, **kwargs):
+        if not self.serve_public:
+            return super().get(request, *args, **kwargs)
+
+        lang = get_schema_language(request.GET.get("lang"))
+        key = (
+            request.accepted_media_type,
+            lang,
+            self.api_version or request.version or self._get_version_parameter(request),
+        )
+        artifact = get_artifact(key, lambda: self.render_artifact(request, lang, *args, **kwargs))
+
+        encoding = CompressionMiddleware.choose_encoding(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        if encoding not in artifact.variants:
+            encoding = None
+        etag = artifact.get_etag(encoding)
+        if etag in parse_etags(request.META.get("HTTP_IF_NONE_MATCH", "")):
+            response = HttpResponseNotModified()
+        else:
+            body = artifact.variants[encoding] if encoding else artifact.body
+            response = HttpResponse(body, content_type=artifact.content_type)
+            if encoding:
+                response["Content-Encoding"] = encoding
+            for header, value in artifact.headers.items():
+                response[header] = value
+        response["ETag"] = etag
+        response["Cache-Control"] = "public, no-cache"
+        patch_vary_headers(response, ("Accept", "Accept-Encoding"))
+        return response
+
+    def _get_version_parameter(self, request):
+        # drf-spectacular takes any ?version= when ALLOWED_VERSIONS is empty.
+        version = request.GET.get("version")
+        return version if version in (api_settings.ALLOWED_VERSIONS or ()) else None
+
+    def render_artifact(self, request, lang, *args, **kwargs):
+        # Rendered with the language of the key rather than the ?lang= it was looked up from.
+        query = request._request.GET.copy()
+        query.pop("lang", None)
+        if lang:
+            query["lang"] = lang
+        request._request.GET = query
+        response = super().get(request, *args, **kwargs)
+        renderer = request.accepted_renderer
+        body = renderer.render(
+            response.data, request.accepted_media_type, {"request": request, "response": response, "view": self}
+        )
+        content_type = request.accepted_media_type
+        if renderer.charset:
+            content_type = f"{content_type}; charset={renderer.charset}"
+        headers = {name: response[name] for name in ("Content-Disposition",) if response.has_header(name)}
+        return SchemaArtifact(body, content_type, headers)
+
+
+def build_schemas(media_types=("application/vnd.oai.openapi", "application/vnd.oai.openapi+json")):
+    """
+    Renders the schema for ``media_types`` and stores it under ``SCHEMA_CACHE_DIR``.
+    """
+    from django.test import RequestFactory
+    from django.urls import reverse
+
+    shutil.rmtree(Path(settings.SCHEMA_CACHE_DIR) / get_code_version(), ignore_errors=True)
+    host = next((host for host in settings.ALLOWED_HOSTS if host not in ("", "*")), "localhost")
+    factory = RequestFactory()
+    view = PrecomputedSpectacularAPIView.as_view()
+    paths = []
+    for media_type in media_types:
+        with _artifacts_lock:
+            _artifacts.clear()
+        request = factory.get(reverse("schema"), HTTP_ACCEPT=media_type, SERVER_NAME=host.lstrip("."))
+        response = view(request)
+        if response.status_code != 200:
+            raise RuntimeError(f"Rendering the {media_type} schema returned {response.status_code}")
+        for key, artifact in _artifacts.items():
+            path = get_artifact_path(key)
+            artifact.save(path)
+            paths.append(os.fspath(path))
+    return paths
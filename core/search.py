@@ -0,0 +1,180 @@
+import operator
+from functools import reduce
+
+from django.db import connections
+from django.db.models import BooleanField, FloatField, Func, Q, TextField, Value
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from rest_framework.filters import SearchFilter
+
+# Annotation holding the relevance of each result, higher is better. KeysetPagination orders by
+# it (then by primary key) when the request asks for no other ordering.
+SEARCH_RANK = "search_rank"
+# Trigram indexes can only look up terms of at least three characters.
+MIN_TERM_LENGTH = 3
+
+
+class SearchDocument(Func):
+    """
+    The search fields joined by spaces. On PostgreSQL this is, character for character, the
+    expression of the trigram index created by ``install_search_index``, so the planner uses it.
+    """
+
+    template = "(%(expressions)s)"
+    arg_joiner = " || ' ' || "
+    output_field = TextField()
+
+
+class ILike(Func):
+    template = "%(expressions)s"
+    arg_joiner = " ILIKE "
+    output_field = BooleanField()
+
+
+class WordSimilarity(Func):
+    function = "word_similarity"
+    output_field = FloatField()
+
+
+class IndexedSearchFilter(SearchFilter):
+    """
+    ``SearchFilter`` answered from an index instead of ``icontains`` ORs, which scan the
+    whole table. Views opt in with ``search_index`` (see ``install_search_index``) next
+    to plain ``search_fields``; every other view gets ``SearchFilter``'s behaviour.
+
+    Every term must still occur, case-insensitively, in one of the fields, and results
+    are annotated with ``SEARCH_RANK``:
+
+    - PostgreSQL: ``ILIKE`` on the joined fields, served by a ``pg_trgm`` GIN index, ranked
+      by ``word_similarity`` (whole-word and prefix matches first).
+    - SQLite: ``MATCH`` on an FTS5 table with the trigram tokenizer, ranked by ``bm25``.
+      Terms shorter than three characters are checked with ``icontains`` on the rows it finds.
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        search_fields = self.get_search_fields(view, request)
+        search_terms = self.get_search_terms(request)
+        index = getattr(view, "search_index", None)
+        if not (index and search_fields and search_terms) or not self.is_indexable(search_fields):
+            return super().filter_queryset(request, queryset, view)
+        return search_queryset(queryset, search_fields, index, search_terms)
+
+    def is_indexable(self, search_fields):
+        return all(field[0] not in self.lookup_prefixes and "__" not in field for field in search_fields)
+
+
+def search_queryset(queryset, fields, index, terms, rank=True):
+    """
+    Filters ``queryset`` to rows containing every term in one of ``fields`` using the search
+    index ``index``, annotated with ``SEARCH_RANK`` unless ``rank`` is False. Also used by
+    the admin, which applies its own ordering.
+    """
+    connection = connections[queryset.db]
+    if connection.vendor == "postgresql":
+        document = SearchDocument(*fields)
+        conditions = [ILike(document, Value(f"%{connection.ops.prep_for_like_query(term)}%")) for term in terms]
+        queryset = queryset.filter(*conditions)
+        if not rank:
+            return queryset
+        return queryset.annotate(**{SEARCH_RANK: Cast(WordSimilarity(Value(" ".join(terms)), document), FloatField())})
+
+    if connection.vendor == "sqlite":
+        indexed = [term for term in terms if len(term) >= MIN_TERM_LENGTH]
+        short = [term for term in terms if len(term) < MIN_TERM_LENGTH]
+        for term in short:
+            queryset = queryset.filter(reduce(operator.or_, (Q(**{f"{field}__icontains": term}) for field in fields)))
+        if not indexed:
+            return queryset
+        # Quoted strings: the trigram tokenizer matches them anywhere in a field, and FTS5
+        # operators in user input are taken literally.
+        match = " ".join('"{}"'.format(term.replace('"', '""')) for term in indexed)
+        table, pk = queryset.model._meta.db_table, queryset.model._meta.pk.column
+        queryset = queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM "{index}" WHERE "{index}" MATCH %s', [match]))
+        if not rank:
+            return queryset
+        # The CTE ranks every match once; a plain correlated subquery would rerun the MATCH
+        # for each row, which is quadratic for broad terms.
+        materialized = "MATERIALIZED" if connection.Database.sqlite_version_info >= (3, 35) else ""
+        bm25 = RawSQL(
+            f'WITH ranks AS {materialized} (SELECT rowid, -bm25("{index}") AS rank FROM "{index}" '
+            f'WHERE "{index}" MATCH %s) SELECT rank FROM ranks WHERE rowid = "{table}"."{pk}"',
+            [match],
+            output_field=FloatField(),
+        )
+        return queryset.annotate(**{SEARCH_RANK: bm25})
+
+    return queryset.filter(
+        *(reduce(operator.or_, (Q(**{f"{field}__icontains": term}) for field in fields)) for term in terms)
+    )
+
+
+def install_search_index(connection, table, index, fields, pk="id"):
+    """
+    Creates the search index ``IndexedSearchFilter`` reads, idempotently: a trigram GIN
+    index on the joined ``fields`` on PostgreSQL (built concurrently, so outside a
+    transaction), or an FTS5 table indexing ``table`` (external content, so the text is
+    not stored twice) kept in sync by triggers on SQLite.
+    """
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            document = " || ' ' || ".join(quote(field) for field in fields)
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            cursor.execute(
+                f"CREATE INDEX CONCURRENTLY IF NOT EXISTS {quote(index)} "
+                f"ON {quote(table)} USING gin (({document}) gin_trgm_ops)"
+            )
+        elif connection.vendor == "sqlite":
+            columns = ", ".join(quote(field) for field in fields)
+            new = ", ".join(f"new.{quote(field)}" for field in fields)
+            old = ", ".join(f"old.{quote(field)}" for field in fields)
+            insert = f"INSERT INTO {quote(index)}(rowid, {columns}) VALUES (new.{quote(pk)}, {new});"
+            delete = (
+                f"INSERT INTO {quote(index)}({quote(index)}, rowid, {columns}) "
+                f"VALUES ('delete', old.{quote(pk)}, {old});"
+            )
+            cursor.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS {quote(index)} USING fts5("
+                f"{columns}, content={quote(table)}, content_rowid={quote(pk)}, tokenize='trigram')"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {quote(index + '_ai')} AFTER INSERT ON {quote(table)} BEGIN {insert} END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {quote(index + '_ad')} AFTER DELETE ON {quote(table)} BEGIN {delete} END"
+            )
+            cursor.execute(
+                f"CREATE TRIGGER IF NOT EXISTS {quote(index + '_au')} AFTER UPDATE OF {columns} ON {quote(table)} "
+                f"BEGIN {delete} {insert} END"
+            )
+            cursor.execute(f"INSERT INTO {quote(index)}({quote(index)}) VALUES ('rebuild')")
+
+
+def uninstall_search_index(connection, table, index):
+    quote = connection.ops.quote_name
+    with connection.cursor() as cursor:
+        if connection.vendor == "postgresql":
+            cursor.execute(f"DROP INDEX CONCURRENTLY IF EXISTS {quote(index)}")
+        elif connection.vendor == "sqlite":
+            for suffix in ("_ai", "_ad", "_au"):
+                cursor.execute(f"DROP TRIGGER IF EXISTS {quote(index + suffix)}")
+            cursor.execute(f"DROP TABLE IF EXISTS {quote(index)}")
+
+
+def repair_search_index(connection, table, index, fields, pk="id"):
+    """
+    SQLite rebuilds a table (dropping its triggers) for most schema changes. Run after
+    migrations, this restores the triggers of an existing FTS5 index and reindexes it.
+    """
+    if connection.vendor != "sqlite":
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT COUNT(*) FROM sqlite_master WHERE type = 'trigger' AND tbl_name = %s AND name IN (%s, %s, %s)",
+            [table, index + "_ai", index + "_ad", index + "_au"],
+        )
+        triggers = cursor.fetchone()[0]
+    if triggers == 3 or index not in connection.introspection.table_names():
+        return False
+    install_search_index(connection, table, index, fields, pk)
+    return True
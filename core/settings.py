@@ -1,8 +1,7 @@
-from datetime import timedelta
 import os
-from pathlib import Path
-import logging.config
 import urllib.parse
+from datetime import timedelta
+from pathlib import Path
 
 BASE_DIR = Path(__file__).resolve().parent.parent
 
@@ -12,9 +11,21 @@ DEBUG = bool(os.environ.get("DEBUG", default=0))
 
 ROOT_URLCONF = "core.urls"
 WSGI_APPLICATION = "core.wsgi.application"
+ASGI_APPLICATION = "core.asgi.application"
 
 # Application definition
 
+# DJANGO_ROLE trims the apps a process loads to what it serves:
+# - "web": everything (the default).
+# - "api": the API without the admin site and the schema docs.
+# - "celery" / "beat": only apps with models or tasks.
+# Roles other than "web" keep the admin's models (deleting a user cascades to its log entries)
+# but skip importing every admin.py.
+DJANGO_ROLE = os.environ.get("DJANGO_ROLE", "web")
+DJANGO_ROLES = ("web", "api", "celery", "beat")
+if DJANGO_ROLE not in DJANGO_ROLES:
+    raise ValueError(f"DJANGO_ROLE must be one of {DJANGO_ROLES}, not {DJANGO_ROLE!r}")
+
 THIRD_PARTY_APPS = [
     "rest_framework",
     "django_filters",
@@ -26,26 +37,38 @@ THIRD_PARTY_APPS = [
 ]
 
 LOCAL_APPS = [
+    "core",
     "users",
 ]
 
-INSTALLED_APPS = (
-    [
-        "django.contrib.admin",
-        "django.contrib.auth",
-        "django.contrib.contenttypes",
-        "django.contrib.sessions",
-        "django.contrib.messages",
-        "django.contrib.staticfiles",
-    ] + THIRD_PARTY_APPS + LOCAL_APPS
-)
+DJANGO_APPS = [
+    "django.contrib.admin",
+    "django.contrib.auth",
+    "django.contrib.contenttypes",
+    "django.contrib.sessions",
+    "django.contrib.messages",
+    "django.contrib.staticfiles",
+]
+
+if DJANGO_ROLE != "web":
+    DJANGO_APPS[0] = "django.contrib.admin.apps.SimpleAdminConfig"
+    THIRD_PARTY_APPS.remove("drf_spectacular")
+if DJANGO_ROLE in ("celery", "beat"):
+    DJANGO_APPS.remove("django.contrib.staticfiles")
+    for app in ("rest_framework", "django_filters", "djoser", "corsheaders"):
+        THIRD_PARTY_APPS.remove(app)
+
+INSTALLED_APPS = DJANGO_APPS + THIRD_PARTY_APPS + LOCAL_APPS
 
 MIDDLEWARE = [
     'log_request_id.middleware.RequestIDMiddleware',
+    "core.middlewares.MetricsMiddleware",
+    "core.middlewares.ReplicaPinningMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "corsheaders.middleware.CorsMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "core.middlewares.AsyncWhiteNoiseMiddleware",
+    "core.middlewares.CompressionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
     "django.contrib.auth.middleware.AuthenticationMiddleware",
@@ -85,9 +108,28 @@ DATABASES = {
         "PASSWORD": os.environ.get("SQL_PASSWORD", "password"),
         "HOST": os.environ.get("SQL_HOST", "localhost"),
         "PORT": os.environ.get("SQL_PORT", "5432"),
+        # Seconds to keep a connection open across requests, 0 to close it after every request.
+        "CONN_MAX_AGE": int(os.environ.get("SQL_CONN_MAX_AGE", 0)),
+        "CONN_HEALTH_CHECKS": bool(int(os.environ.get("SQL_CONN_HEALTH_CHECKS", 1))),
+        # Behind pgbouncer in transaction pooling mode server-side cursors (``.iterator()``)
+        # cannot outlive their transaction, so Django must not use them.
+        "DISABLE_SERVER_SIDE_CURSORS": bool(int(os.environ.get("SQL_PGBOUNCER", 0))),
     }
 }
 
+# ---------------------------------READ REPLICAS-----------------------------------------------#
+# SQL_REPLICA_HOSTS="replica1 replica2" adds a `replica_<n>` alias per host, sharing every other
+# setting with `default`. Reads of DATABASE_REPLICA_APPS models go to a random replica, except for
+# clients pinned to the primary after a write (see core.middlewares.ReplicaPinningMiddleware).
+DATABASE_REPLICAS = []
+for index, host in enumerate(os.environ.get("SQL_REPLICA_HOSTS", "").split(), start=1):
+    DATABASES[f"replica_{index}"] = {**DATABASES["default"], "HOST": host, "TEST": {"MIRROR": "default"}}
+    DATABASE_REPLICAS.append(f"replica_{index}")
+
+DATABASE_ROUTERS = ["core.db_routers.PrimaryReplicaRouter"]
+DATABASE_REPLICA_APPS = ["users", "auth", "contenttypes"]
+DATABASE_REPLICA_PIN_SECONDS = int(os.environ.get("SQL_REPLICA_PIN_SECONDS", 5))
+
 
 # Password validation
 # https://docs.djangoproject.com/en/4.1/ref/settings/#auth-password-validators
@@ -126,6 +168,41 @@ MEDIA_URL = "/media/"
 STATIC_ROOT = os.path.join(BASE_DIR, "static")
 STATIC_URL = "/static/"
 
+# collectstatic writes content-hashed copies (app.3f2a1b9c4d5e.css) plus .gz and .br variants of every
+# file; WhiteNoise (or nginx) serves the hashed names with a far-future "immutable" Cache-Control.
+# A reference missing from the manifest falls back to the unhashed name instead of failing the page.
+STORAGES = {
+    "default": {
+        "BACKEND": "django.core.files.storage.FileSystemStorage",
+    },
+    "staticfiles": {
+        "BACKEND": "whitenoise.storage.CompressedManifestStaticFilesStorage",
+    },
+}
+WHITENOISE_MANIFEST_STRICT = False
+
+# Files under MEDIA_ROOT/PROTECTED_MEDIA_PREFIX are only served to authenticated users, through
+# core.views.ProtectedMediaView. With MEDIA_ACCEL_REDIRECT_LOCATION set (an `internal` nginx location
+# aliasing that directory) the view only answers with an X-Accel-Redirect header and nginx sends the
+# bytes; empty, the file is streamed from Python (development).
+PROTECTED_MEDIA_PREFIX = "protected/"
+MEDIA_ACCEL_REDIRECT_LOCATION = os.environ.get("MEDIA_ACCEL_REDIRECT_LOCATION", "")
+
+# Uploads are streamed to a temporary file (never held in memory) and hashed on the way; see core.uploads.
+FILE_UPLOAD_HANDLERS = ["core.uploads.HashingFileUploadHandler"]
+# Uploaded images are stored under their content hash. Their variants are rendered by celery tasks on
+# the QUEUE queue (a dedicated worker, see docker-compose.prod.yml) and reused for identical uploads.
+IMAGE_PROCESSING = {
+    "QUEUE": os.environ.get("IMAGE_PROCESSING_QUEUE", "media"),
+    "MAX_UPLOAD_SIZE": int(os.environ.get("IMAGE_MAX_UPLOAD_SIZE", 10 * 1024 * 1024)),
+    "MAX_PIXELS": 40_000_000,
+    "FORMATS": ("JPEG", "PNG", "WEBP", "GIF"),
+    "VARIANT_FORMAT": "WEBP",
+    "VARIANT_QUALITY": 80,
+    # Square thumbnails, {name: edge in pixels}.
+    "AVATAR_VARIANTS": {"small": 64, "medium": 256, "large": 512},
+}
+
 # ---------------------------------DEFAULT PRIMARY KEY FIELD TYPE-------------------------------------------------#
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
@@ -137,17 +214,42 @@ AUTH_USER_MODEL = "users.User"
 REST_FRAMEWORK = {
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
     "DEFAULT_AUTHENTICATION_CLASSES": (
-        "rest_framework_simplejwt.authentication.JWTAuthentication",
+        "users.authentication.CachedJWTAuthentication",
     ),
     "DEFAULT_FILTER_BACKENDS": (
         "django_filters.rest_framework.DjangoFilterBackend",
-        "rest_framework.filters.SearchFilter",
+        "core.search.IndexedSearchFilter",
         "rest_framework.filters.OrderingFilter",
     ),
     "DEFAULT_SCHEMA_CLASS": "drf_spectacular.openapi.AutoSchema",
-    "DEFAULT_PAGINATION_CLASS": "rest_framework.pagination.LimitOffsetPagination",
+    "DEFAULT_PAGINATION_CLASS": "core.pagination.KeysetPagination",
     "PAGE_SIZE": 10,
 }
+if "drf_spectacular" not in INSTALLED_APPS:
+    # Views touch their schema class while being set up, which would import all of drf_spectacular.
+    REST_FRAMEWORK["DEFAULT_SCHEMA_CLASS"] = "rest_framework.schemas.openapi.AutoSchema"
+
+
+# ---------------------------------USER CACHE-----------------------------------------------#
+# Used by users.authentication.CachedJWTAuthentication. "TTL" bounds how long other workers can
+# serve a stale user row; set "SHARED_CACHE_ALIAS" to share rows between workers.
+USER_CACHE = {
+    "MAX_SIZE": 10000,
+    "TTL": int(os.environ.get("USER_CACHE_TTL", 10)),
+    "SHARED_CACHE_ALIAS": os.environ.get("USER_CACHE_ALIAS") or None,
+    "SHARED_TTL": 300,
+}
+
+
+# Seconds a login attempt for an unknown email is answered from the cache instead of the database.
+# Only with a shared default cache (REDIS_CACHE).
+USER_EMAIL_NEGATIVE_CACHE_TTL = int(os.environ.get("USER_EMAIL_NEGATIVE_CACHE_TTL", 60))
+
+# Seconds a user's permission set is kept in the default cache; signals invalidate it on every change.
+# Only with a shared default cache (REDIS_CACHE); otherwise permissions are read once per request.
+USER_PERMISSION_CACHE_TTL = int(os.environ.get("USER_PERMISSION_CACHE_TTL", 3600))
+
+AUTHENTICATION_BACKENDS = ["users.backends.CachedModelBackend"]
 
 
 # ------------------------------SPECTACULAR CONFIG---------------------------------------------#
@@ -158,7 +260,20 @@ SPECTACULAR_SETTINGS = {
     "SERVE_INCLUDE_SCHEMA": False,
     "SCHEMA_PATH_PREFIX": "/api/",
 }
-
+# The schema served at api/schema/ is rendered once per CODE_VERSION (e.g. the deployed git sha)
+# and can be pre-built into SCHEMA_CACHE_DIR with `manage.py build_schema`.
+CODE_VERSION = os.environ.get("CODE_VERSION", "")
+SCHEMA_CACHE_DIR = os.environ.get("SCHEMA_CACHE_DIR", os.path.join(BASE_DIR, "schema_cache"))
+
+
+# ---------------------------------LAST LOGIN WRITE-BEHIND----------------------------------#
+# "memory" flushes from each web process, "redis" from the users.tasks.flush_last_login
+# periodic task. last_login is at most FLUSH_INTERVAL seconds stale; empty writes it synchronously.
+LAST_LOGIN_BUFFER = {
+    "BACKEND": os.environ.get("LAST_LOGIN_BUFFER", ""),
+    "FLUSH_INTERVAL": int(os.environ.get("LAST_LOGIN_FLUSH_INTERVAL", 10)),
+    "BATCH_SIZE": 1000,
+}
 
 # ---------------------------------SIMPLE JWT CONFIG-----------------------------------------#
 SIMPLE_JWT = {
@@ -168,7 +283,7 @@ SIMPLE_JWT = {
     "ALLOW_REFRESH_SOCIAL": False,
     "ROTATE_REFRESH_TOKENS": False,
     "BLACKLIST_AFTER_ROTATION": False,
-    "UPDATE_LAST_LOGIN": True,
+    "UPDATE_LAST_LOGIN": not LAST_LOGIN_BUFFER["BACKEND"],
     "ALGORITHM": "HS256",
     "SIGNING_KEY": SECRET_KEY,
     "VERIFYING_KEY": None,
@@ -179,6 +294,8 @@ SIMPLE_JWT = {
     "USER_ID_FIELD": "id",
     "USER_ID_CLAIM": "user_id",
     "AUTH_TOKEN_CLASSES": ("rest_framework_simplejwt.tokens.AccessToken",),
+    "TOKEN_OBTAIN_SERIALIZER": "users.serializers.TokenObtainPairSerializer",
+    "TOKEN_REFRESH_SERIALIZER": "users.serializers.TokenRefreshSerializer",
     "TOKEN_TYPE_CLAIM": "token_type",
     "JTI_CLAIM": "jti",
     "SLIDING_TOKEN_REFRESH_EXP_CLAIM": "refresh_exp",
@@ -186,8 +303,25 @@ SIMPLE_JWT = {
     "SLIDING_TOKEN_REFRESH_LIFETIME": timedelta(days=1),
 }
 
+# ---------------------------------TOKEN REVOCATION-----------------------------------------#
+# Revoked jtis and per-user cutoffs live in the database (users.RevokedToken, users.TokenCutoff);
+# every process checks tokens against an in-memory copy (users.revocation.RevocationList) which
+# syncs changes at most SYNC_INTERVAL seconds late. Past EXPECTED_TOKENS live revocations the
+# Bloom filter is rebuilt larger.
+TOKEN_REVOCATION = {
+    "SYNC_INTERVAL": int(os.environ.get("TOKEN_REVOCATION_SYNC_INTERVAL", 5)),
+    "EXPECTED_TOKENS": 100000,
+    "FALSE_POSITIVE_RATE": 0.001,
+    "FALSE_POSITIVE_CACHE_SIZE": 10000,
+}
+
 # ----------------------------------------------LOGGING SETTINGS------------------------------------------------------
-LOGGING_CONFIG = None  # This empties out Django's logging config
+# Every logger writes through a QueueListenerHandler, so request and task threads only enqueue records;
+# formatting, file writes and rotation happen on the listener thread of each process.
+# LOG_FORMAT=json switches the console and files to one JSON object per line.
+# Applied by django.setup() (on top of Django's defaults), not when this module is imported.
+LOG_LEVEL = os.environ.get("LOG_LEVEL", "INFO")
+LOG_FORMAT = os.environ.get("LOG_FORMAT", "simple")
 
 LOGGING = {
     "version": 1,
@@ -195,7 +329,15 @@ LOGGING = {
     'filters': {
         'request_id': {
             '()': 'log_request_id.filters.RequestIDFilter'
-        }
+        },
+        "rate_limit": {
+            "()": "core.log_handlers.RateLimitFilter",
+            # At most RATE records per PER seconds for each call site and message, from WARNING up;
+            # request and access logs are never limited.
+            "rate": int(os.environ.get("LOG_RATE_LIMIT", 20)),
+            "per": 60,
+            "level": "WARNING",
+        },
     },
     "formatters": {
         "simple": {
@@ -203,50 +345,119 @@ LOGGING = {
                       '[%(levelname)s] - %(message)s',
             "datefmt": "%y %b %d, %H:%M:%S",
         },
+        "json": {
+            "()": "core.log_handlers.JSONFormatter",
+        },
     },
     "handlers": {
         "console": {
-            "level": "DEBUG",
             "class": "logging.StreamHandler",
-            "formatter": "simple",
+            "formatter": LOG_FORMAT,
         },
         "celery": {
-            "level": "DEBUG",
             "class": "logging.handlers.RotatingFileHandler",
             "filename": "celery.log",
-            "formatter": "simple",
+            "formatter": LOG_FORMAT,
             "maxBytes": 1024 * 1024 * 100,  # 100 mb
+            "delay": True,
         },
         "file": {
-            "level": "DEBUG",
             "class": "logging.handlers.RotatingFileHandler",
             "filename": "debug.log",
+            "formatter": LOG_FORMAT,
             "maxBytes": 1024 * 1024 * 100,  # 100 mb
+            "delay": True,
+        },
+        "queue": {
+            "()": "core.log_handlers.QueueListenerHandler",
+            "handlers": ["file", "console"],
+            "filters": ["request_id", "rate_limit"],
+        },
+        "queue_celery": {
+            "()": "core.log_handlers.QueueListenerHandler",
+            "handlers": ["celery", "console"],
+            "filters": ["request_id", "rate_limit"],
         },
     },
     "loggers": {
         "celery": {
-            "handlers": ["celery", "console"],
-            "level": "DEBUG",
+            "handlers": ["queue_celery"],
+            "level": LOG_LEVEL,
+            # The worker also attaches its own handler to the root logger.
+            "propagate": False,
         },
         "django": {
-            "handlers": ["file", "console"],
-            "level": "INFO",
+            "handlers": ["queue"],
+            "level": LOG_LEVEL,
             "propagate": True,
         },
+        # Django's default configuration gives runserver its own handler.
+        "django.server": {
+            "handlers": ["queue"],
+            "level": LOG_LEVEL,
+            "propagate": False,
+        },
+        "info_logger": {
+            "handlers": ["queue"],
+            "level": "INFO",
+            "propagate": False,
+        },
+        # Without an entry, disable_existing_loggers would silence gunicorn's own loggers in every
+        # process loading the application, including a master which preloads it.
+        "gunicorn": {
+            "handlers": ["queue"],
+            "level": LOG_LEVEL,
+            "propagate": False,
+        },
     },
 }
 
-logging.config.dictConfig(LOGGING)
+# ----------------------------------------REQUEST/RESPONSE LOGGER SETTINGS------------------------------------------------
+REQUEST_LOGGER = {
+    "SAMPLE_RATE": float(os.environ.get("REQUEST_LOG_SAMPLE_RATE", 1.0)),
+    "MAX_BODY_LENGTH": int(os.environ.get("REQUEST_LOG_MAX_BODY_LENGTH", 2048)),
+    "ALLOW_PATHS": (),
+    "DENY_PATHS": (STATIC_URL, MEDIA_URL, "/favicon.ico"),
+    "CONTENT_TYPES": ("application/json", "application/x-www-form-urlencoded", "text/"),
+}
+
+# ----------------------------------------------METRICS SETTINGS-----------------------------------------------------
+# Bearer token Prometheus sends to /metrics/ (Authorization: Bearer <token>). Without it the endpoint is only served
+# with DEBUG. nginx denies /metrics/ anyway; scrape the web containers directly.
+METRICS_TOKEN = os.environ.get("METRICS_TOKEN")
+
+# ----------------------------------------RESPONSE COMPRESSION SETTINGS-------------------------------------------------
+# core.middlewares.CompressionMiddleware: brotli or gzip for bodies of at least MIN_SIZE bytes. Static
+# files are compressed ahead of time by collectstatic and served before it by WhiteNoise.
+RESPONSE_COMPRESSION = {
+    "MIN_SIZE": int(os.environ.get("RESPONSE_COMPRESSION_MIN_SIZE", 1024)),
+    "CONTENT_TYPES": ("application/json", "application/problem+json", "text/", "application/javascript"),
+    # 4-5 compresses JSON about as well as gzip -6 at similar speed; 11 is for precompressed files only.
+    "BROTLI_QUALITY": 4,
+    # BREACH: brotli cannot pad its output like gzip's random header, so pages carrying CSRF tokens only get gzip.
+    "GZIP_ONLY_CONTENT_TYPES": ("text/html",),
+}
 
 
 # ----------------------------------------------EMAIL SETTINGS------------------------------------------------------
-EMAIL_BACKEND = "django.core.mail.backends.smtp.EmailBackend"
-EMAIL_HOST = "smtp.elasticemail.com"
+# Requests only queue messages; core.tasks.send_emails delivers them with EMAIL_DELIVERY["BACKEND"]
+# over one persistent SMTP connection per worker process.
+EMAIL_BACKEND = os.environ.get("EMAIL_BACKEND", "core.mail.CeleryEmailBackend")
+EMAIL_HOST = os.environ.get("EMAIL_HOST", "smtp.elasticemail.com")
 EMAIL_USE_TLS = False
-EMAIL_PORT = 2525
+EMAIL_PORT = int(os.environ.get("EMAIL_PORT", 2525))
 EMAIL_HOST_USER = "your-email"
 EMAIL_HOST_PASSWORD = "your-password"
+EMAIL_TIMEOUT = 30
+EMAIL_DELIVERY = {
+    "BACKEND": "django.core.mail.backends.smtp.EmailBackend",
+    "BATCH_SIZE": 50,
+    "MAX_RETRIES": 5,
+    # Seconds before the first retry, doubled on every further attempt.
+    "RETRY_BACKOFF": 30,
+    # Seconds an idle SMTP connection is kept open for the next task.
+    "CONNECTION_MAX_AGE": 60,
+}
 
 # ---------------------------------------------REDIS SETTINGS------------------------------------------------------
 REDIS_HOST = "redis"
@@ -254,17 +465,60 @@ REDIS_PORT = 6379
 REDIS_DB = 0
 REDIS_PASSWORD = os.environ.get("REDIS_PASSWORD", "")
 
-print("redis_password", REDIS_PASSWORD)
+encoded_password = urllib.parse.quote_plus(REDIS_PASSWORD)
+REDIS_URL = f"redis://:{encoded_password}@{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
+REDIS_CACHE_URL = f"redis://:{encoded_password}@{REDIS_HOST}:{REDIS_PORT}/1"
+
+# ---------------------------------------------CACHE SETTINGS------------------------------------------------------
+# REDIS_CACHE=1 puts the default cache (and with it sessions and user lookups) on Redis, behind a
+# per-process LRU invalidated over pub/sub (see core.cache.TwoTierRedisCache).
+if bool(int(os.environ.get("REDIS_CACHE", 0))):
+    CACHES = {
+        "default": {
+            "BACKEND": "core.cache.TwoTierRedisCache",
+            "LOCATION": REDIS_CACHE_URL,
+            "KEY_PREFIX": "core",
+            "VERSION": int(os.environ.get("CACHE_VERSION", 1)),
+            "OPTIONS": {
+                "LOCAL_MAX_SIZE": int(os.environ.get("CACHE_LOCAL_MAX_SIZE", 10000)),
+                "LOCAL_TIMEOUT": int(os.environ.get("CACHE_LOCAL_TIMEOUT", 5)),
+            },
+        }
+    }
+    SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+    USER_CACHE["SHARED_CACHE_ALIAS"] = USER_CACHE["SHARED_CACHE_ALIAS"] or "default"
 
 # ---------------------------------------------CELERY SETTINGS------------------------------------------------------
-encoded_password = urllib.parse.quote_plus(REDIS_PASSWORD)
-CELERY_BROKER_URL = f"redis://:{encoded_password}@{REDIS_HOST}:{REDIS_PORT}/{REDIS_DB}"
+CELERY_BROKER_URL = REDIS_URL
 CELERY_ACCEPT_CONTENT = ["application/json"]
 CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_TIMEZONE = "Asia/Kathmandu"
-CELERY_RESULT_BACKEND = "django-db"
-CELERY_BEAT_SCHEDULER = 'django_celery_beat.schedulers.DatabaseScheduler'
+CELERY_TASK_STORE_ERRORS_EVEN_IF_IGNORED = True
+# Fire-and-forget tasks can skip the result write entirely; tasks whose result is read must then
+# set ignore_result=False themselves.
+CELERY_TASK_IGNORE_RESULT = bool(int(os.environ.get("CELERY_TASK_IGNORE_RESULT", 0)))
+
+# Results older than TASK_RESULT_RETENTION expire in Redis (CELERY_RESULT_STORE=redis) or are deleted
+# from the django-db tables in batches by core.tasks.cleanup_task_results. That task replaces celery's
+# own backend_cleanup, which removes every expired row in a single DELETE.
+TASK_RESULT_RETENTION = timedelta(hours=int(os.environ.get("TASK_RESULT_RETENTION_HOURS", 72)))
+TASK_RESULT_CLEANUP_BATCH_SIZE = int(os.environ.get("TASK_RESULT_CLEANUP_BATCH_SIZE", 5000))
+if os.environ.get("CELERY_RESULT_STORE", "django-db") == "redis":
+    CELERY_RESULT_BACKEND = f"redis://:{encoded_password}@{REDIS_HOST}:{REDIS_PORT}/2"
+    CELERY_RESULT_EXPIRES = TASK_RESULT_RETENTION
+else:
+    CELERY_RESULT_BACKEND = "django-db"
+    CELERY_RESULT_EXPIRES = None
+# Keep the LOGGING configuration above in workers instead of celery's own root handlers.
+CELERY_WORKER_HIJACK_ROOT_LOGGER = False
+# CPU-heavy image work gets its own queue, so it never delays emails and periodic tasks.
+CELERY_TASK_ROUTES = {
+    "users.tasks.process_avatar": {"queue": IMAGE_PROCESSING["QUEUE"]},
+}
+CELERY_BEAT_SCHEDULER = "core.beat.CachedDatabaseScheduler"
+# Seconds between checks of the schedule version, i.e. how long an edit in the admin takes to reach beat.
+BEAT_SCHEDULE_CHECK_INTERVAL = int(os.environ.get("BEAT_SCHEDULE_CHECK_INTERVAL", 5))
 
 # ------------------------------DJOSER CONFIG---------------------------------------------#
 DEFAULT_FROM_EMAIL = EMAIL_HOST_USER
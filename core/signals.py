@@ -0,0 +1,33 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+from django_celery_beat.models import ClockedSchedule, CrontabSchedule, IntervalSchedule, PeriodicTask, SolarSchedule
+
+from core.beat import bump_schedule_version
+
+SCHEDULE_FIELDS = {
+    ClockedSchedule: "clocked",
+    CrontabSchedule: "crontab",
+    IntervalSchedule: "interval",
+    SolarSchedule: "solar",
+}
+
+
+@receiver(post_save, sender=PeriodicTask)
+@receiver(post_delete, sender=PeriodicTask)
+def periodic_task_changed(sender, instance, **kwargs):
+    # Beat sets ``no_changes`` when it only records a run.
+    if not instance.no_changes:
+        bump_schedule_version()
+
+
+@receiver(post_save, sender=ClockedSchedule)
+@receiver(post_save, sender=CrontabSchedule)
+@receiver(post_save, sender=IntervalSchedule)
+@receiver(post_save, sender=SolarSchedule)
+def schedule_changed(sender, instance, created, **kwargs):
+    if created:
+        return
+    # Edited schedules are picked up through the date_changed of the tasks using them.
+    PeriodicTask.objects.filter(**{SCHEDULE_FIELDS[sender]: instance}).update(date_changed=timezone.now())
+    bump_schedule_version()
@@ -0,0 +1,25 @@
+import gc
+
+from django.db import connections
+from django.urls import get_resolver
+
+
+def warm_up():
+    """
+    Does the work Django otherwise leaves to the first request: importing the URLconf,
+    with every view and serializer it references, and building the reverse lookup table.
+    """
+    resolver = get_resolver()
+    resolver.url_patterns  # noqa: B018
+    resolver.reverse_dict  # noqa: B018
+
+
+def prepare_fork():
+    """
+    Readies a preloaded gunicorn master for forking workers. Inherited database sockets
+    would be shared by every worker, and freezing the objects created so far keeps the
+    garbage collector from writing to them, so their pages stay shared copy-on-write.
+    """
+    connections.close_all()
+    gc.collect()
+    gc.freeze()
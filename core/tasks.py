@@ -0,0 +1,79 @@
+import random
+import time
+
+from celery import shared_task
+from celery.signals import worker_process_shutdown
+from django.conf import settings
+from django.utils import timezone
+
+from core.mail import close_smtp_connection, deliver, get_config
+from core.models import FailedEmail
+
+worker_process_shutdown.connect(close_smtp_connection)
+
+
+@shared_task(bind=True, ignore_result=True, max_retries=None)
+def send_emails(self, messages):
+    """
+    Delivers messages serialized by ``core.mail.CeleryEmailBackend``. Transient failures are
+    retried with exponential backoff up to ``MAX_RETRIES`` times; permanent failures and
+    messages out of retries are stored as ``FailedEmail``.
+    """
+    config = get_config()
+    attempts = self.request.retries + 1
+    retry = []
+    dead = []
+    for message, error, permanent in deliver(messages):
+        if permanent or attempts > config["MAX_RETRIES"]:
+            dead.append(
+                FailedEmail(
+                    from_email=message["from_email"],
+                    recipients=message["recipients"],
+                    subject=message["subject"][:998],
+                    message=message["message"],
+                    error=repr(error),
+                    attempts=attempts,
+                )
+            )
+        else:
+            retry.append(message)
+    if dead:
+        FailedEmail.objects.bulk_create(dead)
+    if retry:
+        countdown = config["RETRY_BACKOFF"] * 2**self.request.retries
+        raise self.retry(args=(retry,), countdown=countdown * random.uniform(0.5, 1.5))
+    return len(messages) - len(retry) - len(dead)
+
+
+def delete_in_batches(queryset, batch_size, pause=0.0):
+    """
+    Deletes ``queryset`` ``batch_size`` primary keys at a time, so no statement holds its
+    locks or bloats the WAL for long. Returns the number of deleted rows.
+    """
+    deleted = 0
+    while True:
+        pks = list(queryset.order_by("pk").values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return deleted
+        count, _ = queryset.model._default_manager.filter(pk__in=pks).delete()
+        deleted += count
+        if len(pks) < batch_size:
+            return deleted
+        time.sleep(pause)
+
+
+@shared_task(ignore_result=True)
+def cleanup_task_results(batch_size=None, pause=0.1):
+    """
+    Deletes django-db task and group results older than ``TASK_RESULT_RETENTION``.
+    """
+    if settings.CELERY_RESULT_BACKEND != "django-db":
+        return 0
+    from django_celery_results.models import GroupResult, TaskResult
+
+    batch_size = batch_size or settings.TASK_RESULT_CLEANUP_BATCH_SIZE
+    cutoff = timezone.now() - settings.TASK_RESULT_RETENTION
+    return sum(
+        delete_in_batches(model.objects.filter(date_done__lt=cutoff), batch_size, pause)
+        for model in (TaskResult, GroupResult)
+    )
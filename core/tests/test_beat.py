@@ -0,0 +1,58 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django_celery_beat.models import IntervalSchedule, PeriodicTask, PeriodicTasks
+
+from core.beat import CachedDatabaseScheduler
+from core.celery import app
+
+
+@override_settings(BEAT_SCHEDULE_CHECK_INTERVAL=0)
+class CachedDatabaseSchedulerTests(TestCase):
+    shared_cache = True
+
+    def setUp(self):
+        cache.clear()
+        patcher = mock.patch("core.beat.uses_shared_cache", return_value=self.shared_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        interval = IntervalSchedule.objects.create(every=10, period=IntervalSchedule.SECONDS)
+        for name in ("first", "second"):
+            PeriodicTask.objects.create(name=name, task="core.tasks.cleanup_task_results", interval=interval)
+        # Older than the clock skew allowance, so only the version tells the scheduler about changes.
+        PeriodicTask.objects.update(date_changed=timezone.now() - timedelta(hours=1))
+        self.scheduler = CachedDatabaseScheduler(app=app, lazy=True)
+
+    def names(self):
+        return set(self.scheduler.schedule) - {"celery.backend_cleanup"}
+
+    def test_saved_tasks_are_reread(self):
+        self.assertEqual(self.names(), {"first", "second"})
+        task = PeriodicTask.objects.get(name="first")
+        task.interval = IntervalSchedule.objects.create(every=1, period=IntervalSchedule.MINUTES)
+        task.save()
+        self.assertEqual(self.scheduler.schedule["first"].schedule.run_every, timedelta(minutes=1))
+        PeriodicTask.objects.get(name="second").delete()
+        self.assertEqual(self.names(), {"first"})
+
+    def test_unchanged_schedules_are_not_reread(self):
+        self.names()
+        with self.assertNumQueries(1):
+            self.names()
+
+    def test_tasks_toggled_by_queryset_update(self):
+        self.assertEqual(self.names(), {"first", "second"})
+        # As the enable/disable actions of django-celery-beat's admin do it.
+        PeriodicTask.objects.filter(name="first").update(enabled=False)
+        PeriodicTasks.update_changed()
+        self.assertEqual(self.names(), {"second"})
+        PeriodicTask.objects.filter(name="first").update(enabled=True)
+        PeriodicTasks.update_changed()
+        self.assertEqual(self.names(), {"first", "second"})
+
+
+class DatabaseVersionSchedulerTests(CachedDatabaseSchedulerTests):
+    shared_cache = False
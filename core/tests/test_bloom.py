@@ -0,0 +1,34 @@
+from django.test import SimpleTestCase
+
+from core.bloom import BloomFilter
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_added_keys_are_always_found(self):
+        bloom = BloomFilter(1000, 0.01)
+        keys = [f"jti-{n}" for n in range(1000)]
+        for key in keys:
+            bloom.add(key)
+        self.assertTrue(all(key in bloom for key in keys))
+        self.assertEqual(len(bloom), 1000)
+
+    def test_false_positive_rate(self):
+        bloom = BloomFilter(1000, 0.01)
+        for n in range(1000):
+            bloom.add(f"jti-{n}")
+        false_positives = sum(f"other-{n}" in bloom for n in range(20000))
+        # 1% expected; the bound leaves room for an unlucky hash seed.
+        self.assertLess(false_positives / 20000, 0.03)
+
+    def test_empty_filter_finds_nothing(self):
+        bloom = BloomFilter(0)
+        self.assertEqual(bloom.capacity, 1)
+        self.assertNotIn("jti", bloom)
+        self.assertEqual(len(bloom), 0)
+
+    def test_size(self):
+        bloom = BloomFilter(100000, 0.001)
+        # About 1.8 bytes and 10 hashes per key for a 0.1% error rate.
+        self.assertEqual(bloom.hash_count, 10)
+        self.assertEqual(len(bloom.bits), (bloom.size + 7) // 8)
+        self.assertAlmostEqual(bloom.size / 100000, 14.38, places=1)
@@ -0,0 +1,145 @@
+import threading
+import time
+import uuid
+
+import fakeredis
+from django.test import SimpleTestCase
+
+from core.cache import TwoTierRedisCache
+
+
+def wait_for(condition, timeout=2):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            return False
+        time.sleep(0.01)
+    return True
+
+
+class TwoTierRedisCacheTests(SimpleTestCase):
+    def setUp(self):
+        # fakeredis keeps one server per host, so every test gets an empty Redis and its own local tier.
+        self.location = f"redis://cache-{uuid.uuid4().hex}:6379/0"
+
+    def make_cache(self, **options):
+        # A new backend, as Django builds for every thread and ASGI request task.
+        return TwoTierRedisCache(
+            self.location,
+            {"OPTIONS": {"connection_class": fakeredis.FakeConnection, "LOCAL_TIMEOUT": 60, **options}},
+        )
+
+    def redis(self, cache):
+        return cache._cache.get_client(write=True)
+
+    def test_backends_share_the_local_tier_and_listener(self):
+        def listeners():
+            return sum(thread.name == "cache-invalidation" for thread in threading.enumerate())
+
+        before = listeners()
+        backends = [self.make_cache() for _ in range(20)]
+        backends[0].set("key", "value")
+        for cache in backends:
+            self.assertEqual(cache.get("key"), "value")
+        self.assertEqual(len({id(cache.tier) for cache in backends}), 1)
+        self.assertEqual(listeners(), before + 1)
+
+    def test_reads_are_served_by_the_local_tier(self):
+        writer, reader = self.make_cache(), self.make_cache()
+        writer.set("key", "value")
+        # Gone from Redis behind the cache's back, but still in this process's tier.
+        self.redis(writer).delete(writer.make_key("key"))
+        self.assertEqual(reader.get("key"), "value")
+
+    def test_values_are_copies(self):
+        cache = self.make_cache()
+        cache.set("key", ["value"])
+        cache.get("key").append("mutated")
+        self.assertEqual(cache.get("key"), ["value"])
+
+    def test_writes_of_other_processes_invalidate_the_local_tier(self):
+        cache = self.make_cache()
+        cache.set("key", "old")
+        key = cache.make_key("key")
+        self.assertIsNotNone(cache.local.get(key))
+
+        # Another process: a different sender on the same channel.
+        client = self.redis(cache)
+        client.set(key, cache._cache._serializer.dumps("new"))
+        client.publish(cache.channel, f"{uuid.uuid4().hex}:{key}")
+        self.assertTrue(wait_for(lambda: cache.local.get(key) is None))
+        self.assertEqual(cache.get("key"), "new")
+
+    def test_clear_of_other_processes_empties_the_local_tier(self):
+        cache = self.make_cache()
+        cache.set_many({"a": 1, "b": 2})
+        self.redis(cache).publish(cache.channel, f"{uuid.uuid4().hex}:*")
+        self.assertTrue(wait_for(lambda: len(cache.local) == 0))
+
+    def test_own_writes_update_the_local_tier(self):
+        cache = self.make_cache()
+        cache.set("key", "old")
+        cache.set("key", "new")
+        self.assertEqual(self.make_cache().get("key"), "new")
+        cache.delete("key")
+        self.assertIsNone(cache.get("key"))
+
+    def test_get_or_set_computes_once_across_threads(self):
+        calls = []
+        results = []
+
+        def compute():
+            calls.append(1)
+            time.sleep(0.2)
+            return "value"
+
+        def worker():
+            results.append(self.make_cache().get_or_set("key", compute))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, ["value"] * 8)
+
+    def test_get_or_set_waits_for_the_lock_holder(self):
+        cache = self.make_cache(LOCK_TIMEOUT=5)
+        # Another process computing the value.
+        self.assertIsNotNone(cache._acquire("key", None))
+        threading.Timer(0.2, lambda: self.make_cache().set("key", "theirs")).start()
+        self.assertEqual(cache.get_or_set("key", lambda: "ours"), "theirs")
+
+    def test_lock_timeout_does_not_release_the_holders_lock(self):
+        cache = self.make_cache(LOCK_TIMEOUT=0.2)
+        lock_key = cache.make_and_validate_key("key:lock")
+        # A slow holder whose lock outlives our wait.
+        self.redis(cache).set(lock_key, "holder", px=10000)
+        self.assertEqual(cache.get_or_set("key", lambda: "value"), "value")
+        self.assertEqual(self.redis(cache).get(lock_key), b"holder")
+
+    def test_release_only_deletes_its_own_lock(self):
+        cache = self.make_cache(LOCK_TIMEOUT=10)
+        lock_key = cache.make_and_validate_key("key:lock")
+        expired = cache._acquire("key", None)
+        # The lock expired and someone else took it.
+        self.redis(cache).delete(lock_key)
+        current = cache._acquire("key", None)
+        cache._release("key", None, expired)
+        self.assertEqual(self.redis(cache).get(lock_key), current.encode())
+        cache._release("key", None, current)
+        self.assertIsNone(self.redis(cache).get(lock_key))
+
+    def test_get_or_compute(self):
+        cache = self.make_cache()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return "value"
+
+        self.assertEqual(cache.get_or_compute("key", compute, timeout=60), "value")
+        self.assertEqual(cache.get_or_compute("key", compute, timeout=60), "value")
+        self.assertEqual(len(calls), 1)
+        self.assertIsNone(self.redis(cache).get(cache.make_key("key:lock")))
@@ -0,0 +1,58 @@
+import gzip
+import unittest
+
+from django.http import HttpResponse, StreamingHttpResponse
+from django.test import RequestFactory, SimpleTestCase
+
+from core.middlewares import CompressionMiddleware, brotli
+
+
+class CompressionMiddlewareTests(SimpleTestCase):
+    def compress(self, content_type, accept_encoding="br, gzip", **headers):
+        body = b"<p>" + b"compressible " * 200 + b"</p>"
+        middleware = CompressionMiddleware(
+            lambda request: HttpResponse(body, content_type=content_type, headers=headers)
+        )
+        response = middleware(RequestFactory().get("/", HTTP_ACCEPT_ENCODING=accept_encoding))
+        return body, response
+
+    @unittest.skipIf(brotli is None, "brotli is not installed")
+    def test_brotli_is_preferred(self):
+        body, response = self.compress("application/json")
+        self.assertEqual(response["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(response.content), body)
+
+    def test_html_is_only_gzipped(self):
+        body, response = self.compress("text/html; charset=utf-8")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(response.content), body)
+        self.assertEqual(response["Vary"], "Accept-Encoding")
+
+    def test_html_is_not_compressed_without_gzip(self):
+        body, response = self.compress("text/html; charset=utf-8", accept_encoding="br")
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(response.content, body)
+
+    def test_uncompressible_responses_are_untouched(self):
+        for headers in ({"Cache-Control": "no-transform"}, {"Content-Encoding": "identity"}):
+            body, response = self.compress("application/json", **headers)
+            self.assertEqual(response.content, body)
+        _, response = self.compress("application/json", accept_encoding="identity")
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+        def stream(request):
+            return StreamingHttpResponse(iter([b"x" * 2000]), content_type="application/json")
+
+        response = CompressionMiddleware(stream)(RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip"))
+        self.assertFalse(response.has_header("Content-Encoding"))
+        self.assertEqual(b"".join(response.streaming_content), b"x" * 2000)
+
+    def test_small_bodies_are_untouched(self):
+        middleware = CompressionMiddleware(lambda request: HttpResponse(b"{}", content_type="application/json"))
+        response = middleware(RequestFactory().get("/", HTTP_ACCEPT_ENCODING="gzip"))
+        self.assertEqual(response.content, b"{}")
+
+    def test_gzip_lengths_vary(self):
+        # Django's random gzip header bytes keep the length from leaking how well a secret compressed.
+        lengths = {len(self.compress("text/html", accept_encoding="gzip")[1].content) for _ in range(20)}
+        self.assertGreater(len(lengths), 1)
@@ -0,0 +1,132 @@
+from django.contrib.auth.models import Group
+from django.db import DEFAULT_DB_ALIAS, connections, router, transaction
+from django.http import HttpResponse
+from django.test import RequestFactory, TransactionTestCase, override_settings
+
+from core.db_routers import RoutingState, current_routing_state, use_primary
+from core.middlewares import ReplicaPinningMiddleware
+from users.models import User
+
+REPLICA = "replica_test"
+
+# A second SQLite database standing in for a replica. It does not replicate anything, so a
+# row written to it directly is only found by reads the router sends there.
+connections.settings.setdefault(
+    REPLICA,
+    {
+        **connections.settings[DEFAULT_DB_ALIAS],
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": ":memory:",
+        "TEST": {**connections.settings[DEFAULT_DB_ALIAS]["TEST"], "NAME": None, "MIRROR": None},
+    },
+)
+
+
+def clear_replica():
+    # The test runner's flush skips the replica, where allow_migrate() forbids every model.
+    for model in (User, Group):
+        model.objects.using(REPLICA).all().delete()
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], DATABASE_REPLICA_APPS=["users"], DATABASE_REPLICA_PIN_SECONDS=5)
+class PrimaryReplicaRouterTests(TransactionTestCase):
+    # Not TestCase: its transaction would keep every read on the primary.
+    databases = {DEFAULT_DB_ALIAS, REPLICA}
+
+    def setUp(self):
+        # The same user on both databases, told apart by email.
+        User.objects.using(DEFAULT_DB_ALIAS).create(pk=1, email="primary@example.com")
+        User.objects.using(REPLICA).create(pk=1, email="replica@example.com")
+
+    def tearDown(self):
+        clear_replica()
+
+    def read_email(self):
+        return User.objects.get(pk=1).email
+
+    def test_reads_go_to_the_replica(self):
+        self.assertEqual(self.read_email(), "replica@example.com")
+
+    def test_writes_go_to_the_primary(self):
+        User.objects.create(email="new@example.com")
+        self.assertTrue(User.objects.using(DEFAULT_DB_ALIAS).filter(email="new@example.com").exists())
+        self.assertFalse(User.objects.using(REPLICA).filter(email="new@example.com").exists())
+
+    def test_reads_in_a_transaction_stay_on_the_primary(self):
+        with transaction.atomic():
+            self.assertEqual(self.read_email(), "primary@example.com")
+
+    def test_use_primary(self):
+        with use_primary():
+            self.assertEqual(self.read_email(), "primary@example.com")
+        self.assertEqual(self.read_email(), "replica@example.com")
+
+    def test_reads_after_a_write_stay_on_the_primary(self):
+        state = RoutingState()
+        token = current_routing_state.set(state)
+        try:
+            self.assertEqual(self.read_email(), "replica@example.com")
+            User.objects.filter(pk=1).update(first_name="Written")
+            self.assertTrue(state.written)
+            self.assertEqual(self.read_email(), "primary@example.com")
+        finally:
+            current_routing_state.reset(token)
+
+    def test_instances_are_refreshed_from_their_database(self):
+        user = User.objects.get(pk=1)
+        User.objects.using(REPLICA).filter(pk=1).update(first_name="Replica")
+        user.refresh_from_db()
+        self.assertEqual(user.first_name, "Replica")
+
+    def test_apps_without_replica_reads(self):
+        Group.objects.using(DEFAULT_DB_ALIAS).create(name="primary")
+        Group.objects.using(REPLICA).create(name="replica")
+        self.assertEqual(Group.objects.get().name, "primary")
+
+    def test_without_replicas(self):
+        with self.settings(DATABASE_REPLICAS=[]):
+            self.assertEqual(self.read_email(), "primary@example.com")
+
+    def test_replicas_are_not_migrated(self):
+        self.assertIs(router.allow_migrate(REPLICA, "users"), False)
+        self.assertIs(router.allow_migrate(DEFAULT_DB_ALIAS, "users"), True)
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], DATABASE_REPLICA_APPS=["users"], DATABASE_REPLICA_PIN_SECONDS=5)
+class ReplicaPinningMiddlewareTests(TransactionTestCase):
+    databases = {DEFAULT_DB_ALIAS, REPLICA}
+
+    def setUp(self):
+        User.objects.using(DEFAULT_DB_ALIAS).create(pk=1, email="primary@example.com")
+        User.objects.using(REPLICA).create(pk=1, email="replica@example.com")
+        self.factory = RequestFactory()
+
+        def view(request):
+            if request.method == "POST" and "write" in request.POST:
+                User.objects.filter(pk=1).update(first_name="Written")
+            return HttpResponse(User.objects.get(pk=1).email)
+
+        self.middleware = ReplicaPinningMiddleware(view)
+
+    def tearDown(self):
+        clear_replica()
+
+    def test_safe_requests_read_from_the_replica(self):
+        response = self.middleware(self.factory.get("/"))
+        self.assertEqual(response.content, b"replica@example.com")
+        self.assertNotIn(ReplicaPinningMiddleware.cookie_name, response.cookies)
+
+    def test_unsafe_requests_read_from_the_primary(self):
+        response = self.middleware(self.factory.post("/"))
+        self.assertEqual(response.content, b"primary@example.com")
+        # Nothing was written, so the client is not pinned.
+        self.assertNotIn(ReplicaPinningMiddleware.cookie_name, response.cookies)
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        response = self.middleware(self.factory.post("/", {"write": "1"}))
+        cookie = response.cookies[ReplicaPinningMiddleware.cookie_name]
+        self.assertEqual(cookie["max-age"], 5)
+
+        request = self.factory.get("/")
+        request.COOKIES[cookie.key] = cookie.value
+        self.assertEqual(self.middleware(request).content, b"primary@example.com")
@@ -0,0 +1,81 @@
+import io
+import shutil
+import tempfile
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.test import SimpleTestCase, override_settings
+from PIL import Image
+
+from core.images import generate_variants, variant_name, variant_urls
+
+VARIANTS = {"small": 16, "large": 64}
+
+
+def image_bytes(image, image_format, **params):
+    buffer = io.BytesIO()
+    image.save(buffer, image_format, **params)
+    return buffer.getvalue()
+
+
+class GenerateVariantsTests(SimpleTestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def store(self, data, name="images/original"):
+        return default_storage.save(name, ContentFile(data))
+
+    def open_variant(self, variant, digest="digest"):
+        with default_storage.open(variant_name("images", digest, variant)) as file:
+            image = Image.open(file)
+            image.load()
+        return image
+
+    def test_square_variants(self):
+        name = self.store(image_bytes(Image.new("RGB", (300, 200), "red"), "JPEG"))
+        self.assertEqual(generate_variants(name, "images", "digest", VARIANTS), 2)
+        for variant, size in VARIANTS.items():
+            image = self.open_variant(variant)
+            self.assertEqual(image.format, "WEBP")
+            self.assertEqual(image.size, (size, size))
+        self.assertTrue(variant_name("images", "digest", "small").endswith("/digest/small.webp"))
+
+    def test_existing_variants_are_skipped(self):
+        name = self.store(image_bytes(Image.new("RGB", (100, 100), "red"), "PNG"))
+        generate_variants(name, "images", "digest", {"small": 16})
+        self.assertEqual(generate_variants(name, "images", "digest", VARIANTS), 1)
+        self.assertEqual(generate_variants(name, "images", "digest", VARIANTS), 0)
+
+    def test_exif_orientation_is_applied(self):
+        # Red on the left, blue on the right; orientation 6 displays it rotated clockwise,
+        # with the red half on top.
+        image = Image.new("RGB", (200, 100), "blue")
+        image.paste("red", (0, 0, 100, 100))
+        exif = Image.Exif()
+        exif[0x0112] = 6
+        name = self.store(image_bytes(image, "JPEG", exif=exif))
+        generate_variants(name, "images", "digest", {"large": 64})
+        variant = self.open_variant("large").convert("RGB")
+        red, _, blue = variant.getpixel((32, 2))
+        self.assertGreater(red, blue)
+        red, _, blue = variant.getpixel((32, 61))
+        self.assertGreater(blue, red)
+
+    def test_transparency_is_kept(self):
+        image = Image.new("P", (32, 32), 0)
+        image.putpalette([255, 0, 0, 0, 0, 255])
+        name = self.store(image_bytes(image, "GIF", transparency=0))
+        generate_variants(name, "images", "digest", {"small": 16})
+        self.assertEqual(self.open_variant("small").mode, "RGBA")
+        self.assertEqual(self.open_variant("small").getpixel((8, 8))[3], 0)
+
+    def test_variant_urls(self):
+        self.assertIsNone(variant_urls("", "images", "", VARIANTS))
+        self.assertEqual(set(variant_urls("images/a.png", "images", "", VARIANTS)), {"original"})
+        urls = variant_urls("images/a.png", "images", "digest", VARIANTS)
+        self.assertEqual(set(urls), {"original", "small", "large"})
+        self.assertTrue(urls["small"].endswith("/images/di/digest/small.webp"))
@@ -0,0 +1,72 @@
+import logging
+
+from django.test import SimpleTestCase, override_settings
+
+from core.log_handlers import RateLimitFilter, _get_handler_by_name
+
+
+class ListHandler(logging.Handler):
+    def __init__(self, filters=()):
+        super().__init__()
+        self.records = []
+        for log_filter in filters:
+            self.addFilter(log_filter)
+
+    def emit(self, record):
+        self.records.append(record)
+
+
+class RateLimitFilterTests(SimpleTestCase):
+    def setUp(self):
+        self.logger = logging.getLogger("core.tests.rate_limit")
+        self.logger.propagate = False
+        self.logger.setLevel(logging.INFO)
+        self.handler = ListHandler([RateLimitFilter(rate=3, per=60)])
+        self.logger.addHandler(self.handler)
+
+    def tearDown(self):
+        self.logger.removeHandler(self.handler)
+
+    def messages(self):
+        return [record.getMessage() for record in self.handler.records]
+
+    def test_warnings_are_limited_per_call_site(self):
+        for n in range(10):
+            self.logger.warning("Failed %s", n)
+        self.assertEqual(self.messages(), ["Failed 0", "Failed 1", "Failed 2"])
+
+    def test_info_records_are_not_limited(self):
+        for n in range(10):
+            self.logger.info("Request %s", n)
+        self.assertEqual(len(self.handler.records), 10)
+
+    def test_suppressed_records_are_counted(self):
+        log_filter = self.handler.filters[0]
+
+        def log(n):
+            self.logger.error("Failed %s", n)
+
+        for n in range(5):
+            log(n)
+        # Start a new window.
+        for key, (started, count, suppressed) in log_filter._windows.items():
+            log_filter._windows[key] = (started - 60, count, suppressed)
+        log(5)
+        self.assertEqual(self.messages()[-1], "Failed 5 [2 similar messages suppressed]")
+
+
+@override_settings(REQUEST_LOGGER={"SAMPLE_RATE": 1.0, "ALLOW_PATHS": [], "DENY_PATHS": []})
+class RequestLogTests(SimpleTestCase):
+    def test_every_request_is_logged(self):
+        # The filters of the configured handler, in front of a handler which keeps the records.
+        handler = ListHandler(_get_handler_by_name("queue").filters)
+        logger = logging.getLogger("info_logger")
+        logger.addHandler(handler)
+        try:
+            for _ in range(50):
+                self.client.get("/no-such-page/")
+        finally:
+            logger.removeHandler(handler)
+        messages = [record.getMessage() for record in handler.records]
+        self.assertEqual(sum(message.startswith("Incoming Request:") for message in messages), 50)
+        self.assertEqual(sum(message.startswith("Outgoing Response:") for message in messages), 50)
@@ -0,0 +1,148 @@
+import base64
+import smtplib
+from unittest import mock
+
+from django.core.mail import EmailMessage, get_connection
+from django.core.mail.backends.smtp import EmailBackend
+from django.test import TestCase, override_settings
+
+from core.mail import close_smtp_connection, serialize_message
+from core.models import FailedEmail
+from core.tasks import send_emails
+
+
+class FakeSMTP:
+    """
+    Stands in for ``smtplib.SMTP``. Each ``sendmail`` takes the next of ``replies``: ``None``
+    accepts the message, a dict refuses those recipients and an exception is raised.
+    """
+
+    replies = []
+    sent = []
+    connections = 0
+
+    def __init__(self):
+        FakeSMTP.connections += 1
+
+    def noop(self):
+        return 250, b"OK"
+
+    def sendmail(self, from_addr, to_addrs, msg):
+        reply = FakeSMTP.replies.pop(0) if FakeSMTP.replies else None
+        if isinstance(reply, Exception):
+            raise reply
+        refused = reply or {}
+        FakeSMTP.sent.append((from_addr, [address for address in to_addrs if address not in refused], msg))
+        return refused
+
+    def quit(self):
+        pass
+
+    def close(self):
+        pass
+
+
+class FakeSMTPBackend(EmailBackend):
+    def open(self):
+        if self.connection:
+            return False
+        self.connection = FakeSMTP()
+        return True
+
+
+def make_message(subject="Hello", to=("a@example.com",)):
+    return serialize_message(EmailMessage(subject, "Body", "from@example.com", list(to)))
+
+
+@override_settings(
+    EMAIL_DELIVERY={
+        "BACKEND": "core.tests.test_mail.FakeSMTPBackend",
+        "BATCH_SIZE": 2,
+        "MAX_RETRIES": 2,
+        "RETRY_BACKOFF": 0,
+        "CONNECTION_MAX_AGE": 60,
+    }
+)
+class SendEmailsTests(TestCase):
+    def setUp(self):
+        FakeSMTP.replies = []
+        FakeSMTP.sent = []
+        FakeSMTP.connections = 0
+        close_smtp_connection()
+
+    def tearDown(self):
+        close_smtp_connection()
+
+    def send(self, *messages):
+        # Eager, so retries run right away in this thread.
+        return send_emails.apply(args=(list(messages),))
+
+    def test_backend_queues_batches(self):
+        with mock.patch.object(send_emails, "delay") as delay:
+            connection = get_connection("core.mail.CeleryEmailBackend")
+            sent = connection.send_messages(
+                [EmailMessage("Hi", "Body", "from@example.com", [f"{n}@example.com"]) for n in range(3)]
+                + [EmailMessage("Hi", "Body", "from@example.com", [])]
+            )
+        self.assertEqual(sent, 3)
+        self.assertEqual([len(call.args[0]) for call in delay.call_args_list], [2, 1])
+
+    def test_messages_are_delivered_over_one_connection(self):
+        message = make_message()
+        self.send(message, make_message("Again"))
+        self.send(make_message("Later"))
+        self.assertEqual(len(FakeSMTP.sent), 3)
+        self.assertEqual(FakeSMTP.connections, 1)
+        self.assertEqual(FakeSMTP.sent[0][2], base64.b64decode(message["message"]))
+        self.assertFalse(FailedEmail.objects.exists())
+
+    def test_transient_failures_are_retried(self):
+        FakeSMTP.replies = [smtplib.SMTPResponseException(451, b"Try again later")]
+        self.send(make_message())
+        self.assertEqual(len(FakeSMTP.sent), 1)
+        self.assertFalse(FailedEmail.objects.exists())
+
+    def test_only_failed_messages_are_retried(self):
+        FakeSMTP.replies = [None, smtplib.SMTPResponseException(421, b"Busy")]
+        self.send(make_message("First"), make_message("Second"))
+        subjects = [msg for _, _, msg in FakeSMTP.sent]
+        self.assertEqual(len(subjects), 2)
+        self.assertIn(b"Subject: First", subjects[0])
+        self.assertIn(b"Subject: Second", subjects[1])
+
+    def test_permanent_failures_are_dead_lettered(self):
+        FakeSMTP.replies = [smtplib.SMTPResponseException(554, b"Rejected")]
+        message = make_message()
+        self.send(message)
+        self.assertEqual(FakeSMTP.sent, [])
+        failed = FailedEmail.objects.get()
+        self.assertEqual(failed.attempts, 1)
+        self.assertEqual(failed.recipients, ["a@example.com"])
+        self.assertIn("554", failed.error)
+        self.assertEqual(failed.to_message(), message)
+
+    def test_messages_out_of_retries_are_dead_lettered(self):
+        FakeSMTP.replies = [smtplib.SMTPResponseException(451, b"Try again later")] * 3
+        self.send(make_message())
+        self.assertEqual(FakeSMTP.sent, [])
+        self.assertEqual(FakeSMTP.replies, [])
+        self.assertEqual(FailedEmail.objects.get().attempts, 3)
+
+    def test_refused_recipients_are_dead_lettered(self):
+        FakeSMTP.replies = [{"b@example.com": (550, b"No such user")}]
+        self.send(make_message(to=["a@example.com", "b@example.com"]))
+        self.assertEqual(FakeSMTP.sent[0][1], ["a@example.com"])
+        self.assertEqual(FailedEmail.objects.get().recipients, ["b@example.com"])
+
+    def test_dropped_connections_are_reopened(self):
+        FakeSMTP.replies = [smtplib.SMTPServerDisconnected()]
+        self.send(make_message())
+        self.assertEqual(len(FakeSMTP.sent), 1)
+        self.assertEqual(FakeSMTP.connections, 2)
+
+    def test_unreachable_servers_retry_the_whole_batch(self):
+        FakeSMTP.replies = [ConnectionRefusedError()]
+        self.send(make_message("First"), make_message("Second"))
+        self.assertEqual(len(FakeSMTP.sent), 2)
+        self.assertEqual(FakeSMTP.connections, 2)
+        self.assertFalse(FailedEmail.objects.exists())
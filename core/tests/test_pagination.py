@@ -0,0 +1,93 @@
+from datetime import timedelta
+
+from django.test import TestCase
+from django.utils import timezone
+from rest_framework.request import Request
+from rest_framework.test import APIClient, APIRequestFactory
+
+from core.pagination import KeysetPagination
+from users.models import User
+
+
+class KeysetPaginationTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        now = timezone.now()
+        # Three users per date_joined, so pages end between rows which tie on it.
+        cls.users = [
+            User.objects.create(email=f"user{n:02}@example.com", date_joined=now - timedelta(days=n // 3))
+            for n in range(20)
+        ]
+        cls.staff = User.objects.create(email="staff@example.com", is_active=True, is_staff=True, date_joined=now)
+
+    def setUp(self):
+        self.client = APIClient()
+        self.client.force_authenticate(self.staff)
+
+    def get(self, url, **params):
+        response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200, response.content)
+        return response.json()
+
+    def emails(self, page):
+        return [user["email"] for user in page["results"]]
+
+    def expected(self, *ordering):
+        return list(User.objects.order_by(*ordering).values_list("email", flat=True))
+
+    def walk(self, **params):
+        pages = [self.get("/auth/users/", **params)]
+        while pages[-1]["next"]:
+            pages.append(self.get(pages[-1]["next"]))
+        return pages
+
+    def test_pages_cover_every_row_once(self):
+        pages = self.walk(limit=4)
+        self.assertEqual(len(pages), 6)
+        self.assertEqual(sum((self.emails(page) for page in pages), []), self.expected("-date_joined", "-id"))
+        self.assertIsNone(pages[0]["previous"])
+
+    def test_previous_links_return_the_same_pages(self):
+        pages = self.walk(limit=4)
+        page = pages[-1]
+        for expected in reversed(pages[:-1]):
+            page = self.get(page["previous"])
+            self.assertEqual(self.emails(page), self.emails(expected))
+        self.assertIsNone(page["previous"])
+
+    def test_pages_stay_stable_when_users_are_saved(self):
+        first = self.get("/auth/users/", limit=4)
+        for user in User.objects.all():
+            user.save()
+        self.assertEqual(self.emails(self.get(first["next"])), self.expected("-date_joined", "-id")[4:8])
+
+    def test_requested_ordering(self):
+        pages = self.walk(limit=5, ordering="email")
+        self.assertEqual(sum((self.emails(page) for page in pages), []), self.expected("email"))
+
+    def test_nullable_orderings_fall_back_to_the_default(self):
+        pages = self.walk(limit=5, ordering="last_login")
+        self.assertEqual(sum((self.emails(page) for page in pages), []), self.expected("-date_joined", "-id"))
+
+    def test_page_size(self):
+        self.assertEqual(len(self.get("/auth/users/")["results"]), 10)
+        self.assertEqual(len(self.get("/auth/users/", limit=1000)["results"]), 21)
+        pagination = KeysetPagination()
+        pagination.max_page_size = 3
+        request = Request(APIRequestFactory().get("/", {"limit": 1000}))
+        self.assertEqual(len(pagination.paginate_queryset(User.objects.all(), request)), 3)
+
+    def test_invalid_cursors_are_not_found(self):
+        for cursor in ("garbage", "eyJ2IjpbMV0sInIiOjB9"):
+            response = self.client.get("/auth/users/", {"cursor": cursor})
+            self.assertEqual(response.status_code, 404)
+
+    def test_count(self):
+        request = Request(APIRequestFactory().get("/"))
+        pagination = KeysetPagination()
+        pagination.paginate_queryset(User.objects.all(), request)
+        # No cheap estimate on SQLite.
+        self.assertIsNone(pagination.count)
+        pagination.count_mode = "exact"
+        pagination.paginate_queryset(User.objects.all(), request)
+        self.assertEqual(pagination.count, 21)
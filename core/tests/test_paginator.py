@@ -0,0 +1,36 @@
+from unittest import mock
+
+from django.test import TestCase
+
+from core.paginator import EstimatedCountPaginator, estimate_count
+from users.models import User
+
+
+class EstimatedCountPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.bulk_create(User(email=f"user{n}@example.com") for n in range(5))
+
+    def test_no_estimate_outside_postgresql(self):
+        self.assertIsNone(estimate_count(User.objects.all()))
+        self.assertIsNone(estimate_count(User.objects.filter(is_staff=False)))
+
+    def test_small_estimates_are_counted(self):
+        paginator = EstimatedCountPaginator(User.objects.order_by("pk"), 2)
+        with mock.patch("core.paginator.estimate_count", return_value=10) as estimate:
+            self.assertEqual(paginator.count, 5)
+        estimate.assert_called_once()
+        self.assertEqual(paginator.num_pages, 3)
+
+    def test_large_estimates_are_used(self):
+        paginator = EstimatedCountPaginator(User.objects.order_by("pk"), 2)
+        with mock.patch("core.paginator.estimate_count", return_value=50000), self.assertNumQueries(0):
+            self.assertEqual(paginator.count, 50000)
+        self.assertEqual(paginator.num_pages, 25000)
+        self.assertEqual(len(paginator.page(1).object_list), 2)
+
+    def test_lists_are_counted(self):
+        paginator = EstimatedCountPaginator(list(range(7)), 2)
+        with mock.patch("core.paginator.estimate_count") as estimate:
+            self.assertEqual(paginator.count, 7)
+        estimate.assert_not_called()
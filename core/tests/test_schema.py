@@ -0,0 +1,62 @@
+import gzip
+import tempfile
+
+import brotli
+from django.test import RequestFactory, SimpleTestCase, override_settings
+
+from core import schema
+from core.schema import PrecomputedSpectacularAPIView
+
+
+class PrecomputedSchemaTests(SimpleTestCase):
+    def setUp(self):
+        directory = tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        settings_override = override_settings(SCHEMA_CACHE_DIR=directory.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        schema._artifacts.clear()
+        self.addCleanup(schema._artifacts.clear)
+
+    def get(self, accept_encoding="", **params):
+        headers = {"HTTP_ACCEPT": "application/vnd.oai.openapi+json", "HTTP_ACCEPT_ENCODING": accept_encoding}
+        if "if_none_match" in params:
+            headers["HTTP_IF_NONE_MATCH"] = params.pop("if_none_match")
+        request = RequestFactory().get("/api/schema/", params, **headers)
+        return PrecomputedSpectacularAPIView.as_view()(request)
+
+    def test_encodings(self):
+        plain = self.get()
+        self.assertFalse(plain.has_header("Content-Encoding"))
+        br = self.get("gzip, br")
+        self.assertEqual(br["Content-Encoding"], "br")
+        self.assertEqual(brotli.decompress(br.content), plain.content)
+        gzipped = self.get("br;q=0.5, gzip")
+        self.assertEqual(gzipped["Content-Encoding"], "gzip")
+        self.assertEqual(gzip.decompress(gzipped.content), plain.content)
+        self.assertFalse(self.get("br;q=0, gzip;q=0").has_header("Content-Encoding"))
+        for response in (plain, br, gzipped):
+            self.assertIn("Accept-Encoding", response["Vary"])
+
+    def test_each_encoding_has_its_own_etag(self):
+        plain, br, gzipped = self.get(), self.get("br"), self.get("gzip")
+        self.assertEqual(len({plain["ETag"], br["ETag"], gzipped["ETag"]}), 3)
+        self.assertEqual(br["ETag"], plain["ETag"][:-1] + '-br"')
+
+        not_modified = self.get("br", if_none_match=br["ETag"])
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified["ETag"], br["ETag"])
+        self.assertIn("Accept-Encoding", not_modified["Vary"])
+        # A cached brotli body does not validate the gzip one.
+        self.assertEqual(self.get("gzip", if_none_match=br["ETag"]).status_code, 200)
+
+    def test_unknown_languages_and_versions_share_one_artifact(self):
+        body = self.get().content
+        for params in ({"lang": "xx"}, {"lang": "xx-yy"}, {"version": "v1"}, {"version": "x" * 100}):
+            self.assertEqual(self.get(**params).content, body)
+        self.assertEqual(len(schema._artifacts), 1)
+
+    def test_languages_are_normalized(self):
+        self.get(lang="de-at")
+        self.get(lang="de")
+        self.assertEqual([key[1] for key in schema._artifacts], ["de"])
@@ -0,0 +1,125 @@
+import gc
+import io
+import json
+import os
+import subprocess
+import sys
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import SimpleTestCase
+
+from core.management.commands.startup_profile import Command as StartupProfileCommand
+from core.startup import prepare_fork
+
+# Settings are read once per process, so every role is loaded by a fresh interpreter.
+PROBE = """
+import json
+import django
+django.setup()
+from django.apps import apps
+from django.urls import NoReverseMatch, reverse
+
+def has_url(name):
+    try:
+        reverse(name)
+    except NoReverseMatch:
+        return False
+    return True
+
+print(json.dumps({
+    "apps": [config.name for config in apps.get_app_configs()],
+    "admin_site": apps.is_installed("django.contrib.admin") and has_url("admin:index"),
+    "schema": has_url("schema"),
+    "auth": has_url("user-list"),
+}))
+"""
+
+
+def load_role(role):
+    env = dict(os.environ, DJANGO_ROLE=role)
+    process = subprocess.run(
+        [sys.executable, "-c", PROBE], env=env, cwd=settings.BASE_DIR, capture_output=True, text=True
+    )
+    return process.returncode, process.stdout.strip().splitlines()[-1] if process.stdout.strip() else process.stderr
+
+
+class DjangoRoleTests(SimpleTestCase):
+    def load(self, role):
+        returncode, output = load_role(role)
+        self.assertEqual(returncode, 0, output)
+        return json.loads(output)
+
+    def test_web_loads_everything(self):
+        loaded = self.load("web")
+        self.assertTrue(loaded["admin_site"])
+        self.assertTrue(loaded["schema"])
+        self.assertTrue(loaded["auth"])
+
+    def test_api_leaves_out_the_admin_site_and_the_docs(self):
+        loaded = self.load("api")
+        self.assertFalse(loaded["admin_site"])
+        self.assertFalse(loaded["schema"])
+        self.assertTrue(loaded["auth"])
+        # The admin's models stay, for the cascades of deleted users.
+        self.assertIn("django.contrib.admin", loaded["apps"])
+        self.assertNotIn("drf_spectacular", loaded["apps"])
+
+    def test_workers_keep_only_apps_with_models_or_tasks(self):
+        for role in ("celery", "beat"):
+            apps = self.load(role)["apps"]
+            for app in ("rest_framework", "djoser", "django.contrib.staticfiles", "drf_spectacular"):
+                self.assertNotIn(app, apps)
+            for app in ("users", "core", "django_celery_beat", "django_celery_results"):
+                self.assertIn(app, apps)
+
+    def test_unknown_roles_are_rejected(self):
+        returncode, output = load_role("worker")
+        self.assertNotEqual(returncode, 0)
+        self.assertIn("DJANGO_ROLE must be one of", output)
+
+
+class StartupProfileTests(SimpleTestCase):
+    def test_parse_importtime(self):
+        stderr = "\n".join(
+            [
+                "import time: self [us] | cumulative | imported package",
+                "import time:       120 |        120 |     _io",
+                "import time:      2000 |       5000 | django",
+                "import time:        30 |       5030 |   django.conf",
+                "unrelated output",
+            ]
+        )
+        modules = StartupProfileCommand().parse_importtime(stderr)
+        self.assertEqual([module["module"] for module in modules], ["_io", "django", "django.conf"])
+        self.assertEqual(modules[1], {"module": "django", "self_us": 2000, "cumulative_us": 5000, "top_level": True})
+        self.assertFalse(modules[0]["top_level"])
+
+    def test_command_reports_phases(self):
+        stdout = io.StringIO()
+        call_command("startup_profile", "--runs", "1", "--limit", "3", "--role", "api", stdout=stdout)
+        results = json.loads(stdout.getvalue())
+        self.assertEqual(results["role"], "api")
+        self.assertLessEqual(len(results["top_modules_ms"]), 3)
+        self.assertGreater(results["modules_imported"], 0)
+        self.assertEqual(
+            set(results["phases_ms"]),
+            {
+                "interpreter",
+                "django_setup",
+                "wsgi_application",
+                "first_request",
+                "second_request",
+                "time_to_first_request",
+            },
+        )
+
+
+class PrepareForkTests(SimpleTestCase):
+    def test_connections_are_closed_and_the_heap_frozen(self):
+        self.addCleanup(gc.unfreeze)
+        with mock.patch("core.startup.connections") as connections:
+            prepare_fork()
+        connections.close_all.assert_called_once_with()
+        self.assertGreater(gc.get_freeze_count(), 0)
@@ -0,0 +1,53 @@
+from datetime import timedelta
+from unittest import mock
+
+from django.test import TestCase, override_settings
+from django.utils import timezone
+from django_celery_results.models import GroupResult, TaskResult
+
+from core.tasks import cleanup_task_results, delete_in_batches
+
+
+def create_results(model, count, age, prefix):
+    id_field = "task_id" if model is TaskResult else "group_id"
+    model.objects.bulk_create([model(**{id_field: f"{prefix}-{n}"}) for n in range(count)])
+    # date_done is set on every save.
+    model.objects.filter(**{f"{id_field}__startswith": prefix}).update(date_done=timezone.now() - age)
+
+
+@override_settings(CELERY_RESULT_BACKEND="django-db", TASK_RESULT_RETENTION=timedelta(hours=72))
+class CleanupTaskResultsTests(TestCase):
+    def setUp(self):
+        create_results(TaskResult, 7, timedelta(days=4), "old")
+        create_results(TaskResult, 3, timedelta(hours=1), "new")
+        create_results(GroupResult, 2, timedelta(days=4), "old")
+        create_results(GroupResult, 1, timedelta(hours=1), "new")
+        sleep = mock.patch("core.tasks.time.sleep")
+        self.sleep = sleep.start()
+        self.addCleanup(sleep.stop)
+
+    def test_delete_in_batches(self):
+        with self.assertNumQueries(3 * 2):
+            deleted = delete_in_batches(TaskResult.objects.filter(task_id__startswith="old-"), 3, pause=0.5)
+        self.assertEqual(deleted, 7)
+        self.assertEqual(self.sleep.call_args_list, [mock.call(0.5)] * 2)
+        self.assertEqual(TaskResult.objects.count(), 3)
+
+    def test_exact_batches_end_with_an_empty_lookup(self):
+        self.assertEqual(delete_in_batches(TaskResult.objects.filter(task_id__startswith="new-"), 3), 3)
+        self.assertEqual(delete_in_batches(TaskResult.objects.none(), 3), 0)
+
+    def test_expired_results_are_deleted(self):
+        self.assertEqual(cleanup_task_results.apply(kwargs={"batch_size": 2}).get(), 9)
+        self.assertEqual(sorted(TaskResult.objects.values_list("task_id", flat=True)), ["new-0", "new-1", "new-2"])
+        self.assertEqual(list(GroupResult.objects.values_list("group_id", flat=True)), ["new-0"])
+
+    @override_settings(TASK_RESULT_RETENTION=timedelta(minutes=30))
+    def test_retention(self):
+        self.assertEqual(cleanup_task_results(), 13)
+        self.assertFalse(TaskResult.objects.exists())
+
+    @override_settings(CELERY_RESULT_BACKEND="redis://localhost:6379/2")
+    def test_other_backends_expire_their_own_results(self):
+        self.assertEqual(cleanup_task_results(), 0)
+        self.assertEqual(TaskResult.objects.count(), 10)
@@ -0,0 +1,40 @@
+import hashlib
+
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+
+
+class HashingFileUploadHandler(TemporaryFileUploadHandler):
+    """
+    Streams every uploaded file chunk by chunk into a temporary file, whatever its size,
+    so a request never holds a whole upload in memory. The SHA-256 of the content is
+    computed on the way and set as ``content_hash`` on the uploaded file.
+    """
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.hasher = hashlib.sha256()
+
+    def receive_data_chunk(self, raw_data, start):
+        self.hasher.update(raw_data)
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        file = super().file_complete(file_size)
+        file.content_hash = self.hasher.hexdigest()
+        return file
+
+
+def content_hash(file):
+    """
+    SHA-256 hex digest of an uploaded or stored file, reading it in chunks unless
+    ``HashingFileUploadHandler`` already computed it.
+    """
+    digest = getattr(file, "content_hash", None)
+    if digest is None:
+        hasher = hashlib.sha256()
+        file.seek(0)
+        for chunk in file.chunks():
+            hasher.update(chunk)
+        digest = hasher.hexdigest()
+    file.seek(0)
+    return digest
@@ -1,43 +1,65 @@
-from django.contrib import admin
-from django.urls import include, path
+from django.apps import apps
 from django.conf import settings
 from django.conf.urls.static import static
+from django.contrib import admin
+from django.urls import include, path
+from rest_framework.routers import DefaultRouter
 
+from core.views import ProtectedMediaView, metrics_view
+from users.views import AvatarView, TokenRevokeView, UserViewSet
 
-from djoser import urls as djoser_urls
 
-from drf_spectacular.views import (
-    SpectacularAPIView,
-    SpectacularRedocView,
-    SpectacularSwaggerView,
-)
+def documentation_urls():
+    from drf_spectacular.views import (
+        SpectacularRedocView,
+        SpectacularSwaggerView,
+    )
+
+    from core.schema import PrecomputedSpectacularAPIView
+
+    return [
+        path("api/schema/", PrecomputedSpectacularAPIView.as_view(), name="schema"),
+        path(
+            "api/schema/swagger-ui/",
+            SpectacularSwaggerView.as_view(url_name="schema"),
+            name="swagger-ui",
+        ),
+        path(
+            "api/schema/redoc/",
+            SpectacularRedocView.as_view(url_name="schema"),
+            name="redoc",
+        ),
+    ]
 
-documentaiton_apis = [
-    path("api/schema/", SpectacularAPIView.as_view(), name="schema"),
-    path(
-        "api/schema/swagger-ui/",
-        SpectacularSwaggerView.as_view(url_name="schema"),
-        name="swagger-ui",
-    ),
-    path(
-        "api/schema/redoc/",
-        SpectacularRedocView.as_view(url_name="schema"),
-        name="redoc",
-    ),
-]
+
+# djoser.urls.base, with the conditional GET subclass of its UserViewSet.
+users_router = DefaultRouter()
+users_router.register("users", UserViewSet)
 
 auth_urls = [
-    path("", include(djoser_urls)),
+    path("users/me/avatar/", AvatarView.as_view(), name="user-avatar"),
+    path("", include(users_router.urls)),
     path("", include("djoser.urls.jwt")),
+    path("jwt/revoke/", TokenRevokeView.as_view(), name="jwt-revoke"),
     path("", include("djoser.urls.authtoken")),
 ]
 
 api_v1_urls = []
 
 urlpatterns = [
-    path("admin/", admin.site.urls),
-    path("", include(documentaiton_apis)),
     path("auth/", include(auth_urls)),
+    path("metrics/", metrics_view, name="metrics"),
+    path(
+        f"{settings.MEDIA_URL.lstrip('/')}{settings.PROTECTED_MEDIA_PREFIX}<path:path>",
+        ProtectedMediaView.as_view(),
+        name="protected-media",
+    ),
 ]
-urlpatterns += static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
+# Left out for DJANGO_ROLE=api, which does not load them (see settings).
+if settings.DJANGO_ROLE == "web":
+    urlpatterns.append(path("admin/", admin.site.urls))
+if apps.is_installed("drf_spectacular"):
+    urlpatterns.append(path("", include(documentation_urls())))
+# Public media in development only (static() is a no-op without DEBUG); nginx serves it in production.
+# Static files need no route: runserver and WhiteNoise serve them.
 urlpatterns += static(settings.MEDIA_URL, document_root=settings.MEDIA_ROOT)
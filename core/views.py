@@ -0,0 +1,39 @@
+from django.conf import settings
+from django.http import Http404, HttpResponse
+from django.utils.crypto import constant_time_compare
+from django.views.decorators.http import require_GET
+from rest_framework.authentication import SessionAuthentication
+from rest_framework.settings import api_settings
+from rest_framework.views import APIView
+
+from core import metrics
+from core.media import protected_media_response
+
+
+@require_GET
+def metrics_view(request):
+    """
+    Prometheus text exposition of the metrics collected by ``MetricsMiddleware``, for requests
+    bearing ``METRICS_TOKEN``. Without a token it is only served with ``DEBUG``.
+    """
+    token = settings.METRICS_TOKEN
+    if not token:
+        if not settings.DEBUG:
+            raise Http404
+    elif not constant_time_compare(request.headers.get("Authorization", ""), f"Bearer {token}"):
+        return HttpResponse(status=401, headers={"WWW-Authenticate": 'Bearer realm="metrics"'})
+    body, content_type = metrics.render()
+    return HttpResponse(body, content_type=content_type)
+
+
+class ProtectedMediaView(APIView):
+    """
+    Files under ``MEDIA_ROOT/PROTECTED_MEDIA_PREFIX`` for authenticated users. Sessions are
+    accepted too, so the admin and ``<img>`` tags of logged-in pages can load them.
+    """
+
+    authentication_classes = [*api_settings.DEFAULT_AUTHENTICATION_CLASSES, SessionAuthentication]
+    schema = None
+
+    def get(self, request, path):
+        return protected_media_response(path)
@@ -0,0 +1,48 @@
+import os
+import shutil
+
+# Picked up automatically by ``gunicorn core.wsgi:application`` when started from the project root.
+
+bind = os.environ.get("GUNICORN_BIND", "0.0.0.0:8000")
+workers = int(os.environ.get("GUNICORN_WORKERS", 1))
+
+# ASGI mode: GUNICORN_WORKER_CLASS=uvicorn_worker.UvicornWorker gunicorn core.asgi:application
+worker_class = os.environ.get("GUNICORN_WORKER_CLASS", "sync")
+
+# Import and warm up the application once in the master; workers then share its memory
+# copy-on-write and start serving without paying for the imports. Code changes need a full
+# restart (`kill -HUP` reloads the config but not preloaded code), so disable it with --reload.
+preload_app = bool(int(os.environ.get("GUNICORN_PRELOAD", 1)))
+if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+    # A preloaded application creates its metrics before on_starting runs.
+    os.makedirs(os.environ["PROMETHEUS_MULTIPROC_DIR"], exist_ok=True)
+
+
+def on_starting(server):
+    # Samples of previous runs would otherwise be merged into the new ones.
+    multiproc_dir = os.environ.get("PROMETHEUS_MULTIPROC_DIR")
+    if multiproc_dir:
+        shutil.rmtree(multiproc_dir, ignore_errors=True)
+        os.makedirs(multiproc_dir, exist_ok=True)
+
+
+def when_ready(server):
+    if server.cfg.preload_app:
+        from core.startup import prepare_fork, warm_up
+
+        warm_up()
+        prepare_fork()
+
+
+def child_exit(server, worker):
+    if os.environ.get("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        multiprocess.mark_process_dead(worker.pid)
+
+
+def worker_exit(server, worker):
+    # Flush log records still queued for core.log_handlers' listener thread.
+    from core.log_handlers import stop_listeners
+
+    stop_listeners()
@@ -4,3 +4,17 @@ from django.apps import AppConfig
 class UsersConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "users"
+
+    def ready(self):
+        from django.apps import apps
+        from django.contrib.auth.signals import user_logged_in
+
+        from users import signals  # noqa: F401
+        from users.last_login import buffered_update_last_login, get_config
+
+        if apps.is_installed("drf_spectacular"):
+            from users import schema  # noqa: F401
+
+        if get_config()["BACKEND"]:
+            user_logged_in.disconnect(dispatch_uid="update_last_login")
+            user_logged_in.connect(buffered_update_last_login, dispatch_uid="update_last_login")
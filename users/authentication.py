@@ -0,0 +1,48 @@
+from django.utils.translation import gettext_lazy as _
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import AuthenticationFailed, InvalidToken
+from rest_framework_simplejwt.settings import api_settings
+
+from users.cache import get_user_cache, password_digest
+from users.revocation import is_token_revoked
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    Drop-in replacement for simplejwt's ``JWTAuthentication`` which resolves the user
+    through ``users.cache.UserCache`` instead of querying the database on every request,
+    and rejects tokens revoked through ``users.revocation``.
+    """
+
+    def get_user(self, validated_token):
+        self.check_revoked(validated_token)
+        try:
+            user = self.load_user(self.get_user_id(validated_token))
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed(_("User not found"), code="user_not_found") from None
+        return self.check_user(user, validated_token)
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification")) from None
+
+    def check_revoked(self, validated_token):
+        if is_token_revoked(validated_token):
+            raise AuthenticationFailed(_("Token has been revoked"), code="token_revoked")
+
+    def check_user(self, user, validated_token):
+        if not user.is_active:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+
+        digest = validated_token.get(api_settings.REVOKE_TOKEN_CLAIM)
+        if api_settings.CHECK_REVOKE_TOKEN and digest != password_digest(user):
+            raise AuthenticationFailed(_("The user's password has been changed."), code="password_changed")
+
+        return user
+
+    def load_user(self, user_id):
+        if self.user_model._meta.pk.name != api_settings.USER_ID_FIELD:
+            return self.user_model.objects.get(**{api_settings.USER_ID_FIELD: user_id})
+        return get_user_cache().get(user_id)
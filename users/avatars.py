@@ -0,0 +1,39 @@
+from django.db import transaction
+
+from core.images import get_config, store_original, variant_urls, variants_exist
+
+AVATAR_DIRECTORY = "avatars"
+
+
+def get_variants():
+    return get_config()["AVATAR_VARIANTS"]
+
+
+def set_avatar(user, file):
+    """
+    Stores a validated image as the avatar of ``user``. Its thumbnails are rendered by
+    ``users.tasks.process_avatar`` on the media queue, unless the same content was uploaded
+    before, in which case they already exist and nothing is queued. Returns True when the
+    variants are ready.
+    """
+    from users.tasks import process_avatar
+
+    name, digest = store_original(file, AVATAR_DIRECTORY)
+    ready = variants_exist(AVATAR_DIRECTORY, digest, get_variants())
+    user.avatar = name
+    user.avatar_hash = digest if ready else ""
+    user.save(update_fields=["avatar", "avatar_hash"])
+    if not ready:
+        transaction.on_commit(lambda: process_avatar.delay(name, digest))
+    return ready
+
+
+def clear_avatar(user):
+    # Stored files may be shared with other users uploading the same content, so they stay.
+    user.avatar = ""
+    user.avatar_hash = ""
+    user.save(update_fields=["avatar", "avatar_hash"])
+
+
+def avatar_urls(user):
+    return variant_urls(user.avatar.name, AVATAR_DIRECTORY, user.avatar_hash, get_variants())
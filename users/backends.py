@@ -0,0 +1,66 @@
+from django.contrib.auth import get_user_model
+from django.contrib.auth.backends import ModelBackend
+from django.contrib.auth.models import Permission
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models import Q
+
+from core.cache import uses_shared_cache
+from users.cache import (
+    get_permission_ids,
+    get_permission_names,
+    get_permission_version,
+    get_user_cache,
+    set_permission_ids,
+)
+
+
+class CachedModelBackend(ModelBackend):
+    """
+    ``ModelBackend`` which keeps every user's permissions in the shared cache as a
+    frozenset of ``Permission`` ids, so warm ``has_perm`` checks run no queries.
+
+    The sets are stamped with a global permission version. ``users.signals`` drops a
+    user's set when their groups, permissions or superuser flag change, and bumps the
+    version when a group's permissions or the permissions themselves change.
+
+    Without a shared default cache nothing is cached: a per-process copy would keep granting
+    a revoked permission in every worker but the one that revoked it.
+    """
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, "_perm_cache"):
+            if uses_shared_cache():
+                user_obj._perm_cache = self.get_cached_permissions(user_obj)
+            else:
+                permissions = self.get_permissions(user_obj).values_list("content_type__app_label", "codename")
+                user_obj._perm_cache = {f"{app_label}.{codename}" for app_label, codename in permissions}
+        return user_obj._perm_cache
+
+    def get_cached_permissions(self, user_obj):
+        version = get_permission_version()
+        permission_ids = get_permission_ids(user_obj.pk, version)
+        if permission_ids is None:
+            permission_ids = self.load_permission_ids(user_obj)
+            set_permission_ids(user_obj.pk, version, permission_ids)
+        names = get_permission_names(version)
+        return {names[pk] for pk in permission_ids if pk in names}
+
+    def get_permissions(self, user_obj):
+        # Read from the primary, so a lagging replica can never put revoked permissions back into the cache.
+        permissions = Permission.objects.using(DEFAULT_DB_ALIAS)
+        if not user_obj.is_superuser:
+            permissions = permissions.filter(Q(user=user_obj) | Q(group__user=user_obj))
+        return permissions.order_by()
+
+    def load_permission_ids(self, user_obj):
+        return frozenset(self.get_permissions(user_obj).values_list("pk", flat=True))
+
+    def get_user(self, user_id):
+        # Session-authenticated requests (the admin) resolve their user through the same cache as JWT ones.
+        try:
+            user = get_user_cache().get(user_id)
+        except get_user_model().DoesNotExist:
+            return None
+        return user if self.user_can_authenticate(user) else None
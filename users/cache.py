@@ -0,0 +1,198 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.db import DEFAULT_DB_ALIAS
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+from core.cache import uses_shared_cache
+from core.lru import TTLLRUCache
+
+DEFAULT_USER_CACHE = {
+    "MAX_SIZE": 10000,
+    "TTL": 10,
+    "SHARED_CACHE_ALIAS": None,
+    "SHARED_TTL": 300,
+}
+
+_user_cache = None
+
+
+class UserCache:
+    """
+    Resolves users by primary key from a bounded in-process TTL/LRU cache, optionally
+    backed by a shared Django cache (e.g. Redis) before falling back to the database.
+
+    Rows are cached as plain value tuples and a fresh ``User`` instance is built for
+    every hit, so requests never share a mutable model instance. Entries are dropped
+    on ``User`` save/delete (see ``users.signals``); the in-process ``TTL`` bounds how
+    long other workers may keep serving a stale row. Misses are read from the primary
+    database, so a lagging replica can never put a stale row back into the cache.
+
+    The password hash is never cached: rows carry the digest tokens are checked against
+    instead (see ``password_digest``), and ``password`` is loaded on access, e.g. by
+    session authentication.
+    """
+
+    excluded_fields = ("password",)
+
+    def __init__(self, max_size, ttl, shared_cache_alias=None, shared_ttl=300):
+        self.local = TTLLRUCache(max_size=max_size, ttl=ttl)
+        self.shared_cache_alias = shared_cache_alias
+        self.shared_ttl = shared_ttl
+
+    @property
+    def shared(self):
+        return caches[self.shared_cache_alias] if self.shared_cache_alias else None
+
+    @staticmethod
+    def make_key(user_id):
+        # Bumped when the row layout changes, so rows in the old layout simply expire.
+        return f"users:user:2:{user_id}"
+
+    def get(self, user_id):
+        """
+        Returns the user with the given primary key, raising ``User.DoesNotExist``.
+        """
+        user_model = get_user_model()
+        key = self.make_key(user_id)
+
+        row = self.local.get(key)
+        if row is None and self.shared is not None:
+            row = self.shared.get(key)
+            if row is not None:
+                self.local.set(key, row)
+        if row is None:
+            row = self.to_row(user_model._default_manager.using(DEFAULT_DB_ALIAS).get(pk=user_id))
+            self.local.set(key, row)
+            if self.shared is not None:
+                self.shared.set(key, row, self.shared_ttl)
+        return self.from_row(user_model, row)
+
+    def invalidate(self, user_id):
+        key = self.make_key(user_id)
+        self.local.delete(key)
+        if self.shared is not None:
+            self.shared.delete(key)
+
+    @classmethod
+    def to_row(cls, user):
+        fields = [field for field in user._meta.concrete_fields if field.attname not in cls.excluded_fields]
+        return (
+            user._state.db,
+            tuple(field.attname for field in fields),
+            tuple(getattr(user, field.attname) for field in fields),
+            get_md5_hash_password(user.password),
+        )
+
+    @staticmethod
+    def from_row(user_model, row):
+        # Field names are stored with the values so rows cached before a new column
+        # was added simply load it as deferred.
+        db, field_names, values, digest = row
+        user = user_model.from_db(db, field_names, values)
+        user._password_digest = digest
+        return user
+
+
+def password_digest(user):
+    """
+    The digest of the password hash simplejwt puts in ``REVOKE_TOKEN_CLAIM``, taken from
+    the cached row while the password is not loaded, so checking it runs no query.
+    """
+    if "password" in user.get_deferred_fields() and hasattr(user, "_password_digest"):
+        return user._password_digest
+    return get_md5_hash_password(user.password)
+
+
+def get_user_cache():
+    global _user_cache
+    if _user_cache is None:
+        config = {**DEFAULT_USER_CACHE, **getattr(settings, "USER_CACHE", {})}
+        _user_cache = UserCache(
+            max_size=config["MAX_SIZE"],
+            ttl=config["TTL"],
+            shared_cache_alias=config["SHARED_CACHE_ALIAS"],
+            shared_ttl=config["SHARED_TTL"],
+        )
+    return _user_cache
+
+
+def _missing_email_key(email):
+    return "users:missing-email:" + hashlib.sha1(email.lower().encode("utf-8")).hexdigest()
+
+
+def uses_missing_email_cache():
+    # A per-process cache would keep rejecting a new account in every worker but the one it signed up in.
+    return bool(settings.USER_EMAIL_NEGATIVE_CACHE_TTL) and uses_shared_cache()
+
+
+def is_missing_email(email):
+    return uses_missing_email_cache() and cache.get(_missing_email_key(email)) is not None
+
+
+def remember_missing_email(email):
+    if uses_missing_email_cache():
+        cache.set(_missing_email_key(email), 1, settings.USER_EMAIL_NEGATIVE_CACHE_TTL)
+
+
+def forget_missing_email(*emails):
+    cache.delete_many([_missing_email_key(email) for email in emails])
+
+
+_PERMISSION_VERSION_KEY = "users:perms:version"
+_permission_names = (None, {})
+
+
+def get_permission_version():
+    """
+    Stamp shared by every cached permission set; changing it invalidates all of them.
+    """
+    version = cache.get(_PERMISSION_VERSION_KEY)
+    if version is None:
+        cache.add(_PERMISSION_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(_PERMISSION_VERSION_KEY)
+    return version
+
+
+def bump_permission_version():
+    # A fresh timestamp rather than a counter, so an evicted stamp can never come back to an old value.
+    cache.set(_PERMISSION_VERSION_KEY, time.time_ns(), None)
+
+
+def _permission_key(version, user_id):
+    return f"users:perms:{version}:{user_id}"
+
+
+def get_permission_ids(user_id, version):
+    return cache.get(_permission_key(version, user_id))
+
+
+def set_permission_ids(user_id, version, permission_ids):
+    cache.set(_permission_key(version, user_id), permission_ids, settings.USER_PERMISSION_CACHE_TTL)
+
+
+def forget_permissions(*user_ids):
+    version = get_permission_version()
+    cache.delete_many([_permission_key(version, user_id) for user_id in user_ids])
+
+
+def get_permission_names(version):
+    """
+    Returns ``{permission_id: "app_label.codename"}``, loaded once per process and permission version.
+    """
+    from django.contrib.auth.models import Permission
+
+    global _permission_names
+    loaded_version, names = _permission_names
+    if loaded_version != version:
+        names = {
+            pk: f"{app_label}.{codename}"
+            for pk, app_label, codename in Permission.objects.using(DEFAULT_DB_ALIAS).values_list(
+                "pk", "content_type__app_label", "codename"
+            )
+        }
+        _permission_names = (version, names)
+    return names
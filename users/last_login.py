@@ -0,0 +1,167 @@
+import atexit
+import logging
+import threading
+from datetime import datetime
+
+from django.conf import settings
+from django.db import close_old_connections
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_LAST_LOGIN_BUFFER = {
+    "BACKEND": "",
+    "FLUSH_INTERVAL": 10,
+    "BATCH_SIZE": 1000,
+    "REDIS_KEY": "users:last_login",
+}
+
+_buffer = None
+_buffer_lock = threading.Lock()
+
+
+def get_config():
+    return {**DEFAULT_LAST_LOGIN_BUFFER, **getattr(settings, "LAST_LOGIN_BUFFER", {})}
+
+
+def flush_to_db(timestamps, batch_size):
+    """
+    Writes ``{user_id: datetime}`` with one ``bulk_update`` (a single ``CASE`` UPDATE) per batch.
+    """
+    from users.cache import get_user_cache
+    from users.models import User
+
+    if not timestamps:
+        return 0
+    users = [User(pk=user_id, last_login=last_login) for user_id, last_login in timestamps.items()]
+    User.objects.bulk_update(users, ["last_login"], batch_size=batch_size)
+    user_cache = get_user_cache()
+    for user_id in timestamps:
+        user_cache.invalidate(user_id)
+    return len(users)
+
+
+class MemoryLastLoginBuffer:
+    """
+    Keeps the latest login time per user in process memory. Each process flushes its
+    own buffer from a daemon thread every ``FLUSH_INTERVAL`` seconds, since a Celery
+    worker cannot see the memory of the web workers.
+    """
+
+    def __init__(self, flush_interval, batch_size):
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self._pending = {}
+        self._lock = threading.Lock()
+        self._thread = None
+
+    def record(self, user_id, when=None):
+        with self._lock:
+            self._pending[user_id] = when or timezone.now()
+        if self._thread is None:
+            self._start()
+
+    def drain(self):
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def requeue(self, timestamps):
+        # Logins recorded since the drain are newer and win.
+        with self._lock:
+            self._pending = {**timestamps, **self._pending}
+
+    def flush(self):
+        return flush_to_db(self.drain(), self.batch_size)
+
+    def _start(self):
+        with self._lock:
+            if self._thread is not None:
+                return
+            # Started lazily so that every forked worker gets its own flusher thread.
+            self._thread = threading.Thread(target=self._run, name="last-login-flusher", daemon=True)
+            self._thread.start()
+        atexit.register(self.flush)
+
+    def _run(self):
+        stopped = threading.Event()
+        while not stopped.wait(self.flush_interval):
+            # The thread keeps its own connection; recycle it like a request would (CONN_MAX_AGE, errors).
+            close_old_connections()
+            pending = self.drain()
+            try:
+                flush_to_db(pending, self.batch_size)
+            except Exception:
+                # A dropped connection or a failover must not stop the thread or lose the timestamps.
+                logger.exception("Could not flush %d last_login timestamps, retrying", len(pending))
+                self.requeue(pending)
+
+
+class RedisLastLoginBuffer:
+    """
+    Keeps the latest login time per user in a Redis hash shared by every worker and
+    flushed by the ``users.tasks.flush_last_login`` periodic task. Timestamps whose
+    database write fails are put back into the hash for the next run.
+    """
+
+    def __init__(self, redis_url, key, batch_size):
+        import redis
+
+        self.client = redis.Redis.from_url(redis_url)
+        self.key = key
+        self.batch_size = batch_size
+
+    def record(self, user_id, when=None):
+        self.client.hset(self.key, user_id, (when or timezone.now()).isoformat())
+
+    def drain(self):
+        pipe = self.client.pipeline(transaction=True)
+        pipe.hgetall(self.key)
+        pipe.delete(self.key)
+        pending, _ = pipe.execute()
+        return {int(user_id): datetime.fromisoformat(value.decode()) for user_id, value in pending.items()}
+
+    def requeue(self, timestamps):
+        # Logins recorded since the drain are newer and win.
+        pipe = self.client.pipeline(transaction=False)
+        for user_id, last_login in timestamps.items():
+            pipe.hsetnx(self.key, user_id, last_login.isoformat())
+        pipe.execute()
+
+    def flush(self):
+        pending = self.drain()
+        try:
+            return flush_to_db(pending, self.batch_size)
+        except Exception:
+            self.requeue(pending)
+            raise
+
+
+def get_last_login_buffer():
+    """
+    Returns the configured buffer, or ``None`` when last_login is written synchronously.
+    """
+    global _buffer
+    if _buffer is not None:
+        return _buffer
+
+    config = get_config()
+    backend = config["BACKEND"]
+    if not backend:
+        return None
+    with _buffer_lock:
+        if _buffer is None:
+            if backend == "memory":
+                _buffer = MemoryLastLoginBuffer(config["FLUSH_INTERVAL"], config["BATCH_SIZE"])
+            elif backend == "redis":
+                _buffer = RedisLastLoginBuffer(settings.REDIS_URL, config["REDIS_KEY"], config["BATCH_SIZE"])
+            else:
+                raise ValueError(f"Unknown LAST_LOGIN_BUFFER backend: {backend!r}")
+    return _buffer
+
+
+def buffered_update_last_login(sender, user, **kwargs):
+    """
+    ``user_logged_in`` receiver replacing ``django.contrib.auth.models.update_last_login``.
+    """
+    get_last_login_buffer().record(user.pk)
@@ -0,0 +1,40 @@
+import json
+
+from django.core.management.base import BaseCommand
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+from django.utils import timezone
+
+from core.benchmark import measure
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Times the User admin changelist under its filters. Seed the table first with seed_users."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=10)
+
+    def handle(self, *args, **options):
+        setup_test_environment()
+        admin = User.objects.filter(is_superuser=True, is_active=True).first()
+        if admin is None:
+            admin = User.objects.create_superuser("bench-admin@example.com", "bench-password")
+        client = Client()
+        client.force_login(admin)
+
+        url = reverse("admin:users_user_changelist")
+        week_ago = (timezone.now() - timezone.timedelta(days=7)).date()
+        cases = {
+            "default": url,
+            "is_staff": f"{url}?is_staff__exact=1",
+            "is_superuser": f"{url}?is_superuser__exact=1",
+            "date_joined_7d": f"{url}?date_joined__gte={week_ago}",
+            "last_login_7d": f"{url}?last_login__gte={week_ago}",
+            "page_100": f"{url}?p=100",
+        }
+        results = {"rows": User.objects.count()}
+        for name, case_url in cases.items():
+            results[name] = measure(lambda case_url=case_url: client.get(case_url), repeat=options["repeat"])
+        self.stdout.write(json.dumps(results, indent=2))
@@ -0,0 +1,158 @@
+import itertools
+import json
+import platform
+import random
+import subprocess
+import uuid
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import setup_test_environment
+from django.urls import reverse
+
+from core.benchmark import measure
+from users.models import User
+
+PREFIX = "bench"
+SIGNUP_PREFIX = "bench-signup-"
+# Relative changes reported by --compare; higher is worse. Tail latencies of short runs are too
+# noisy to call a regression on, so only GATED metrics are held against --threshold.
+COMPARED = ("p50_ms", "p95_ms", "p99_ms", "queries")
+GATED = ("p50_ms", "queries")
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks the djoser endpoints (signup, jwt/create, jwt/refresh, users/me) and the User admin "
+        "changelist in-process, seeding --users users first. Prints JSON, optionally saves it with --output "
+        "and compares it against an earlier run with --compare."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=10000, help="Seeded users to benchmark against.")
+        parser.add_argument("--repeat", type=int, default=50)
+        parser.add_argument(
+            "--login-repeat", type=int, default=10, help="Repeat of signup and jwt/create, which hash passwords."
+        )
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--output", help="File to write the results to.")
+        parser.add_argument("--compare", help="Results of an earlier run to compare against.")
+        parser.add_argument("--threshold", type=float, default=0.1, help="Relative change reported as a regression.")
+
+    def handle(self, *args, **options):
+        # Swaps in the locmem email backend: signups must not queue activation emails.
+        setup_test_environment()
+        rng = random.Random(options["seed"])
+        password = "bench-password"
+
+        seeded = User.objects.filter(email__startswith=f"{PREFIX}-").count()
+        if seeded < options["users"]:
+            call_command("seed_users", options["users"] - seeded, prefix=PREFIX, password=password, stdout=self.stderr)
+        emails = [f"{PREFIX}-{index}@example.com" for index in range(options["users"])]
+
+        client = Client()
+        tokens = self.post(client, reverse("jwt-create"), {"email": emails[0], "password": password}, 200).json()
+        auth = {"HTTP_AUTHORIZATION": f"Bearer {tokens['access']}"}
+        admin = User.objects.filter(is_superuser=True, is_active=True).first()
+        if admin is None:
+            admin = User.objects.create_superuser("bench-admin@example.com", password)
+        admin_client = Client()
+        admin_client.force_login(admin)
+        signups = itertools.count()
+
+        cases = {
+            "users_create": (
+                lambda: self.post(
+                    client,
+                    reverse("user-list"),
+                    {
+                        "email": f"{SIGNUP_PREFIX}{next(signups)}-{uuid.uuid4().hex[:8]}@example.com",
+                        "password": "Bench-signup-password-1",
+                        "first_name": "Bench",
+                        "last_name": "Signup",
+                    },
+                    201,
+                ),
+                options["login_repeat"],
+            ),
+            "jwt_create": (
+                lambda: self.post(
+                    client, reverse("jwt-create"), {"email": rng.choice(emails), "password": password}, 200
+                ),
+                options["login_repeat"],
+            ),
+            "jwt_refresh": (
+                lambda: self.post(client, reverse("jwt-refresh"), {"refresh": tokens["refresh"]}, 200),
+                options["repeat"],
+            ),
+            "users_me": (lambda: self.get(client, reverse("user-me"), 200, **auth), options["repeat"]),
+        }
+        if settings.DJANGO_ROLE == "web":
+            cases["admin_changelist"] = (
+                lambda: self.get(admin_client, reverse("admin:users_user_changelist"), 200),
+                options["repeat"],
+            )
+
+        results = {
+            "commit": settings.CODE_VERSION or self.git_commit(),
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "users": User.objects.count(),
+            "cases": {},
+        }
+        try:
+            for name, (func, repeat) in cases.items():
+                results["cases"][name] = measure(func, repeat=repeat)
+        finally:
+            User.objects.filter(email__startswith=SIGNUP_PREFIX).delete()
+
+        if options["compare"]:
+            with open(options["compare"]) as file:
+                results["comparison"] = self.compare(json.load(file), results, options["threshold"])
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        self.stdout.write(output)
+
+    def post(self, client, url, data, status):
+        response = client.post(url, data, content_type="application/json")
+        return self.expect(response, url, status)
+
+    def get(self, client, url, status, **extra):
+        return self.expect(client.get(url, **extra), url, status)
+
+    def expect(self, response, url, status):
+        if response.status_code != status:
+            raise CommandError(f"{url} answered {response.status_code}, expected {status}: {response.content[:500]!r}")
+        return response
+
+    def git_commit(self):
+        try:
+            return subprocess.run(
+                ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True
+            ).stdout.strip()
+        except OSError:
+            return ""
+
+    def compare(self, baseline, results, threshold):
+        comparison = {"baseline_commit": baseline.get("commit"), "regressions": [], "cases": {}}
+        for name, case in results["cases"].items():
+            before = baseline.get("cases", {}).get(name)
+            if before is None:
+                continue
+            changes = {}
+            for metric in COMPARED:
+                if before.get(metric):
+                    changes[metric] = round(case[metric] / before[metric] - 1, 3)
+                elif case[metric] != before.get(metric):
+                    changes[metric] = None
+            comparison["cases"][name] = changes
+            if any(changes.get(metric, 0) is None or changes.get(metric, 0) > threshold for metric in GATED):
+                comparison["regressions"].append(name)
+        return comparison
@@ -0,0 +1,82 @@
+import json
+import platform
+import random
+
+import django
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import BaseCommand
+from django.db import connection
+from rest_framework.filters import SearchFilter
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from core.benchmark import measure
+from core.pagination import KeysetPagination
+from core.search import IndexedSearchFilter
+from users.models import User
+from users.views import UserViewSet
+
+PREFIX = "bench"
+BACKENDS = {"search_filter": SearchFilter, "indexed_search_filter": IndexedSearchFilter}
+
+
+class Command(BaseCommand):
+    help = (
+        "Benchmarks ?search= on the user list with DRF's SearchFilter (icontains ORs) and the indexed "
+        "IndexedSearchFilter, seeding --users users first. Each case filters and fetches the first keyset "
+        "page, as the users/ endpoint does. Prints JSON, optionally saved with --output."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--users", type=int, default=2000000, help="Seeded users to benchmark against.")
+        parser.add_argument("--repeat", type=int, default=10)
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--term", action="append", dest="terms", help="Search to run; repeatable.")
+        parser.add_argument("--output", help="File to write the results to.")
+
+    def handle(self, *args, **options):
+        seeded = User.objects.filter(email__startswith=f"{PREFIX}-").count()
+        if seeded < options["users"]:
+            call_command("seed_users", options["users"] - seeded, prefix=PREFIX, stdout=self.stderr)
+
+        rng = random.Random(options["seed"])
+        index = rng.randrange(options["users"])
+        terms = options["terms"] or [
+            f"{PREFIX}-{index}@",  # one email
+            f"First{index}",  # one first name, as a prefix of a few others
+            "Last42",  # about 1% of the seeded users
+            f"last{index % 997} first{index}",  # two terms
+            "no-such-user",
+        ]
+
+        results = {
+            "commit": settings.CODE_VERSION,
+            "database": connection.vendor,
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "users": User.objects.count(),
+            "cases": {},
+        }
+        for term in terms:
+            case = {"matches": self.search(IndexedSearchFilter, term, count=True)}
+            for name, backend in BACKENDS.items():
+                case[name] = measure(
+                    lambda backend=backend, term=term: self.search(backend, term), repeat=options["repeat"]
+                )
+            case["speedup_p50"] = round(case["search_filter"]["p50_ms"] / case["indexed_search_filter"]["p50_ms"], 2)
+            results["cases"][term] = case
+
+        output = json.dumps(results, indent=2)
+        if options["output"]:
+            with open(options["output"], "w") as file:
+                file.write(output + "\n")
+        self.stdout.write(output)
+
+    def search(self, backend, term, count=False):
+        request = Request(APIRequestFactory().get("/auth/users/", {"search": term}))
+        view = UserViewSet(request=request, action="list", format_kwarg=None)
+        queryset = backend().filter_queryset(request, User.objects.all(), view)
+        if count:
+            return queryset.count()
+        return KeysetPagination().paginate_queryset(queryset, request, view)
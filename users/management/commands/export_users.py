@@ -0,0 +1,42 @@
+import sys
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils.dateparse import parse_date, parse_datetime
+
+from users.export import EXPORT_FORMATS, filter_users, iter_export
+from users.models import User
+
+
+def datetime_argument(value):
+    parsed = parse_datetime(value) or parse_date(value)
+    if parsed is None:
+        raise CommandError(f"Invalid date or datetime: {value}")
+    return parsed
+
+
+class Command(BaseCommand):
+    help = "Streams the user table as NDJSON or CSV with constant memory use."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=tuple(EXPORT_FORMATS), default="ndjson")
+        parser.add_argument("--output", "-o", help="Output file, defaults to stdout.")
+        parser.add_argument("--chunk-size", type=int, default=2000)
+        parser.add_argument("--joined-after", type=datetime_argument)
+        parser.add_argument("--joined-before", type=datetime_argument)
+        parser.add_argument("--login-after", type=datetime_argument)
+        parser.add_argument("--login-before", type=datetime_argument)
+
+    def handle(self, *args, **options):
+        queryset = filter_users(
+            User.objects.all(),
+            joined_after=options["joined_after"],
+            joined_before=options["joined_before"],
+            login_after=options["login_after"],
+            login_before=options["login_before"],
+        )
+        lines = iter_export(queryset, options["format"], options["chunk_size"])
+        if not options["output"]:
+            sys.stdout.writelines(lines)
+            return
+        with open(options["output"], "w", newline="", encoding="utf-8") as fp:
+            fp.writelines(lines)
@@ -0,0 +1,79 @@
+import csv
+import json
+import os
+from itertools import islice
+
+from django.core.management.base import BaseCommand, CommandError
+
+from users.manager import USER_IMPORT_FIELDS
+from users.models import User
+
+BOOLEAN_FIELDS = ("is_active", "is_staff")
+TRUE_VALUES = ("1", "t", "true", "y", "yes")
+
+
+class Command(BaseCommand):
+    help = "Streams users from a CSV or NDJSON file into the database in batches."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="CSV (with a header row) or NDJSON file with an 'email' column.")
+        parser.add_argument("--format", choices=("csv", "ndjson"), help="Defaults to the file extension.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--workers", type=int, default=None, help="Password hashing processes.")
+        parser.add_argument("--active", action="store_true", help="Activate users without an is_active column.")
+        parser.add_argument(
+            "--state-file",
+            help="Stores the number of processed rows so an interrupted import resumes where it stopped.",
+        )
+
+    def handle(self, *args, **options):
+        path = options["path"]
+        input_format = options["format"] or ("ndjson" if path.endswith((".ndjson", ".jsonl")) else "csv")
+        state_file = options["state_file"]
+        start = self.read_state(state_file)
+        if start:
+            self.stdout.write(f"Resuming after row {start}")
+
+        def progress(totals):
+            processed = start + totals["processed"]
+            self.write_state(state_file, processed)
+            self.stdout.write(f"{processed} rows processed, {totals['created']} created, {totals['skipped']} skipped")
+
+        with open(path, newline="", encoding="utf-8") as fp:
+            rows = self.read_rows(fp, input_format, options["active"])
+            totals = User.objects.bulk_create_users(
+                islice(rows, start, None),
+                batch_size=options["batch_size"],
+                hash_workers=options["workers"],
+                progress=progress,
+            )
+        self.stdout.write(self.style.SUCCESS(f"Imported {totals['created']} users, skipped {totals['skipped']}"))
+
+    def read_rows(self, fp, input_format, active):
+        if input_format == "csv":
+            reader = csv.DictReader(fp)
+            if "email" not in (reader.fieldnames or ()):
+                raise CommandError("The CSV file needs an 'email' column")
+            records = reader
+        else:
+            records = (json.loads(line) for line in fp if line.strip())
+
+        for record in records:
+            row = {key: record.get(key) for key in ("email", "password", *USER_IMPORT_FIELDS)}
+            for field in BOOLEAN_FIELDS:
+                if isinstance(row[field], str):
+                    row[field] = row[field].strip().lower() in TRUE_VALUES
+            if row["is_active"] is None:
+                row["is_active"] = active
+            yield row
+
+    def read_state(self, state_file):
+        if not state_file or not os.path.exists(state_file):
+            return 0
+        with open(state_file) as fp:
+            return int(fp.read().strip() or 0)
+
+    def write_state(self, state_file, processed):
+        if state_file:
+            with open(state_file, "w") as fp:
+                fp.write(str(processed))
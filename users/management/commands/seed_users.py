@@ -0,0 +1,58 @@
+import random
+from datetime import timedelta
+
+from django.contrib.auth.hashers import make_password
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from users.models import User
+
+
+class Command(BaseCommand):
+    help = "Inserts N synthetic users for benchmarks. All of them share one password."
+
+    def add_arguments(self, parser):
+        parser.add_argument("count", type=int)
+        parser.add_argument("--batch-size", type=int, default=5000)
+        parser.add_argument("--password", default="bench-password")
+        parser.add_argument("--prefix", default="bench")
+        parser.add_argument("--staff-ratio", type=float, default=0.001)
+        parser.add_argument("--joined-days", type=int, default=730, help="Spread date_joined over this many days.")
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        rng = random.Random(options["seed"])
+        password = make_password(options["password"])
+        prefix = options["prefix"]
+        start = User.objects.filter(email__startswith=f"{prefix}-").count()
+        now = timezone.now()
+        batch_size = options["batch_size"]
+        joined_span = options["joined_days"] * 86400
+
+        created = 0
+        for offset in range(start, start + options["count"], batch_size):
+            stop = min(offset + batch_size, start + options["count"])
+            users = []
+            for index in range(offset, stop):
+                is_staff = rng.random() < options["staff_ratio"]
+                age = rng.randrange(joined_span) if joined_span else 0
+                users.append(
+                    User(
+                        email=f"{prefix}-{index}@example.com",
+                        password=password,
+                        first_name=f"First{index}",
+                        last_name=f"Last{index % 997}",
+                        is_active=True,
+                        is_staff=is_staff,
+                        is_superuser=is_staff and rng.random() < 0.1,
+                        date_joined=now - timedelta(seconds=age),
+                        # Logged in within the last 90 days, and never before joining.
+                        last_login=now - timedelta(seconds=rng.randrange(min(age, 90 * 86400) + 1))
+                        if rng.random() < 0.7
+                        else None,
+                    )
+                )
+            User.objects.bulk_create(users, batch_size=batch_size)
+            created += len(users)
+            self.stdout.write(f"{created} users created")
+        self.stdout.write(self.style.SUCCESS(f"Seeded {created} users"))
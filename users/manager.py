@@ -1,4 +1,26 @@
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+import django
+from django.apps import apps
 from django.contrib.auth.base_user import BaseUserManager
+from django.contrib.auth.hashers import make_password
+from django.db.models import Value
+from django.db.models.functions import Lower
+
+USER_IMPORT_FIELDS = ("first_name", "last_name", "is_active", "is_staff")
+
+
+def _init_hashing_worker():
+    # Needed when the pool uses the "spawn" start method; a no-op for forked workers.
+    if not apps.ready:
+        django.setup()
+
+
+def _batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
 
 
 class UserManager(BaseUserManager):
@@ -28,8 +50,83 @@ class UserManager(BaseUserManager):
         user.save()
         return user
 
+    def filter_by_email(self, *emails):
+        """
+        Case-insensitive email filter served by the unique ``Lower("email")`` index.
+        """
+        return self.alias(email_lower=Lower("email")).filter(email_lower__in=[Lower(Value(email)) for email in emails])
+
     def get_by_email(self, email):
         """
-        Returns user by email
+        Returns user by email, ignoring case. Addresses which recently matched no user are
+        remembered for ``USER_EMAIL_NEGATIVE_CACHE_TTL`` seconds and rejected without a query.
         """
-        return self.get(email=email)
+        from users.cache import is_missing_email, remember_missing_email
+
+        if is_missing_email(email):
+            raise self.model.DoesNotExist
+        try:
+            return self.alias(email_lower=Lower("email")).get(email_lower=Lower(Value(email)))
+        except self.model.DoesNotExist:
+            remember_missing_email(email)
+            raise
+
+    def get_by_natural_key(self, username):
+        # Used by ModelBackend.authenticate for djoser and simplejwt logins.
+        return self.get_by_email(username)
+
+    def bulk_create_users(self, rows, batch_size=1000, hash_workers=None, progress=None):
+        """
+        Creates users from an iterable of dicts with an "email", an optional "password"
+        and any of ``USER_IMPORT_FIELDS``, streaming it ``batch_size`` rows at a time.
+
+        Passwords are hashed in a process pool of ``hash_workers`` processes. Emails are
+        normalized and deduplicated both inside each batch and against existing rows, so
+        re-running an interrupted import only inserts what is missing. Rows inserted
+        concurrently by someone else are skipped by the database and counted as skipped.
+        ``progress`` is called after every batch with the running totals.
+        """
+        from users.cache import forget_missing_email
+        from users.signals import invalidate_now_and_on_commit
+
+        totals = {"processed": 0, "created": 0, "skipped": 0}
+        with ProcessPoolExecutor(max_workers=hash_workers, initializer=_init_hashing_worker) as pool:
+            for batch in _batched(rows, batch_size):
+                users = self._build_users(batch, pool)
+                self.bulk_create(users, batch_size=batch_size, ignore_conflicts=True)
+                # bulk_create sends no post_save, so the new accounts must be found on their next login here.
+                if users:
+                    invalidate_now_and_on_commit(self.db, forget_missing_email, *(user.email for user in users))
+                created = self._count_created(users)
+                totals["processed"] += len(batch)
+                totals["created"] += created
+                totals["skipped"] += len(batch) - created
+                if progress is not None:
+                    progress(dict(totals))
+        return totals
+
+    def _count_created(self, users):
+        # ignore_conflicts reports no skipped rows; the salted hashes tell ours apart from concurrent inserts.
+        if not users:
+            return 0
+        emails = [user.email for user in users]
+        return self.filter_by_email(*emails).filter(password__in=[user.password for user in users]).count()
+
+    def _build_users(self, batch, pool):
+        rows = {}
+        for row in batch:
+            email = self.normalize_email((row.get("email") or "").strip())
+            if email and email.lower() not in rows:
+                rows[email.lower()] = (email, row)
+        existing = {email.lower() for email in self.filter_by_email(*rows).values_list("email", flat=True)}
+        rows = dict(value for key, value in rows.items() if key not in existing)
+
+        passwords = pool.map(make_password, [row.get("password") or None for row in rows.values()], chunksize=64)
+        return [
+            self.model(
+                email=email,
+                password=password,
+                **{field: row[field] for field in USER_IMPORT_FIELDS if row.get(field) not in (None, "")},
+            )
+            for (email, row), password in zip(rows.items(), passwords)
+        ]
@@ -0,0 +1,43 @@
+# Generated by Django 4.2.5 on 2026-10-18 10:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0002_alter_user_managers_user_is_active"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                fields=["-date_joined", "-id"], name="users_user_joined_id_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("last_login__isnull", False)),
+                fields=["-last_login"],
+                name="users_user_last_login_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("is_staff", True)),
+                fields=["-id"],
+                name="users_user_staff_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="user",
+            index=models.Index(
+                condition=models.Q(("is_superuser", True)),
+                fields=["-id"],
+                name="users_user_superuser_idx",
+            ),
+        ),
+    ]
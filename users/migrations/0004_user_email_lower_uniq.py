@@ -0,0 +1,43 @@
+# Generated by Django 4.2.5 on 2026-10-18 10:14
+
+from django.db import migrations, models
+import django.db.models.functions.text
+
+
+def check_case_duplicate_emails(apps, schema_editor):
+    # Fails before the constraint is added, with the addresses to fix, instead of halfway through it.
+    User = apps.get_model("users", "User")
+    duplicates = list(
+        User.objects.using(schema_editor.connection.alias)
+        .values(email_lower=django.db.models.functions.text.Lower("email"))
+        .annotate(count=models.Count("pk"))
+        .filter(count__gt=1)
+        .order_by("email_lower")
+        .values_list("email_lower", "count")[:50]
+    )
+    if duplicates:
+        listed = "\n".join(f"  {email} ({count} users)" for email, count in duplicates)
+        message = (
+            "Cannot make emails unique ignoring case: these addresses belong to several users "
+            "(first 50 shown). Merge or rename the accounts, then run migrate again.\n"
+        )
+        raise RuntimeError(message + listed)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0003_user_admin_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(check_case_duplicate_emails, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name="user",
+            constraint=models.UniqueConstraint(
+                django.db.models.functions.text.Lower("email"),
+                name="users_user_email_lower_uniq",
+                violation_error_message="A user with that email already exists.",
+            ),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.2.5 on 2026-10-18 10:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0005_token_revocation"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="user",
+            name="avatar",
+            field=models.ImageField(blank=True, default="", upload_to="avatars/"),
+        ),
+        migrations.AddField(
+            model_name="user",
+            name="avatar_hash",
+            field=models.CharField(blank=True, default="", max_length=64),
+        ),
+    ]
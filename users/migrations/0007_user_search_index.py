@@ -0,0 +1,67 @@
+from django.db import migrations
+
+# The DDL of core.search.install_search_index for users_user at the time of this migration,
+# inlined so later changes to that helper cannot change what this migration does.
+INSTALL_SQL = {
+    "postgresql": [
+        "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+        # Character for character the expression of core.search.SearchDocument, so the planner uses it.
+        'CREATE INDEX CONCURRENTLY IF NOT EXISTS "users_user_search" ON "users_user" '
+        'USING gin (("email" || \' \' || "first_name" || \' \' || "last_name") gin_trgm_ops)',
+    ],
+    "sqlite": [
+        # External content: the FTS5 table indexes users_user without storing the text twice.
+        'CREATE VIRTUAL TABLE IF NOT EXISTS "users_user_search" USING fts5('
+        '"email", "first_name", "last_name", content="users_user", content_rowid="id", tokenize=\'trigram\')',
+        'CREATE TRIGGER IF NOT EXISTS "users_user_search_ai" AFTER INSERT ON "users_user" BEGIN '
+        'INSERT INTO "users_user_search"(rowid, "email", "first_name", "last_name") '
+        'VALUES (new."id", new."email", new."first_name", new."last_name"); END',
+        'CREATE TRIGGER IF NOT EXISTS "users_user_search_ad" AFTER DELETE ON "users_user" BEGIN '
+        'INSERT INTO "users_user_search"("users_user_search", rowid, "email", "first_name", "last_name") '
+        'VALUES (\'delete\', old."id", old."email", old."first_name", old."last_name"); END',
+        'CREATE TRIGGER IF NOT EXISTS "users_user_search_au" AFTER UPDATE OF "email", "first_name", "last_name" '
+        'ON "users_user" BEGIN '
+        'INSERT INTO "users_user_search"("users_user_search", rowid, "email", "first_name", "last_name") '
+        'VALUES (\'delete\', old."id", old."email", old."first_name", old."last_name"); '
+        'INSERT INTO "users_user_search"(rowid, "email", "first_name", "last_name") '
+        'VALUES (new."id", new."email", new."first_name", new."last_name"); END',
+        'INSERT INTO "users_user_search"("users_user_search") VALUES (\'rebuild\')',
+    ],
+}
+
+UNINSTALL_SQL = {
+    "postgresql": [
+        'DROP INDEX CONCURRENTLY IF EXISTS "users_user_search"',
+    ],
+    "sqlite": [
+        'DROP TRIGGER IF EXISTS "users_user_search_ai"',
+        'DROP TRIGGER IF EXISTS "users_user_search_ad"',
+        'DROP TRIGGER IF EXISTS "users_user_search_au"',
+        'DROP TABLE IF EXISTS "users_user_search"',
+    ],
+}
+
+
+def install(apps, schema_editor):
+    # Other databases search with icontains and need no index.
+    for sql in INSTALL_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql, params=None)
+
+
+def uninstall(apps, schema_editor):
+    for sql in UNINSTALL_SQL.get(schema_editor.connection.vendor, []):
+        schema_editor.execute(sql, params=None)
+
+
+class Migration(migrations.Migration):
+    # CREATE INDEX CONCURRENTLY cannot run inside a transaction, and does not block writes
+    # to users_user while the index is built.
+    atomic = False
+
+    dependencies = [
+        ("users", "0006_user_avatar"),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
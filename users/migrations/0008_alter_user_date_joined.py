@@ -0,0 +1,19 @@
+# Generated by Django 4.2.5 on 2026-10-18 11:17
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("users", "0007_user_search_index"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="user",
+            name="date_joined",
+            field=models.DateTimeField(default=django.utils.timezone.now),
+        ),
+    ]
@@ -3,10 +3,17 @@ from django.contrib.auth.models import (
     PermissionsMixin,
 )
 from django.db import models
+from django.db.models.functions import Lower
+from django.utils import timezone
 from django.utils.translation import gettext_lazy as _
 
 from users.manager import UserManager
 
+# Searched by core.search.IndexedSearchFilter through the index of migration 0007 (a trigram GIN
+# index on PostgreSQL, an FTS5 table on SQLite), which must list the same fields.
+SEARCH_FIELDS = ("email", "first_name", "last_name")
+SEARCH_INDEX = "users_user_search"
+
 
 class User(AbstractBaseUser, PermissionsMixin):
     first_name = models.CharField(max_length=256, default="")
@@ -24,15 +31,72 @@ class User(AbstractBaseUser, PermissionsMixin):
     )
     is_staff = models.BooleanField(default=False)
     is_active = models.BooleanField(default=False)
-    date_joined = models.DateTimeField(auto_now=True)
+    # Set once on creation (not auto_now), so keyset pages ordered by it stay stable.
+    date_joined = models.DateTimeField(default=timezone.now)
+    # Stored under its content hash by users.avatars.set_avatar, never through upload_to.
+    avatar = models.ImageField(upload_to="avatars/", blank=True, default="")
+    # Content hash of ``avatar`` once its variants exist; empty while users.tasks.process_avatar renders them.
+    avatar_hash = models.CharField(max_length=64, blank=True, default="")
 
     USERNAME_FIELD = "email"
 
     objects = UserManager()
 
+    class Meta:
+        constraints = [
+            # Serves case-insensitive lookups and stops "A@x.com" and "a@x.com" from coexisting.
+            models.UniqueConstraint(
+                Lower("email"),
+                name="users_user_email_lower_uniq",
+                violation_error_message=_("A user with that email already exists."),
+            ),
+        ]
+        indexes = [
+            # Keyset pagination and the date_joined admin filter
+            models.Index(fields=["-date_joined", "-id"], name="users_user_joined_id_idx"),
+            models.Index(
+                fields=["-last_login"],
+                name="users_user_last_login_idx",
+                condition=models.Q(last_login__isnull=False),
+            ),
+            # Staff and superusers are a tiny fraction of the table, so partial indexes on the
+            # admin's default "-pk" ordering serve those filters without indexing every row.
+            models.Index(fields=["-id"], name="users_user_staff_idx", condition=models.Q(is_staff=True)),
+            models.Index(fields=["-id"], name="users_user_superuser_idx", condition=models.Q(is_superuser=True)),
+        ]
+
     def __str__(self):
         return self.get_username()
 
     @property
     def full_name(self):
         return self.first_name + " " + self.last_name
+
+
+class RevokedToken(models.Model):
+    """
+    A single revoked access or refresh token, by its ``jti`` claim. Checked through
+    ``users.revocation.RevocationList`` rather than queried per request.
+    """
+
+    jti = models.CharField(max_length=255, unique=True)
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name="revoked_tokens")
+    # The token's own expiry; the row is useless (and deleted) afterwards.
+    expires_at = models.DateTimeField(null=True, blank=True, db_index=True)
+    revoked_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    def __str__(self):
+        return self.jti
+
+
+class TokenCutoff(models.Model):
+    """
+    Revokes every token of ``user`` issued before ``revoked_before`` ("log out everywhere").
+    """
+
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name="token_cutoff")
+    revoked_before = models.DateTimeField()
+    changed_at = models.DateTimeField(auto_now=True, db_index=True)
+
+    def __str__(self):
+        return f"{self.user_id} < {self.revoked_before}"
@@ -0,0 +1,218 @@
+import math
+import threading
+import time
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, transaction
+from django.utils import timezone
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from core.bloom import BloomFilter
+from core.cache import uses_shared_cache
+from core.lru import TTLLRUCache
+
+DEFAULT_TOKEN_REVOCATION = {
+    "SYNC_INTERVAL": 5,
+    "EXPECTED_TOKENS": 100000,
+    "FALSE_POSITIVE_RATE": 0.001,
+    "FALSE_POSITIVE_CACHE_SIZE": 10000,
+}
+
+_REVOCATION_VERSION_KEY = "users:revocation:version"
+# Re-reads rows written slightly before the last sync, in case the clocks of the writing
+# processes disagree or a transaction committed after a later one had already been read.
+SYNC_OVERLAP = timedelta(seconds=30)
+
+_revocation_list = None
+_revocation_list_lock = threading.Lock()
+
+
+def get_config():
+    return {**DEFAULT_TOKEN_REVOCATION, **getattr(settings, "TOKEN_REVOCATION", {})}
+
+
+def get_revocation_version():
+    """
+    Stamp bumped on every revocation, so idle processes can tell there is nothing to sync.
+    None when the default cache is per-process; every sync then reads the database.
+    """
+    if not uses_shared_cache():
+        return None
+    version = cache.get(_REVOCATION_VERSION_KEY)
+    if version is None:
+        cache.add(_REVOCATION_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(_REVOCATION_VERSION_KEY)
+    return version
+
+
+def bump_revocation_version():
+    if uses_shared_cache():
+        cache.set(_REVOCATION_VERSION_KEY, time.time_ns(), None)
+
+
+class RevocationList:
+    """
+    Per-process view of ``RevokedToken`` and ``TokenCutoff``, answering "is this token
+    revoked?" from memory.
+
+    Revoked ``jti``s are held in a Bloom filter, so a token which was never revoked (nearly
+    every token) is cleared in a few bit lookups. Filter hits are confirmed with one query
+    and the answer is remembered. User-wide cutoffs are few and held exactly. Every
+    ``SYNC_INTERVAL`` seconds the list compares the revocation version in the shared cache
+    and, if it moved, reads only the rows written since its last sync. A token revoked in
+    another process is therefore accepted for at most ``SYNC_INTERVAL`` seconds.
+    """
+
+    def __init__(self, sync_interval, expected_tokens, false_positive_rate, false_positive_cache_size):
+        self.sync_interval = sync_interval
+        self.expected_tokens = expected_tokens
+        self.false_positive_rate = false_positive_rate
+        self.bloom = BloomFilter(expected_tokens, false_positive_rate)
+        # Confirmed by the database, and filter hits which turned out not to be revoked. The
+        # latter expire, in case a revocation raced with the query answering them.
+        self.revoked = set()
+        self.not_revoked = TTLLRUCache(max_size=false_positive_cache_size, ttl=60)
+        # {user_id: epoch seconds}; tokens issued ("iat") before it are revoked.
+        self.cutoffs = {}
+        self._version = None
+        self._checked_at = None
+        self._synced_at = None
+        self._lock = threading.Lock()
+
+    def is_revoked(self, jti, user_id, issued_at):
+        if self.sync_due():
+            self.sync_if_changed()
+
+        cutoff = self.cutoffs.get(user_id)
+        if cutoff is not None and (issued_at is None or issued_at < cutoff):
+            return True
+        if jti is None or jti not in self.bloom:
+            return False
+        if jti in self.revoked:
+            return True
+        if self.not_revoked.get(jti) is not None:
+            return False
+
+        from users.models import RevokedToken
+
+        revoked = RevokedToken.objects.using(DEFAULT_DB_ALIAS).filter(jti=jti).exists()
+        if revoked:
+            self.revoked.add(jti)
+        else:
+            self.not_revoked.set(jti, True)
+        return revoked
+
+    def sync_due(self):
+        return self._checked_at is None or time.monotonic() - self._checked_at >= self.sync_interval
+
+    def sync_if_changed(self):
+        with self._lock:
+            if not self.sync_due():
+                return
+            version = get_revocation_version()
+            if self._synced_at is None or version is None or version != self._version:
+                self.sync()
+                self._version = version
+            self._checked_at = time.monotonic()
+
+    def sync(self):
+        from users.models import RevokedToken, TokenCutoff
+
+        synced_at = timezone.now()
+        tokens = RevokedToken.objects.using(DEFAULT_DB_ALIAS)
+        cutoffs = TokenCutoff.objects.using(DEFAULT_DB_ALIAS)
+        if self._synced_at is None:
+            tokens = tokens.exclude(expires_at__lt=synced_at)
+        else:
+            since = self._synced_at - SYNC_OVERLAP
+            tokens = tokens.filter(revoked_at__gte=since)
+            cutoffs = cutoffs.filter(changed_at__gte=since)
+
+        for jti in tokens.values_list("jti", flat=True).iterator():
+            self.add(jti)
+        for user_id, revoked_before in cutoffs.values_list("user_id", "revoked_before").iterator():
+            self.set_cutoff(user_id, revoked_before)
+        self._synced_at = synced_at
+
+        if len(self.bloom) > self.bloom.capacity:
+            # Past its capacity the filter answers "maybe" too often: reload it twice as large,
+            # leaving out tokens which have expired meanwhile.
+            self.expected_tokens = 2 * len(self.bloom)
+            self.bloom = BloomFilter(self.expected_tokens, self.false_positive_rate)
+            self._synced_at = None
+            self.sync()
+
+    def add(self, jti):
+        # Re-adding a known jti (every sync re-reads SYNC_OVERLAP) would only inflate the count.
+        if jti not in self.bloom:
+            self.bloom.add(jti)
+        self.not_revoked.delete(jti)
+
+    def set_cutoff(self, user_id, revoked_before):
+        # "iat" has whole seconds, so tokens issued in the second of the cutoff count as before it.
+        self.cutoffs[user_id] = math.ceil(revoked_before.timestamp())
+
+
+def get_revocation_list():
+    global _revocation_list
+    if _revocation_list is None:
+        with _revocation_list_lock:
+            if _revocation_list is None:
+                config = get_config()
+                _revocation_list = RevocationList(
+                    sync_interval=config["SYNC_INTERVAL"],
+                    expected_tokens=config["EXPECTED_TOKENS"],
+                    false_positive_rate=config["FALSE_POSITIVE_RATE"],
+                    false_positive_cache_size=config["FALSE_POSITIVE_CACHE_SIZE"],
+                )
+    return _revocation_list
+
+
+def is_token_revoked(token):
+    """
+    Checks a validated simplejwt token.
+    """
+    return get_revocation_list().is_revoked(
+        token.get(api_settings.JTI_CLAIM), token.get(api_settings.USER_ID_CLAIM), token.get("iat")
+    )
+
+
+def revoke_token(token):
+    """
+    Revokes one validated access or refresh token.
+    """
+    from users.models import RevokedToken
+
+    jti = token[api_settings.JTI_CLAIM]
+    expires_at = token.get("exp")
+    RevokedToken.objects.get_or_create(
+        jti=jti,
+        defaults={
+            "user_id": token[api_settings.USER_ID_CLAIM],
+            "expires_at": datetime_from_epoch(expires_at) if expires_at else None,
+        },
+    )
+    get_revocation_list().add(jti)
+    transaction.on_commit(bump_revocation_version)
+
+
+def revoke_user_tokens(*user_ids, before=None):
+    """
+    Revokes every token of the given users issued before ``before`` (now by default).
+    """
+    from users.models import TokenCutoff
+
+    before = before or timezone.now()
+    TokenCutoff.objects.bulk_create(
+        [TokenCutoff(user_id=user_id, revoked_before=before, changed_at=before) for user_id in user_ids],
+        update_conflicts=True,
+        unique_fields=["user"],
+        update_fields=["revoked_before", "changed_at"],
+    )
+    revocation_list = get_revocation_list()
+    for user_id in user_ids:
+        revocation_list.set_cutoff(user_id, before)
+    transaction.on_commit(bump_revocation_version)
@@ -1,5 +1,16 @@
-from djoser.serializers import UserCreateSerializer
+from django.utils.translation import gettext_lazy as _
+from djoser.serializers import UserCreateSerializer, UserSerializer
 from rest_framework import serializers
+from rest_framework_simplejwt import serializers as jwt_serializers
+from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import RefreshToken
+
+from core.images import get_config as get_image_config
+from users.avatars import avatar_urls
+from users.last_login import get_last_login_buffer
+from users.models import User
+from users.revocation import is_token_revoked
 
 
 class CustomUserSerializer(UserCreateSerializer):
@@ -8,3 +19,74 @@ class CustomUserSerializer(UserCreateSerializer):
 
     class Meta(UserCreateSerializer.Meta):
         fields = UserCreateSerializer.Meta.fields + ("first_name", "last_name")
+
+    def validate_email(self, value):
+        if User.objects.filter_by_email(value).exists():
+            raise serializers.ValidationError(User._meta.get_field("email").error_messages["unique"])
+        return value
+
+
+class CurrentUserSerializer(UserSerializer):
+    avatar = serializers.SerializerMethodField()
+
+    class Meta(UserSerializer.Meta):
+        fields = UserSerializer.Meta.fields + ("first_name", "last_name", "avatar")
+
+    def get_avatar(self, user):
+        """
+        URLs of the original upload and, once rendered, of every size variant.
+        """
+        urls = avatar_urls(user)
+        request = self.context.get("request")
+        if urls and request is not None:
+            urls = {variant: request.build_absolute_uri(url) for variant, url in urls.items()}
+        return urls
+
+
+class AvatarSerializer(serializers.Serializer):
+    avatar = serializers.ImageField()
+
+    def validate_avatar(self, value):
+        config = get_image_config()
+        if value.size > config["MAX_UPLOAD_SIZE"]:
+            raise serializers.ValidationError(
+                _("The image must not exceed %(size)d MB.") % {"size": config["MAX_UPLOAD_SIZE"] // 2**20}
+            )
+        # ImageField left the opened (but not decoded) image on the file.
+        if value.image.format not in config["FORMATS"]:
+            raise serializers.ValidationError(_("Unsupported image format."))
+        width, height = value.image.size
+        if width * height > config["MAX_PIXELS"]:
+            raise serializers.ValidationError(_("The image has too many pixels."))
+        return value
+
+
+class TokenObtainPairSerializer(jwt_serializers.TokenObtainPairSerializer):
+    def validate(self, attrs):
+        data = super().validate(attrs)
+        # simplejwt's UPDATE_LAST_LOGIN is off when the write-behind buffer is enabled
+        last_login_buffer = get_last_login_buffer()
+        if last_login_buffer is not None:
+            last_login_buffer.record(self.user.pk)
+        return data
+
+
+class TokenRefreshSerializer(jwt_serializers.TokenRefreshSerializer):
+    def validate(self, attrs):
+        if is_token_revoked(self.token_class(attrs["refresh"])):
+            raise InvalidToken(_("Token has been revoked"))
+        return super().validate(attrs)
+
+
+class TokenRevokeSerializer(serializers.Serializer):
+    refresh = serializers.CharField(required=False)
+    everywhere = serializers.BooleanField(default=False, help_text="Revoke every token of the user.")
+
+    def validate_refresh(self, value):
+        try:
+            token = RefreshToken(value)
+        except TokenError as error:
+            raise serializers.ValidationError(str(error)) from None
+        if token.get(api_settings.USER_ID_CLAIM) != self.context["request"].user.pk:
+            raise serializers.ValidationError(_("Token belongs to another user."))
+        return token
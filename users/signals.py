@@ -0,0 +1,79 @@
+from django.contrib.auth.models import Group, Permission
+from django.db import connections, transaction
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
+from django.dispatch import receiver
+
+from core.search import repair_search_index
+from users.cache import bump_permission_version, forget_missing_email, forget_permissions, get_user_cache
+from users.models import SEARCH_FIELDS, SEARCH_INDEX, User
+
+
+def invalidate_now_and_on_commit(using, invalidate, *args):
+    """
+    Calls ``invalidate`` now and again once the transaction of ``using`` commits: signals fire
+    before the commit, so a request reading in between would cache the old data again.
+    """
+    invalidate(*args)
+    if connections[using].in_atomic_block:
+        transaction.on_commit(lambda: invalidate(*args), using=using)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_cached_user(sender, instance, using, **kwargs):
+    """
+    Drops the cached row on every save/delete, which also covers ``is_active`` flips.
+    Bulk ``QuerySet.update()`` calls bypass signals and must call ``invalidate`` themselves.
+    """
+    invalidate_now_and_on_commit(using, get_user_cache().invalidate, instance.pk)
+
+
+@receiver(post_save, sender=User)
+def forget_missing_user_email(sender, instance, using, **kwargs):
+    # A new or renamed account must be found on its next login attempt.
+    invalidate_now_and_on_commit(using, forget_missing_email, instance.email)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def invalidate_user_permissions(sender, instance, using, **kwargs):
+    # ``is_superuser`` grants every permission.
+    invalidate_now_and_on_commit(using, forget_permissions, instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_changed_user_permissions(sender, instance, action, reverse, pk_set, using, **kwargs):
+    """
+    Drops the permission sets of the users whose groups or direct permissions changed, from
+    either side of the relation (``user.groups.add(group)`` or ``group.user_set.add(user)``).
+    """
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        invalidate_now_and_on_commit(using, forget_permissions, instance.pk)
+    elif pk_set:
+        invalidate_now_and_on_commit(using, forget_permissions, *pk_set)
+    else:
+        # ``group.user_set.clear()`` does not say which users were affected.
+        invalidate_now_and_on_commit(using, bump_permission_version)
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_permissions(sender, action, using, **kwargs):
+    if action.startswith("post_"):
+        invalidate_now_and_on_commit(using, bump_permission_version)
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def invalidate_all_permissions(sender, using, **kwargs):
+    invalidate_now_and_on_commit(using, bump_permission_version)
+
+
+@receiver(post_migrate)
+def repair_user_search_index(sender, using, **kwargs):
+    # SQLite drops the FTS5 triggers whenever a migration rebuilds users_user.
+    if sender.label == "users":
+        repair_search_index(connections[using], User._meta.db_table, SEARCH_INDEX, SEARCH_FIELDS)
@@ -0,0 +1,51 @@
+from celery import shared_task
+from django.conf import settings
+from django.utils import timezone
+
+from core.images import generate_variants
+from core.tasks import delete_in_batches
+from users.avatars import AVATAR_DIRECTORY, get_variants
+from users.cache import get_user_cache
+from users.last_login import get_config, get_last_login_buffer
+from users.models import RevokedToken, TokenCutoff, User
+
+
+@shared_task(ignore_result=True)
+def flush_last_login():
+    """
+    Writes the buffered last_login timestamps in bulk. Only does work for the "redis"
+    buffer; the "memory" buffer is flushed by each web process itself.
+    """
+    if get_config()["BACKEND"] != "redis":
+        return 0
+    return get_last_login_buffer().flush()
+
+
+@shared_task(ignore_result=True)
+def delete_expired_revocations(batch_size=1000):
+    """
+    Deletes revocations of tokens which have expired anyway, and cutoffs older than any
+    token which can still be valid.
+    """
+    now = timezone.now()
+    deleted = delete_in_batches(RevokedToken.objects.filter(expires_at__lt=now), batch_size)
+    longest_lifetime = max(settings.SIMPLE_JWT["ACCESS_TOKEN_LIFETIME"], settings.SIMPLE_JWT["REFRESH_TOKEN_LIFETIME"])
+    return deleted + delete_in_batches(
+        TokenCutoff.objects.filter(revoked_before__lt=now - longest_lifetime), batch_size
+    )
+
+
+@shared_task(ignore_result=True)
+def process_avatar(name, digest):
+    """
+    Renders the variants of the avatar stored as ``name`` and marks them ready on every user
+    who uploaded that content meanwhile. Routed to the media queue (``IMAGE_PROCESSING["QUEUE"]``).
+    """
+    generate_variants(name, AVATAR_DIRECTORY, digest, get_variants())
+    users = User.objects.filter(avatar=name).exclude(avatar_hash=digest)
+    user_ids = list(users.values_list("pk", flat=True))
+    User.objects.filter(pk__in=user_ids, avatar=name).update(avatar_hash=digest)
+    cache = get_user_cache()
+    for user_id in user_ids:
+        cache.invalidate(user_id)
+    return len(user_ids)
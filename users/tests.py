@@ -0,0 +1,819 @@
+import csv
+import io
+import json
+import os
+import shutil
+import tempfile
+from datetime import timedelta
+from unittest import mock
+
+import fakeredis
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache, caches
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import DatabaseError
+from django.test import TestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+from PIL import Image
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.tokens import AccessToken, RefreshToken
+
+import users.cache
+import users.revocation
+from core.paginator import EstimatedCountPaginator
+from core.search import search_queryset
+from users.authentication import CachedJWTAuthentication
+from users.cache import (
+    UserCache,
+    get_permission_ids,
+    get_permission_version,
+    get_user_cache,
+    is_missing_email,
+    set_permission_ids,
+)
+from users.export import EXPORT_FIELDS, EXPORT_FORMATS, aiter_export, filter_users, iter_export
+from users.last_login import MemoryLastLoginBuffer, RedisLastLoginBuffer
+from users.management.commands.bench_auth import Command as BenchAuthCommand
+from users.manager import USER_IMPORT_FIELDS
+from users.models import RevokedToken, TokenCutoff, User
+from users.revocation import RevocationList, revoke_token, revoke_user_tokens
+from users.tasks import delete_expired_revocations, process_avatar
+
+
+class UserCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user("user@example.com", "password", is_active=True)
+        # A cache backed by the shared default cache, used by the signals too.
+        self.user_cache = UserCache(max_size=100, ttl=60, shared_cache_alias="default")
+        patcher = mock.patch.object(users.cache, "_user_cache", self.user_cache)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def shared_row(self):
+        return caches["default"].get(self.user_cache.make_key(self.user.pk))
+
+    def is_cached(self):
+        return self.user_cache.local.get(self.user_cache.make_key(self.user.pk)) is not None or bool(self.shared_row())
+
+    def test_hits_run_no_queries(self):
+        self.user_cache.get(self.user.pk)
+        self.user_cache.local.clear()
+        with self.assertNumQueries(0):
+            user = self.user_cache.get(self.user.pk)
+        self.assertEqual(user.email, "user@example.com")
+
+    def test_rows_hold_no_password(self):
+        self.user_cache.get(self.user.pk)
+        _, field_names, values, _ = self.shared_row()
+        self.assertNotIn("password", field_names)
+        self.assertNotIn(self.user.password, values)
+
+    def test_password_is_loaded_on_access(self):
+        user = self.user_cache.get(self.user.pk)
+        with self.assertNumQueries(1):
+            self.assertTrue(user.check_password("password"))
+
+    def test_save_invalidates(self):
+        get_user_cache().get(self.user.pk)
+        self.user.first_name = "Changed"
+        self.user.save()
+        self.assertFalse(self.is_cached())
+        self.assertEqual(get_user_cache().get(self.user.pk).first_name, "Changed")
+
+    def test_password_change_invalidates(self):
+        get_user_cache().get(self.user.pk)
+        self.user.set_password("changed")
+        self.user.save()
+        self.assertFalse(self.is_cached())
+        self.assertTrue(get_user_cache().get(self.user.pk).check_password("changed"))
+
+    def test_delete_invalidates(self):
+        get_user_cache().get(self.user.pk)
+        pk = self.user.pk
+        self.user.delete()
+        self.assertFalse(self.is_cached())
+        with self.assertRaises(User.DoesNotExist):
+            get_user_cache().get(pk)
+
+    def test_invalidates_again_on_commit(self):
+        get_user_cache().get(self.user.pk)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.save()
+            # A request reading before the commit.
+            get_user_cache().get(self.user.pk)
+        self.assertFalse(self.is_cached())
+
+
+# simplejwt rebinds its settings on setting_changed, so modules which imported them never see override_settings().
+@mock.patch.object(api_settings, "CHECK_REVOKE_TOKEN", True)
+class CachedJWTAuthenticationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_user_cache().local.clear()
+        self.user = User.objects.create_user("user@example.com", "password", is_active=True)
+
+    def authenticate(self, token):
+        return CachedJWTAuthentication().get_user(AccessToken(str(token)))
+
+    def test_cached_users_are_authenticated(self):
+        token = AccessToken.for_user(self.user)
+        self.assertEqual(self.authenticate(token).pk, self.user.pk)
+        user = self.authenticate(token)
+        self.assertIn("password", user.get_deferred_fields())
+
+    def test_tokens_issued_before_a_password_change_are_rejected(self):
+        token = AccessToken.for_user(self.user)
+        self.authenticate(token)
+        self.user.set_password("changed")
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+        self.assertEqual(self.authenticate(AccessToken.for_user(self.user)).pk, self.user.pk)
+
+    def test_inactive_users_are_rejected(self):
+        token = AccessToken.for_user(self.user)
+        self.authenticate(token)
+        self.user.is_active = False
+        self.user.save()
+        with self.assertRaises(AuthenticationFailed):
+            self.authenticate(token)
+
+
+@mock.patch("users.cache.uses_shared_cache", return_value=True)
+class MissingEmailCacheTests(TestCase):
+    def setUp(self):
+        cache.clear()
+
+    def test_unknown_emails_are_remembered(self, _):
+        with self.assertRaises(User.DoesNotExist):
+            User.objects.get_by_email("new@example.com")
+        self.assertTrue(is_missing_email("NEW@example.com"))
+        with self.assertNumQueries(0), self.assertRaises(User.DoesNotExist):
+            User.objects.get_by_email("new@example.com")
+
+    def test_created_users_are_forgotten(self, _):
+        with self.assertRaises(User.DoesNotExist):
+            User.objects.get_by_email("new@example.com")
+        User.objects.create_user("New@example.com", "password")
+        self.assertEqual(User.objects.get_by_email("new@example.com").email, "New@example.com")
+
+    def test_bulk_created_users_are_forgotten(self, _):
+        for email in ("new@example.com", "other@example.com"):
+            with self.assertRaises(User.DoesNotExist):
+                User.objects.get_by_email(email)
+        User.objects.bulk_create_users([{"email": "New@example.com"}, {"email": "other@example.com"}], hash_workers=1)
+        self.assertEqual(User.objects.get_by_email("new@example.com").email, "New@example.com")
+        self.assertEqual(User.objects.get_by_email("other@example.com").email, "other@example.com")
+
+
+@mock.patch("users.backends.uses_shared_cache", return_value=True)
+class CachedModelBackendTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create(email="user@example.com", is_active=True)
+        self.group = Group.objects.create(name="editors")
+        self.view = Permission.objects.get(codename="view_user")
+        self.change = Permission.objects.get(codename="change_user")
+        self.user.user_permissions.add(self.view)
+
+    def fresh_user(self):
+        # has_perm results are kept on the user instance, so every check gets a new one.
+        return User.objects.get(pk=self.user.pk)
+
+    def test_warm_checks_run_no_queries(self, _):
+        self.assertTrue(self.fresh_user().has_perm("users.view_user"))
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm("users.view_user"))
+            self.assertFalse(user.has_perm("users.change_user"))
+
+    def test_direct_permission_changes(self, _):
+        self.assertFalse(self.fresh_user().has_perm("users.change_user"))
+        self.user.user_permissions.add(self.change)
+        self.assertTrue(self.fresh_user().has_perm("users.change_user"))
+        self.change.user_set.remove(self.user)
+        self.assertFalse(self.fresh_user().has_perm("users.change_user"))
+
+    def test_group_changes(self, _):
+        self.group.permissions.add(self.change)
+        self.assertFalse(self.fresh_user().has_perm("users.change_user"))
+        self.group.user_set.add(self.user)
+        self.assertTrue(self.fresh_user().has_perm("users.change_user"))
+        self.group.permissions.remove(self.change)
+        self.assertFalse(self.fresh_user().has_perm("users.change_user"))
+        self.group.permissions.add(self.change)
+        self.group.user_set.clear()
+        self.assertFalse(self.fresh_user().has_perm("users.change_user"))
+        self.user.groups.add(self.group)
+        self.assertTrue(self.fresh_user().has_perm("users.change_user"))
+        self.group.delete()
+        self.assertFalse(self.fresh_user().has_perm("users.change_user"))
+
+    def test_superuser_and_inactive_flips(self, _):
+        self.assertFalse(self.fresh_user().has_perm("users.change_user"))
+        self.user.is_superuser = True
+        self.user.save()
+        self.assertTrue(self.fresh_user().has_perm("users.change_user"))
+        self.user.is_superuser = False
+        self.user.is_active = False
+        self.user.save()
+        self.assertFalse(self.fresh_user().has_perm("users.view_user"))
+
+    def test_sets_cached_before_the_commit_are_dropped_after_it(self, _):
+        self.assertFalse(self.fresh_user().has_perm("users.change_user"))
+        with self.captureOnCommitCallbacks(execute=True):
+            self.user.user_permissions.add(self.change)
+            # A request reading the old permissions before the commit caches them again.
+            version = get_permission_version()
+            set_permission_ids(self.user.pk, version, frozenset([self.view.pk]))
+            self.assertFalse(self.fresh_user().has_perm("users.change_user"))
+        self.assertTrue(self.fresh_user().has_perm("users.change_user"))
+
+    def test_nothing_is_cached_without_a_shared_cache(self, uses_shared_cache):
+        uses_shared_cache.return_value = False
+        self.assertTrue(self.fresh_user().has_perm("users.view_user"))
+        self.assertIsNone(get_permission_ids(self.user.pk, get_permission_version()))
+        user = self.fresh_user()
+        with self.assertNumQueries(1):
+            self.assertTrue(user.has_perm("users.view_user"))
+
+
+class LastLoginBufferTests(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create(email=f"user{n}@example.com") for n in range(3)]
+        self.now = timezone.now().replace(microsecond=0)
+
+    def make_buffer(self, backend):
+        if backend == "memory":
+            return MemoryLastLoginBuffer(flush_interval=60, batch_size=2)
+        buffer = RedisLastLoginBuffer("redis://localhost:6379/0", "users:last_login", batch_size=2)
+        buffer.client = fakeredis.FakeRedis()
+        return buffer
+
+    def record(self, buffer, user, when):
+        # Keeps the memory buffer from starting its flusher thread.
+        with mock.patch.object(MemoryLastLoginBuffer, "_start"):
+            buffer.record(user.pk, when)
+
+    def last_logins(self):
+        return dict(User.objects.order_by("pk").values_list("pk", "last_login"))
+
+    def test_flush_writes_the_latest_login(self):
+        for backend in ("memory", "redis"):
+            buffer = self.make_buffer(backend)
+            for user in self.users:
+                self.record(buffer, user, self.now - timedelta(hours=1))
+            self.record(buffer, self.users[0], self.now)
+            with self.assertNumQueries(2):
+                self.assertEqual(buffer.flush(), 3)
+            self.assertEqual(list(self.last_logins().values()), [self.now] + [self.now - timedelta(hours=1)] * 2)
+            self.assertEqual(buffer.drain(), {})
+
+    def test_failed_redis_flush_keeps_the_timestamps(self):
+        buffer = self.make_buffer("redis")
+        self.record(buffer, self.users[0], self.now - timedelta(hours=1))
+        self.record(buffer, self.users[1], self.now - timedelta(hours=1))
+
+        def fail(*args, **kwargs):
+            # A login recorded while the flush runs.
+            self.record(buffer, self.users[1], self.now)
+            raise DatabaseError("connection lost")
+
+        with mock.patch.object(User.objects, "bulk_update", fail), self.assertRaises(DatabaseError):
+            buffer.flush()
+        self.assertEqual(buffer.flush(), 2)
+        self.assertEqual(list(self.last_logins().values()), [self.now - timedelta(hours=1), self.now, None])
+
+    def test_failed_memory_flush_keeps_the_timestamps(self):
+        buffer = self.make_buffer("memory")
+        self.record(buffer, self.users[0], self.now)
+        stopped = mock.Mock(wait=mock.Mock(side_effect=[False, True]))
+        with (
+            mock.patch("threading.Event", return_value=stopped),
+            mock.patch.object(User.objects, "bulk_update", side_effect=DatabaseError("connection lost")),
+            self.assertLogs("users.last_login", "ERROR"),
+        ):
+            buffer._run()
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(self.last_logins()[self.users[0].pk], self.now)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class BulkCreateUsersTests(TestCase):
+    def test_rows_are_created(self):
+        totals = User.objects.bulk_create_users(
+            [
+                {"email": "one@Example.com", "password": "secret", "first_name": "One", "is_active": True},
+                {"email": " two@example.com ", "last_name": "Two"},
+            ],
+            hash_workers=1,
+        )
+        self.assertEqual(totals, {"processed": 2, "created": 2, "skipped": 0})
+        one, two = User.objects.order_by("email")
+        self.assertEqual((one.email, one.first_name, one.is_active), ("one@example.com", "One", True))
+        self.assertTrue(one.check_password("secret"))
+        self.assertEqual((two.email, two.last_name, two.is_active), ("two@example.com", "Two", False))
+        self.assertFalse(two.has_usable_password())
+
+    def test_duplicates_are_skipped(self):
+        User.objects.create(email="Existing@example.com")
+        rows = [{"email": "existing@example.com"}, {"email": "new@example.com"}, {"email": "NEW@example.com"}, {}]
+        progress = []
+        totals = User.objects.bulk_create_users(rows, batch_size=2, hash_workers=1, progress=progress.append)
+        self.assertEqual(totals, {"processed": 4, "created": 1, "skipped": 3})
+        self.assertEqual([batch["processed"] for batch in progress], [2, 4])
+        self.assertEqual(User.objects.filter_by_email("new@example.com").count(), 1)
+
+    def test_rows_inserted_concurrently_are_counted_as_skipped(self):
+        build_users = User.objects._build_users
+
+        def build_then_race(batch, pool):
+            users = build_users(batch, pool)
+            User.objects.create(email="raced@example.com")
+            return users
+
+        with mock.patch.object(User.objects, "_build_users", build_then_race):
+            totals = User.objects.bulk_create_users(
+                [{"email": "raced@example.com"}, {"email": "new@example.com"}], hash_workers=1
+            )
+        self.assertEqual(totals, {"processed": 2, "created": 1, "skipped": 1})
+        # The concurrent row was kept.
+        self.assertEqual(User.objects.get(email="raced@example.com").password, "")
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class ImportUsersCommandTests(TestCase):
+    def write(self, name, content):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        path = os.path.join(directory, name)
+        with open(path, "w") as fp:
+            fp.write(content)
+        return path
+
+    def import_users(self, *args):
+        call_command("import_users", *args, "--workers", "1", stdout=io.StringIO())
+
+    def test_csv(self):
+        path = self.write("users.csv", "email,password,is_staff\na@example.com,secret,yes\nb@example.com,,0\n")
+        self.import_users(path, "--active")
+        a, b = User.objects.order_by("email")
+        self.assertTrue(a.is_staff and a.is_active and a.check_password("secret"))
+        self.assertFalse(b.is_staff)
+
+    def test_csv_needs_an_email_column(self):
+        path = self.write("users.csv", "mail\na@example.com\n")
+        with self.assertRaises(CommandError):
+            self.import_users(path)
+
+    def test_ndjson_resumes_from_the_state_file(self):
+        lines = [json.dumps({"email": f"user{n}@example.com", "is_active": n % 2 == 0}) for n in range(5)]
+        path = self.write("users.ndjson", "\n".join(lines) + "\n")
+        state = self.write("state", "2")
+        self.import_users(path, "--state-file", state, "--batch-size", "2")
+        self.assertEqual(
+            list(User.objects.order_by("email").values_list("email", "is_active")),
+            [("user2@example.com", True), ("user3@example.com", False), ("user4@example.com", True)],
+        )
+        with open(state) as fp:
+            self.assertEqual(fp.read(), "5")
+
+
+class ExportUsersTests(TestCase):
+    def setUp(self):
+        # DjangoJSONEncoder keeps milliseconds only.
+        now = timezone.now().replace(microsecond=0)
+        self.users = [
+            User.objects.create(
+                email=f"user{n}@example.com",
+                first_name=f"First, {n}",
+                last_name='Last "quoted"',
+                is_active=n % 2 == 0,
+                is_staff=n == 0,
+                date_joined=now - timedelta(days=n),
+            )
+            for n in range(5)
+        ]
+
+    def rows(self):
+        return list(User.objects.order_by("email").values_list("email", *USER_IMPORT_FIELDS))
+
+    def test_ndjson(self):
+        lines = list(iter_export(User.objects.all(), "ndjson", chunk_size=2))
+        self.assertEqual(len(lines), 5)
+        record = json.loads(lines[0])
+        self.assertEqual(list(record), list(EXPORT_FIELDS))
+        self.assertEqual(record["email"], "user0@example.com")
+        self.assertEqual(parse_datetime(record["date_joined"]), self.users[0].date_joined)
+
+    def test_csv(self):
+        lines = list(iter_export(User.objects.all(), "csv"))
+        records = list(csv.DictReader(io.StringIO("".join(lines))))
+        self.assertEqual([record["email"] for record in records], [user.email for user in self.users])
+        self.assertEqual(records[1]["first_name"], "First, 1")
+        self.assertEqual(records[1]["last_name"], 'Last "quoted"')
+
+    def test_unknown_format(self):
+        with self.assertRaises(ValueError):
+            list(iter_export(User.objects.all(), "xml"))
+
+    def test_async_export_matches(self):
+        async def collect():
+            return [chunk async for chunk in aiter_export(User.objects.all(), "csv", chunk_size=2)]
+
+        chunks = async_to_sync(collect)()
+        self.assertEqual(len(chunks), 3)
+        self.assertEqual("".join(chunks), "".join(iter_export(User.objects.all(), "csv")))
+
+    def test_filters(self):
+        now = timezone.now()
+        queryset = filter_users(User.objects.all(), joined_after=now - timedelta(days=2, hours=12))
+        self.assertEqual(queryset.count(), 3)
+        queryset = filter_users(User.objects.all(), joined_before=now - timedelta(days=2, hours=12))
+        self.assertEqual(queryset.count(), 2)
+
+    def test_admin_action_streams(self):
+        admin_user = User.objects.create(email="admin@example.com", is_active=True, is_staff=True, is_superuser=True)
+        self.client.force_login(admin_user)
+        response = self.client.post(
+            reverse("admin:users_user_changelist"),
+            {"action": "export_as_ndjson", "_selected_action": [user.pk for user in self.users[:2]]},
+        )
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], "application/x-ndjson")
+        self.assertIn("attachment;", response["Content-Disposition"])
+        lines = b"".join(response.streaming_content).decode().splitlines()
+        self.assertEqual([json.loads(line)["email"] for line in lines], ["user0@example.com", "user1@example.com"])
+
+    @override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+    def test_round_trip(self):
+        expected = self.rows()
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        for export_format in EXPORT_FORMATS:
+            path = os.path.join(directory, f"users.{export_format}")
+            call_command("export_users", "--format", export_format, "--output", path)
+            User.objects.all().delete()
+            call_command("import_users", path, "--workers", "1", stdout=io.StringIO())
+            self.assertEqual(self.rows(), expected)
+
+
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class SeedUsersCommandTests(TestCase):
+    def seed(self, *args):
+        call_command("seed_users", *args, stdout=io.StringIO())
+
+    def test_date_joined_is_spread(self):
+        self.seed("50", "--batch-size", "20", "--joined-days", "30")
+        self.assertEqual(User.objects.count(), 50)
+        now = timezone.now()
+        joined = list(User.objects.values_list("date_joined", flat=True))
+        self.assertGreater(len(set(joined)), 40)
+        self.assertTrue(all(now - timedelta(days=30) <= date_joined <= now for date_joined in joined))
+        for date_joined, last_login in User.objects.filter(last_login__isnull=False).values_list(
+            "date_joined", "last_login"
+        ):
+            self.assertGreaterEqual(last_login, date_joined)
+
+    def test_runs_continue_the_numbering(self):
+        self.seed("3", "--joined-days", "0")
+        self.seed("2", "--joined-days", "0")
+        self.assertEqual(
+            sorted(User.objects.values_list("email", flat=True)), [f"bench-{n}@example.com" for n in range(5)]
+        )
+        self.assertEqual(len(set(User.objects.values_list("date_joined", flat=True))), 2)
+
+
+# The admin's static files are not collected for tests, so there is no manifest to look them up in.
+@override_settings(
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    }
+)
+class UserAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create(email="admin@example.com", is_active=True, is_staff=True, is_superuser=True)
+        User.objects.create(email="ada@example.com", first_name="Ada", last_name="Lovelace")
+        User.objects.create(email="alan@example.com", first_name="Alan", last_name="Turing")
+
+    def setUp(self):
+        self.client.force_login(self.admin)
+
+    def changelist(self, **params):
+        response = self.client.get(reverse("admin:users_user_changelist"), params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def emails(self, response):
+        return sorted(user.email for user in response.context["cl"].result_list)
+
+    def test_changelist_uses_the_estimated_count_paginator(self):
+        response = self.changelist()
+        self.assertIsInstance(response.context["cl"].paginator, EstimatedCountPaginator)
+        self.assertEqual(response.context["cl"].result_count, 3)
+
+    def test_search_uses_the_index(self):
+        with mock.patch("users.admin.search_queryset", wraps=search_queryset) as search:
+            response = self.changelist(q="lovelace")
+        search.assert_called_once()
+        self.assertEqual(self.emails(response), ["ada@example.com"])
+        self.assertEqual(self.emails(self.changelist(q="ala tur")), ["alan@example.com"])
+        self.assertEqual(self.emails(self.changelist(q="nobody")), [])
+
+    def test_blank_search_lists_everyone(self):
+        self.assertEqual(len(self.emails(self.changelist(q=" , "))), 3)
+
+
+@override_settings(
+    PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"],
+    STORAGES={
+        "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+        "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+    },
+)
+# The test runner has set up the test environment already.
+@mock.patch("users.management.commands.bench_auth.setup_test_environment")
+class BenchAuthCommandTests(TestCase):
+    def bench(self, *args):
+        stdout = io.StringIO()
+        call_command(
+            "bench_auth",
+            "--users",
+            "3",
+            "--repeat",
+            "2",
+            "--login-repeat",
+            "1",
+            *args,
+            stdout=stdout,
+            stderr=io.StringIO(),
+        )
+        return json.loads(stdout.getvalue())
+
+    def test_every_case_is_measured(self, _):
+        results = self.bench()
+        self.assertEqual(
+            set(results["cases"]), {"users_create", "jwt_create", "jwt_refresh", "users_me", "admin_changelist"}
+        )
+        self.assertEqual(results["cases"]["jwt_refresh"]["repeat"], 2)
+        self.assertEqual(results["database"], "sqlite")
+        # Seeded once, and the signups are deleted again.
+        self.assertEqual(User.objects.filter(email__startswith="bench-").count(), 4)
+        self.bench()
+        self.assertEqual(User.objects.filter(email__startswith="bench-").count(), 4)
+
+    def test_output_and_compare(self, _):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        baseline = os.path.join(directory, "baseline.json")
+        results = self.bench("--output", baseline)
+        with open(baseline) as file:
+            self.assertEqual(json.load(file), results)
+        comparison = self.bench("--compare", baseline, "--threshold", "1000")["comparison"]
+        self.assertEqual(comparison["baseline_commit"], results["commit"])
+        self.assertEqual(comparison["regressions"], [])
+        self.assertEqual(set(comparison["cases"]), set(results["cases"]))
+
+    def test_compare_flags_gated_regressions(self, _):
+        def case(p50, p99, queries):
+            return {"p50_ms": p50, "p95_ms": p50, "p99_ms": p99, "queries": queries}
+
+        baseline = {
+            "commit": "abc",
+            "cases": {
+                "fast": case(10, 10, 2),
+                "slower": case(10, 10, 2),
+                "tail": case(10, 10, 2),
+                "new": case(1, 1, 0),
+            },
+        }
+        results = {
+            "cases": {
+                "fast": case(9, 10, 2),
+                "slower": case(12, 10, 2),
+                "tail": case(10, 50, 2),
+                "new": case(1, 1, 1),
+                "unknown": case(1, 1, 1),
+            }
+        }
+        comparison = BenchAuthCommand().compare(baseline, results, threshold=0.1)
+        self.assertEqual(comparison["regressions"], ["slower", "new"])
+        self.assertEqual(comparison["cases"]["fast"]["p50_ms"], -0.1)
+        self.assertEqual(comparison["cases"]["tail"]["p99_ms"], 4.0)
+        self.assertIsNone(comparison["cases"]["new"]["queries"])
+        self.assertNotIn("unknown", comparison["cases"])
+
+    def test_users_me_includes_names(self, _):
+        user = User.objects.create_user("me@example.com", "password", first_name="Ada", is_active=True)
+        response = self.client.get(reverse("user-me"), HTTP_AUTHORIZATION=f"Bearer {AccessToken.for_user(user)}")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["first_name"], "Ada")
+        self.assertIn("last_name", response.json())
+
+
+class TokenRevocationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_user_cache().local.clear()
+        # A fresh per-process list for every test.
+        patcher = mock.patch.object(users.revocation, "_revocation_list", None)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.user = User.objects.create_user("user@example.com", "password", is_active=True)
+        self.refresh = RefreshToken.for_user(self.user)
+        self.access = self.refresh.access_token
+
+    def auth(self, token):
+        return {"HTTP_AUTHORIZATION": f"Bearer {token}"}
+
+    def me(self, token):
+        return self.client.get(reverse("user-me"), **self.auth(token)).status_code
+
+    def refresh_status(self, token):
+        return self.client.post(reverse("jwt-refresh"), {"refresh": str(token)}).status_code
+
+    def revoke(self, token, **data):
+        with self.captureOnCommitCallbacks(execute=True):
+            return self.client.post(reverse("jwt-revoke"), data, **self.auth(token))
+
+    def test_logout_revokes_the_access_and_refresh_tokens(self):
+        other = RefreshToken.for_user(self.user)
+        self.assertEqual(self.me(self.access), 200)
+        self.assertEqual(self.revoke(self.access, refresh=str(self.refresh)).status_code, 204)
+        self.assertEqual(self.me(self.access), 401)
+        self.assertEqual(self.refresh_status(self.refresh), 401)
+        # Other sessions stay logged in.
+        self.assertEqual(self.me(other.access_token), 200)
+        self.assertEqual(self.refresh_status(other), 200)
+        self.assertTrue(RevokedToken.objects.filter(jti=self.access["jti"], user=self.user).exists())
+
+    def test_logout_everywhere(self):
+        other = RefreshToken.for_user(self.user)
+        self.assertEqual(self.revoke(self.access, everywhere=True).status_code, 204)
+        self.assertEqual(self.me(self.access), 401)
+        self.assertEqual(self.me(other.access_token), 401)
+        self.assertEqual(self.refresh_status(other), 401)
+        self.assertTrue(TokenCutoff.objects.filter(user=self.user).exists())
+
+    def test_tokens_issued_after_a_cutoff_are_accepted(self):
+        revoke_user_tokens(self.user.pk, before=timezone.now() - timedelta(minutes=1))
+        self.assertEqual(self.me(self.access), 200)
+
+    def test_refresh_tokens_of_other_users_are_refused(self):
+        other_user = User.objects.create_user("other@example.com", "password", is_active=True)
+        response = self.revoke(self.access, refresh=str(RefreshToken.for_user(other_user)))
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("refresh", response.json())
+        self.assertEqual(self.revoke(self.access, refresh="garbage").status_code, 400)
+        self.assertFalse(RevokedToken.objects.exists())
+
+    @mock.patch("users.revocation.uses_shared_cache", return_value=True)
+    def test_other_processes_sync_on_version_changes(self, _):
+        other_process = RevocationList(
+            sync_interval=0, expected_tokens=100, false_positive_rate=0.01, false_positive_cache_size=10
+        )
+        jti, user_id, issued_at = self.access["jti"], self.user.pk, self.access["iat"]
+        self.assertFalse(other_process.is_revoked(jti, user_id, issued_at))
+        # Idle processes only read the version from the shared cache.
+        with self.assertNumQueries(0):
+            self.assertFalse(other_process.is_revoked(jti, user_id, issued_at))
+        with self.captureOnCommitCallbacks(execute=True):
+            revoke_token(self.access)
+        self.assertTrue(other_process.is_revoked(jti, user_id, issued_at))
+        with self.captureOnCommitCallbacks(execute=True):
+            revoke_user_tokens(user_id)
+        self.assertTrue(other_process.is_revoked(None, user_id, issued_at))
+
+    def test_filter_hits_are_confirmed_once(self):
+        revocation_list = RevocationList(
+            sync_interval=60, expected_tokens=100, false_positive_rate=0.01, false_positive_cache_size=10
+        )
+        revocation_list.sync_if_changed()
+        # A jti the filter reports as revoked though no row exists.
+        revocation_list.add("not-revoked")
+        with self.assertNumQueries(1):
+            self.assertFalse(revocation_list.is_revoked("not-revoked", self.user.pk, None))
+        with self.assertNumQueries(0):
+            self.assertFalse(revocation_list.is_revoked("not-revoked", self.user.pk, None))
+            self.assertFalse(revocation_list.is_revoked("never-seen", self.user.pk, None))
+
+    def test_full_filters_are_rebuilt_larger(self):
+        RevokedToken.objects.bulk_create(
+            [RevokedToken(jti=f"jti-{n}", user=self.user, expires_at=None) for n in range(30)]
+        )
+        revocation_list = RevocationList(
+            sync_interval=60, expected_tokens=10, false_positive_rate=0.01, false_positive_cache_size=10
+        )
+        revocation_list.sync()
+        self.assertGreaterEqual(revocation_list.bloom.capacity, 30)
+        self.assertTrue(all(f"jti-{n}" in revocation_list.bloom for n in range(30)))
+
+    @override_settings(
+        SIMPLE_JWT={"ACCESS_TOKEN_LIFETIME": timedelta(hours=1), "REFRESH_TOKEN_LIFETIME": timedelta(days=1)}
+    )
+    def test_delete_expired_revocations(self):
+        now = timezone.now()
+        RevokedToken.objects.bulk_create(
+            [
+                RevokedToken(jti="expired", user=self.user, expires_at=now - timedelta(minutes=1)),
+                RevokedToken(jti="valid", user=self.user, expires_at=now + timedelta(minutes=1)),
+                RevokedToken(jti="no-expiry", user=self.user, expires_at=None),
+            ]
+        )
+        other_user = User.objects.create_user("other@example.com", "password")
+        revoke_user_tokens(self.user.pk, before=now - timedelta(days=2))
+        revoke_user_tokens(other_user.pk, before=now - timedelta(hours=2))
+        self.assertEqual(delete_expired_revocations.apply(kwargs={"batch_size": 1}).get(), 2)
+        self.assertEqual(sorted(RevokedToken.objects.values_list("jti", flat=True)), ["no-expiry", "valid"])
+        self.assertEqual(list(TokenCutoff.objects.values_list("user_id", flat=True)), [other_user.pk])
+
+
+def make_image_file(name="avatar.png", color="red", size=(80, 60), image_format="PNG"):
+    buffer = io.BytesIO()
+    Image.new("RGB", size, color).save(buffer, image_format)
+    return SimpleUploadedFile(name, buffer.getvalue(), content_type=f"image/{image_format.lower()}")
+
+
+@override_settings(IMAGE_PROCESSING={"AVATAR_VARIANTS": {"small": 16, "large": 32}})
+class AvatarTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        get_user_cache().local.clear()
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        settings_override = override_settings(MEDIA_ROOT=media_root)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+        self.user = User.objects.create_user("user@example.com", "password", is_active=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def upload(self, file, client=None):
+        with mock.patch.object(process_avatar, "delay") as delay, self.captureOnCommitCallbacks(execute=True):
+            response = (client or self.client).put(reverse("user-avatar"), {"avatar": file}, format="multipart")
+        return response, delay
+
+    def test_upload_queues_the_variants(self):
+        response, delay = self.upload(make_image_file())
+        self.assertEqual(response.status_code, 202, response.content)
+        self.assertEqual(set(response.json()["avatar"]), {"original"})
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar_hash, "")
+        name, digest = delay.call_args.args
+        self.assertEqual(self.user.avatar.name, name)
+        self.assertEqual(name, f"avatars/{digest[:2]}/{digest}.png")
+        self.assertTrue(default_storage.exists(name))
+
+        self.assertEqual(process_avatar(name, digest), 1)
+        self.user.refresh_from_db()
+        self.assertEqual(self.user.avatar_hash, digest)
+        self.assertTrue(default_storage.exists(f"avatars/{digest[:2]}/{digest}/large.webp"))
+        response = self.client.get(reverse("user-me"))
+        self.assertEqual(set(response.json()["avatar"]), {"original", "small", "large"})
+
+    def test_known_content_is_ready_at_once(self):
+        _, delay = self.upload(make_image_file())
+        process_avatar(*delay.call_args.args)
+        other = APIClient()
+        other.force_authenticate(User.objects.create_user("other@example.com", "password", is_active=True))
+        response, delay = self.upload(make_image_file("copy.png"), client=other)
+        self.assertEqual(response.status_code, 200)
+        delay.assert_not_called()
+        self.assertEqual(set(response.json()["avatar"]), {"original", "small", "large"})
+
+    def test_users_uploading_during_processing_get_the_variants(self):
+        _, delay = self.upload(make_image_file())
+        other = User.objects.create_user("other@example.com", "password", is_active=True)
+        other.avatar = User.objects.get(pk=self.user.pk).avatar
+        other.save()
+        self.assertEqual(process_avatar(*delay.call_args.args), 2)
+
+    def test_invalid_uploads(self):
+        text = SimpleUploadedFile("avatar.png", b"not an image", content_type="image/png")
+        self.assertEqual(self.upload(text)[0].status_code, 400)
+        self.assertEqual(self.upload(make_image_file("avatar.bmp", image_format="BMP"))[0].status_code, 400)
+        with self.settings(IMAGE_PROCESSING={"MAX_PIXELS": 100}):
+            self.assertEqual(self.upload(make_image_file())[0].status_code, 400)
+        with self.settings(IMAGE_PROCESSING={"MAX_UPLOAD_SIZE": 100}):
+            self.assertEqual(self.upload(make_image_file())[0].status_code, 400)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.avatar)
+
+    def test_delete(self):
+        _, delay = self.upload(make_image_file())
+        response = self.client.delete(reverse("user-avatar"))
+        self.assertEqual(response.status_code, 204)
+        self.user.refresh_from_db()
+        self.assertFalse(self.user.avatar)
+        # Other users may share the stored file.
+        self.assertTrue(default_storage.exists(delay.call_args.args[0]))
@@ -0,0 +1,75 @@
+from djoser.views import UserViewSet as BaseUserViewSet
+from rest_framework import status
+from rest_framework.generics import GenericAPIView
+from rest_framework.parsers import MultiPartParser
+from rest_framework.response import Response
+
+from core.conditional import ConditionalGetMixin, instance_etag
+from users.avatars import clear_avatar, set_avatar
+from users.models import SEARCH_FIELDS, SEARCH_INDEX
+from users.revocation import revoke_token, revoke_user_tokens
+from users.serializers import AvatarSerializer, CurrentUserSerializer, TokenRevokeSerializer
+
+# Everything users/me/ renders; avatar_hash decides whether the avatar variants are listed.
+CURRENT_USER_ETAG_FIELDS = (*CurrentUserSerializer.Meta.fields, "avatar_hash")
+
+
+class UserViewSet(ConditionalGetMixin, BaseUserViewSet):
+    """
+    djoser's users/ endpoints. GET users/me/, which clients poll, carries an ETag computed
+    from the cached ``request.user`` row and answers 304 without serializing it again.
+    The user list accepts ``?search=``, answered from the search index.
+    """
+
+    search_fields = SEARCH_FIELDS
+    search_index = SEARCH_INDEX
+
+    def get_etag(self, request):
+        if self.action != "me":
+            return None
+        return instance_etag(request.user, CURRENT_USER_ETAG_FIELDS, request.accepted_media_type)
+
+
+class TokenRevokeView(GenericAPIView):
+    """
+    Logs out: revokes the access token of the request and the given refresh token, or with
+    ``everywhere`` every token of the user issued so far.
+    """
+
+    serializer_class = TokenRevokeSerializer
+
+    def post(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        if serializer.validated_data["everywhere"]:
+            revoke_user_tokens(request.user.pk)
+        else:
+            # request.auth is None for session authentication.
+            if request.auth is not None:
+                revoke_token(request.auth)
+            if "refresh" in serializer.validated_data:
+                revoke_token(serializer.validated_data["refresh"])
+        return Response(status=status.HTTP_204_NO_CONTENT)
+
+
+class AvatarView(GenericAPIView):
+    """
+    Uploads (multipart ``avatar`` field) or removes the avatar of the current user. Answers
+    with the user; 202 while the size variants are still being rendered.
+    """
+
+    serializer_class = AvatarSerializer
+    parser_classes = [MultiPartParser]
+
+    def put(self, request):
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        ready = set_avatar(request.user, serializer.validated_data["avatar"])
+        return Response(
+            CurrentUserSerializer(request.user, context=self.get_serializer_context()).data,
+            status=status.HTTP_200_OK if ready else status.HTTP_202_ACCEPTED,
+        )
+
+    def delete(self, request):
+        clear_avatar(request.user)
+        return Response(status=status.HTTP_204_NO_CONTENT)